@@ -1,14 +1,67 @@
+import asyncio
 import csv
+import json
 import os
-
-import folium
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import JSONResponse
-
-app = FastAPI(title="ProLegal İmar & Parsel Sorgu API")
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+
+import httpx
+from fastapi import FastAPI, HTTPException, Path, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+
+from utils.file_ops import save_csv_deferred
+from utils.geo_ops import save_parcel_map
+from utils.http_client import aclose_async_client, ahttp_get, upstream_metrics
+from utils.idari_yapi import idari_yapi_index
+from utils.imar_harvest import (
+    IMAR_HARVEST_CHUNK_SIZE,
+    IMAR_HARVEST_MAX_CONCURRENCY,
+    JOB_ID_PATTERN,
+    harvest_imar,
+    imar_harvest_checkpoint,
+    imar_targets,
+    read_imar_targets_csv,
+)
+from utils.imar_ops import (
+    imar_detay_url,
+    imar_kml_url,
+    imar_sorgu_url,
+    parse_imar_html,
+)
+from utils.imar_zoning import filter_zoning, read_zoning_table, refresh_zoning_table
+from utils.label_audit import label_audit
+from utils.parcel_cache import parcel_cache
+from utils.parcel_warehouse import parcel_warehouse
+from utils.polygon_store import read_polygons
+from utils.process_pool import run_in_process, shutdown_process_pool
+from utils.result_store import EXPORT_MEDIA_TYPES, result_store
+from utils.storage import write_bytes_atomic
+from utils.tkgm_ops import (
+    TKGM_BATCH_MAX_CONCURRENCY,
+    afetch_parcel_cached,
+    iter_parcels_concurrently,
+    parse_parcel_triples,
+    read_parcel_triples_csv,
+    resolve_parcel_lineages,
+)
+from utils.write_behind import WRITE_BEHIND_FLUSH_TIMEOUT, write_behind
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tek yazıcı kipinde bu işçi de yazma kuyruğunu devralmaya aday olur
+    write_behind.start()
+    yield
+    for task in _hasat_tasks.values():
+        task.cancel()
+    await aclose_async_client()
+    # Kuyrukta bekleyen kayıtlar kapanmadan önce diske yazılır
+    await asyncio.to_thread(write_behind.close)
+    shutdown_process_pool()
+
+
+app = FastAPI(title="ProLegal İmar & Parsel Sorgu API", lifespan=lifespan)
 
 HEADERS = {
     "User-Agent": (
@@ -20,7 +73,6 @@ HEADERS = {
 
 CSV_PATH_IMAR = "data/imar_sonuclari.csv"
 CSV_PATH_DETAY = "data/imar_detaylari.csv"
-CSV_PATH_PARSEL = "data/parsel.csv"
 KML_FOLDER = "kml_parseller"
 
 os.makedirs("data", exist_ok=True)
@@ -29,29 +81,77 @@ os.makedirs("visual_map", exist_ok=True)
 
 
 def yaz_csv(dikt: dict, path: str):
-    df_new = pd.DataFrame([dikt])
+    # Kayıt arka plan kuyruğuna bırakılır; disk yazımı yanıtı bekletmez
+    save_csv_deferred(dikt, path)
+
+
+def yaz_dosya(path: str, content: bytes):
+    # Yarım kalan indirme önbellekte geçerli dosya gibi görünmesin
+    write_bytes_atomic(path, content)
+
+
+# OBJECTID → devam eden KML indirmesi (aynı parsel için tek istek)
+_kml_tasks = {}
+
+
+def kml_cache_path(objectid):
+    return os.path.join(KML_FOLDER, f"imar_{objectid}.kml")
+
+
+async def _indir_kml(objectid, path: str):
+    r_kml = await ahttp_get(imar_kml_url(objectid), headers=HEADERS, timeout=30)
+    if r_kml.status_code != 200:
+        raise HTTPException(
+            status_code=502, detail=f"KML indirilemedi: {r_kml.status_code}"
+        )
+    await asyncio.to_thread(yaz_dosya, path, r_kml.content)
+    return path
+
+
+def _kml_bitti(objectid, task):
+    _kml_tasks.pop(objectid, None)
+    if not task.cancelled():
+        task.exception()  # arka plan hatası "never retrieved" uyarısı vermesin
+
+
+def kml_task(objectid):
+    """KML indirme görevini başlatır ya da sürmekte olanı döndürür."""
+    task = _kml_tasks.get(objectid)
+    if task is None:
+        task = asyncio.create_task(_indir_kml(objectid, kml_cache_path(objectid)))
+        task.add_done_callback(lambda t: _kml_bitti(objectid, t))
+        _kml_tasks[objectid] = task
+    return task
+
+
+async def indir_kml(objectid):
+    path = kml_cache_path(objectid)
     if os.path.exists(path):
-        df = pd.read_csv(path)
-        df = pd.concat([df, df_new], ignore_index=True)
-    else:
-        df = df_new
-    df.to_csv(path, index=False)
+        return path
+    # shield: bekleyen istemci koparsa ortak indirme iptal olmasın
+    return await asyncio.shield(kml_task(objectid))
 
 
 @app.get("/imar_sorgula")
-def imar_sorgula(ada: int = Query(...), parsel: int = Query(...)):
-    sorgu_url = (
-        f"https://eimar.dilovasi.bel.tr/imardurumu/service/imarsvc.aspx"
-        f"?type=adaparsel&adaparsel={ada}/{parsel}&ilce=-100000&tmahalle=-100000&tamKelimeAra=1"
-    )
+async def imar_sorgula(
+    ada: int = Query(...),
+    parsel: int = Query(...),
+    kml: bool = Query(False, description="Yanıtı KML indirmesi bitene kadar beklet"),
+):
+    """
+    İmar detaylarını döndürür. KML, detay sayfasıyla eşzamanlı olarak önbelleğe
+    indirilir; `kml=false` iken yanıt onu beklemez, dosya `/imar_kml/{objectid}`
+    uç noktasından alınır.
+    """
+    sorgu_url = imar_sorgu_url(ada, parsel)
 
     try:
-        r1 = requests.get(sorgu_url, headers=HEADERS, timeout=10)
-    except requests.exceptions.Timeout:
+        r1 = await ahttp_get(sorgu_url, headers=HEADERS, timeout=10)
+    except httpx.TimeoutException:
         raise HTTPException(
             status_code=504, detail="Dilovası sunucusu yanıt vermedi (timeout)."
         )
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=502, detail=f"İstek hatası: {e}")
 
     if r1.status_code != 200 or not r1.text.strip():
@@ -68,14 +168,18 @@ def imar_sorgula(ada: int = Query(...), parsel: int = Query(...)):
             "raw_response": r1.text,
         }
 
-    imar_url = f"https://eimar.dilovasi.bel.tr/imardurumu/imar.aspx?parselid={objectid}"
+    imar_url = imar_detay_url(objectid)
+    kml_path = kml_cache_path(objectid)
+    # Detay sayfası ile KML birbirinden bağımsız: KML indirmesi hemen başlar
+    kml_indirme = None if os.path.exists(kml_path) else kml_task(objectid)
 
     try:
-        r2 = requests.get(imar_url, headers=HEADERS, timeout=10)
-    except requests.exceptions.RequestException as e:
+        r2 = await ahttp_get(imar_url, headers=HEADERS, timeout=10)
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=502, detail=f"İmar sayfası alınamadı: {e}")
 
-    soup = BeautifulSoup(r2.text, "html.parser")
+    # BeautifulSoup ayrıştırması CPU işi: event loop'u bloklamasın
+    imar_alanlari = await run_in_process(parse_imar_html, r2.text)
 
     yaz_csv(
         {"Mahalle": mahalle, "Ada": ada, "Parsel": parsel, "OBJECTID": objectid},
@@ -83,36 +187,19 @@ def imar_sorgula(ada: int = Query(...), parsel: int = Query(...)):
     )
 
     detay = {"Mahalle": mahalle, "Ada": ada, "Parsel": parsel, "OBJECTID": objectid}
-
-    for table_row in soup.select("div.divTableRow"):
-        label = table_row.select_one("div.divTableCellLabel")
-        value = table_row.select_one("div.divTableContent")
-        if label and value:
-            key = label.get_text(strip=True)
-            val = value.get_text(strip=True)
-            if key:
-                detay[key] = val
-
-    fonksiyonlar = [a.get_text(strip=True) for a in soup.select("a.fonksiyonalani")]
-    if fonksiyonlar:
-        detay["Plan Fonksiyonu"] = " | ".join(fonksiyonlar)
+    detay.update(imar_alanlari)
 
     yaz_csv(detay, CSV_PATH_DETAY)
 
     # KML dosyası
-    kml_url = (
-        f"https://eimar.dilovasi.bel.tr/imardurumu/service/kml.ashx?token={objectid}"
-    )
-    kml_path = os.path.join(KML_FOLDER, f"parsel_{ada}_{parsel}_{objectid}.kml")
-    try:
-        r_kml = requests.get(kml_url, headers=HEADERS, timeout=10)
-        if r_kml.status_code == 200:
-            with open(kml_path, "wb") as f:
-                f.write(r_kml.content)
+    if kml_indirme is not None:
+        if kml or kml_indirme.done():
+            try:
+                await asyncio.shield(kml_indirme)
+            except Exception as e:
+                kml_path = f"KML hata: {e}"
         else:
-            kml_path = f"KML indirilemedi: {r_kml.status_code}"
-    except Exception as e:
-        kml_path = f"KML hata: {e}"
+            kml_path = None  # arka planda iniyor
 
     return JSONResponse(
         {
@@ -121,24 +208,161 @@ def imar_sorgula(ada: int = Query(...), parsel: int = Query(...)):
             "used_mahalle": mahalle,
             "source_url": imar_url,
             "kml_file": kml_path,
+            "kml_url": f"/imar_kml/{objectid}",
             "csv_kayit": CSV_PATH_DETAY,
         }
     )
 
 
+@app.get("/imar_kml/{objectid}")
+async def imar_kml(objectid: int):
+    """İmar KML dosyasını önbellekten, yoksa belediyeden indirerek döndürür."""
+    try:
+        path = await indir_kml(objectid)
+    except httpx.TimeoutException:
+        raise HTTPException(
+            status_code=504, detail="Dilovası sunucusu yanıt vermedi (timeout)."
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"KML alınamadı: {e}")
+    return FileResponse(
+        path,
+        media_type="application/vnd.google-earth.kml+xml",
+        filename=os.path.basename(path),
+    )
+
+
+# job_id → çalışan toplu imar hasadı görevi
+_hasat_tasks = {}
+
+
+@app.post("/imar_hasat/{job_id}")
+async def imar_hasat_baslat(
+    request: Request,
+    job_id: str = Path(pattern=JOB_ID_PATTERN),
+    max_concurrency: int = Query(IMAR_HARVEST_MAX_CONCURRENCY, ge=1, le=50),
+    chunk_size: int = Query(IMAR_HARVEST_CHUNK_SIZE, ge=1),
+):
+    """
+    Toplu imar durumu hasadını arka planda başlatır. Gövde {"ada": "100-250",
+    "parsel": "1-80"} ya da `file` alanında Ada, Parsel sütunlu CSV olabilir;
+    gövde boşsa aynı işin tamamlanmamış hedeflerine devam edilir.
+    """
+    task = _hasat_tasks.get(job_id)
+    if task is not None and not task.done():
+        raise HTTPException(status_code=409, detail=f"'{job_id}' zaten çalışıyor.")
+    try:
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            form = await request.form()
+            dosya = form.get("file")
+            if dosya is None:
+                raise HTTPException(status_code=400, detail="'file' alanı eksik.")
+            targets = read_imar_targets_csv(await dosya.read())
+        else:
+            govde = await request.json() if await request.body() else {}
+            targets = (
+                imar_targets(govde["ada"], govde["parsel"])
+                if govde.get("ada") is not None
+                else []
+            )
+    except (ValueError, TypeError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=f"Geçersiz hedef listesi: {e}")
+
+    _hasat_tasks[job_id] = asyncio.create_task(
+        harvest_imar(
+            job_id, targets, max_concurrency=max_concurrency, chunk_size=chunk_size
+        )
+    )
+    return {"job_id": job_id, "eklenen_hedef": len(targets)}
+
+
+@app.get("/imar_hasat/{job_id}")
+async def imar_hasat_durum(job_id: str = Path(pattern=JOB_ID_PATTERN)):
+    durum = await asyncio.to_thread(imar_harvest_checkpoint.progress, job_id)
+    if not durum["toplam"]:
+        raise HTTPException(status_code=404, detail="İş bulunamadı.")
+    task = _hasat_tasks.get(job_id)
+    durum["calisiyor"] = task is not None and not task.done()
+    if task is not None and task.done() and not task.cancelled() and task.exception():
+        durum["hata"] = str(task.exception())
+    return durum
+
+
+@app.get("/imar_tablosu")
+async def imar_tablosu(
+    min_emsal: Optional[float] = None,
+    max_emsal: Optional[float] = None,
+    min_taks: Optional[float] = None,
+    max_taks: Optional[float] = None,
+    min_hmax: Optional[float] = None,
+    max_hmax: Optional[float] = None,
+    fonksiyon: Optional[list[str]] = Query(None),
+    mahalle: Optional[str] = None,
+    yenile: bool = False,
+    limit: int = Query(1000, ge=1, le=100000),
+):
+    """
+    Normalize imar tablosunda süzgeçli sorgu; örn.
+    /imar_tablosu?min_emsal=1.0&fonksiyon=Sanayi. `yenile` ile tablo sonuç
+    deposu ve hasat parçalarından yeniden kurulur.
+    """
+    if yenile:
+        await asyncio.to_thread(write_behind.flush, WRITE_BEHIND_FLUSH_TIMEOUT)
+        await asyncio.to_thread(refresh_zoning_table)
+    table = await asyncio.to_thread(read_zoning_table)
+    sonuc = await asyncio.to_thread(
+        filter_zoning,
+        table,
+        min_emsal,
+        max_emsal,
+        min_taks,
+        max_taks,
+        min_hmax,
+        max_hmax,
+        fonksiyon,
+        mahalle,
+    )
+    df = sonuc.slice(0, limit).to_pandas()
+    return JSONResponse(json.loads(df.to_json(orient="records", force_ascii=False)))
+
+
+@app.get("/poligonlar")
+def poligonlar(
+    bbox: Optional[str] = Query(None, description="minx,miny,maxx,maxy"),
+    crs: str = "EPSG:4326",
+    limit: int = Query(5000, ge=1, le=100000),
+):
+    """
+    Görünüm kutusuyla kesişen poligonlar (GeoJSON); örn.
+    /poligonlar?bbox=29.3,40.7,29.6,40.9. Kutu ve çıktı `crs` koordinatlarında;
+    yalnızca kutuya düşen row group'lar okunur.
+    """
+    kutu = None
+    if bbox:
+        try:
+            kutu = tuple(float(v) for v in bbox.split(","))
+        except ValueError:
+            kutu = ()
+        if len(kutu) != 4:
+            raise HTTPException(
+                status_code=422, detail="bbox biçimi: minx,miny,maxx,maxy"
+            )
+    gdf = read_polygons(bbox=kutu, crs=crs).head(limit).to_crs(crs)
+    return JSONResponse(json.loads(gdf.to_json()))
+
+
 # ─────────────────────────────
 # TKGM PARSEL SORGUSU
 # ─────────────────────────────
 
 
-def get_parcel_json(mahalle_id: int, ada: int, parsel: int):
-    url = f"https://cbsapi.tkgm.gov.tr/megsiswebapi.v3/api/parsel/{mahalle_id}/{ada}/{parsel}"
-    response = requests.get(url)
-    if response.status_code != 200:
+async def get_parcel_json(mahalle_id: int, ada: int, parsel: int):
+    data = await afetch_parcel_cached(mahalle_id, ada, parsel)
+    if data is None:
         raise HTTPException(
             status_code=404, detail="Parsel bulunamadı veya API hatası."
         )
-    return response.json()
+    return data
 
 
 def extract_parcel_info(data: dict):
@@ -147,36 +371,19 @@ def extract_parcel_info(data: dict):
     return coords, props
 
 
-def append_props_to_csv(props: dict, filename: str):
-    df_new = pd.DataFrame([props])
-    if os.path.exists(filename):
-        df = pd.read_csv(filename)
-        df = pd.concat([df, df_new], ignore_index=True)
-    else:
-        df = df_new
-    df.to_csv(filename, index=False)
-    return filename
-
-
-def plot_parcel_on_map(coords, filename: str):
-    if not coords or not coords[0]:
-        return None
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    m = folium.Map(location=[coords[0][0][1], coords[0][0][0]], zoom_start=16)
-    folium.Polygon(
-        locations=[(lat, lon) for lon, lat in coords[0]], color="red"
-    ).add_to(m)
-    m.save(filename)
-    return filename
+def append_props_to_csv(props: dict):
+    write_behind.submit(parcel_warehouse.upsert_many, props)
+    return parcel_warehouse.path
 
 
 @app.get("/parsel_sorgula")
-def parsel_sorgula(mahalle_id: int, ada: int, parsel: int):
-    data = get_parcel_json(mahalle_id, ada, parsel)
+async def parsel_sorgula(mahalle_id: int, ada: int, parsel: int):
+    data = await get_parcel_json(mahalle_id, ada, parsel)
     coords, props = extract_parcel_info(data)
-    csv_path = append_props_to_csv(props, CSV_PATH_PARSEL)
+    csv_path = append_props_to_csv(props)
     map_path = f"visual_map/parsel_{mahalle_id}_{ada}_{parsel}.html"
-    harita_dosyasi = plot_parcel_on_map(coords, map_path)
+    # folium HTML üretimi süreç havuzunda
+    harita_dosyasi = await run_in_process(save_parcel_map, coords, map_path)
     return JSONResponse(
         {
             "ozellikler": props,
@@ -187,4 +394,232 @@ def parsel_sorgula(mahalle_id: int, ada: int, parsel: int):
     )
 
 
+async def read_parcel_triples(request: Request):
+    """JSON gövdesi ya da `file` alanında yüklenen CSV'den parsel üçlülerini okur."""
+    try:
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            form = await request.form()
+            dosya = form.get("file")
+            if dosya is None:
+                raise HTTPException(status_code=400, detail="'file' alanı eksik.")
+            return read_parcel_triples_csv(await dosya.read())
+        return parse_parcel_triples(await request.json())
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"Geçersiz parsel listesi: {e}")
+
+
+@app.post("/parsel_sorgula/batch")
+async def parsel_sorgula_batch(
+    request: Request,
+    max_concurrency: int = Query(TKGM_BATCH_MAX_CONCURRENCY, ge=1, le=100),
+):
+    """
+    JSON listesi ([{"mahalle_id":..,"ada":..,"parsel":..}] veya [[m, a, p]]) ya da
+    `file` alanında yüklenen CSV ile toplu parsel sorgusu. Sonuçlar tamamlandıkça
+    NDJSON olarak akıtılır.
+    """
+    triples = await read_parcel_triples(request)
+
+    async def ndjson():
+        async for sonuc in iter_parcels_concurrently(triples, max_concurrency):
+            yield json.dumps(sonuc, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@app.post("/parsel_soyagaci/batch")
+async def parsel_soyagaci_batch(
+    request: Request,
+    max_concurrency: int = Query(TKGM_BATCH_MAX_CONCURRENCY, ge=1, le=100),
+):
+    """
+    Pasife alınmış parsellerin aktif halefini ve izlenen eski -> yeni zincirini
+    toplu olarak çözer. Girdi biçimi /parsel_sorgula/batch ile aynıdır.
+    """
+    triples = await read_parcel_triples(request)
+    return await asyncio.to_thread(resolve_parcel_lineages, triples, max_concurrency)
+
+
+@app.get("/idari_yapi/mahalle_ara")
+def mahalle_ara(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=200),
+    il_id: Optional[int] = None,
+    ilce_id: Optional[int] = None,
+):
+    return idari_yapi_index.search_mahalle(q, limit=limit, il_id=il_id, ilce_id=ilce_id)
+
+
+@app.get("/upstream_metrics")
+def upstream_metrics_endpoint():
+    """Sunucu başına güncel izin verilen hız (istek/sn) ve eşzamanlılık sınırı."""
+    return upstream_metrics()
+
+
+@app.get("/parsel_ambar")
+async def parsel_ambar(
+    mahalle_id: Optional[int] = None,
+    ada: Optional[int] = None,
+    nitelik: Optional[str] = None,
+    min_alan: Optional[float] = None,
+    max_alan: Optional[float] = None,
+    limit: int = Query(1000, ge=1, le=100000),
+):
+    """Parsel ambarının Parquet görüntüsü üzerinde süzgeçli sorgu."""
+    await asyncio.to_thread(write_behind.flush, WRITE_BEHIND_FLUSH_TIMEOUT)
+    filters = [
+        (alan, op, deger)
+        for alan, op, deger in (
+            ("mahalleId", "=", mahalle_id),
+            ("adaNo", "=", ada),
+            ("nitelik", "=", nitelik),
+            ("alan", ">=", min_alan),
+            ("alan", "<=", max_alan),
+        )
+        if deger is not None
+    ]
+    df = await asyncio.to_thread(parcel_warehouse.read, None, filters or None)
+    df = df.head(limit)
+    return JSONResponse(json.loads(df.to_json(orient="records", force_ascii=False)))
+
+
+@app.get("/parsel_ambar/{mahalle_id}/{ada}/{parsel}/surumler")
+def parsel_ambar_surumler(mahalle_id: int, ada: int, parsel: int):
+    write_behind.flush(WRITE_BEHIND_FLUSH_TIMEOUT)
+    surumler = parcel_warehouse.history(mahalle_id, ada, parsel)
+    if not surumler:
+        raise HTTPException(status_code=404, detail="Parsel ambarda yok.")
+    return surumler
+
+
+# ─────────────────────────────
+# BİRİKEN SONUÇLAR: SAYFALI OKUMA VE DIŞA AKTARIM
+# ─────────────────────────────
+
+
+def _sonuc_suzgeci(mahalle, ada_min, ada_max, baslangic, bitis):
+    return {
+        "mahalle": mahalle,
+        "ada_min": ada_min,
+        "ada_max": ada_max,
+        "baslangic": baslangic,
+        "bitis": bitis,
+    }
+
+
+@app.get("/sonuclar")
+def sonuc_kumeleri():
+    write_behind.flush(WRITE_BEHIND_FLUSH_TIMEOUT)
+    return {ad: result_store.count(ad) for ad in result_store.datasets()}
+
+
+@app.get("/sonuclar/{dataset}")
+def sonuc_sayfasi(
+    dataset: str,
+    limit: int = Query(100, ge=1, le=5000),
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    mahalle: Optional[str] = None,
+    ada_min: Optional[int] = None,
+    ada_max: Optional[int] = None,
+    baslangic: Optional[datetime] = None,
+    bitis: Optional[datetime] = None,
+):
+    """
+    Sonuç tablosunu imleçle sayfalar; parametresiz çağrı son `limit` kaydı
+    döner. Daha eskiler için `before_id=onceki`, yeniler için `after_id=sonraki`.
+    """
+    write_behind.flush(WRITE_BEHIND_FLUSH_TIMEOUT)
+    if dataset not in result_store.datasets():
+        raise HTTPException(status_code=404, detail="Veri kümesi bulunamadı.")
+    suzgec = _sonuc_suzgeci(mahalle, ada_min, ada_max, baslangic, bitis)
+    try:
+        df, onceki, sonraki = result_store.page(
+            dataset, limit, after_id, before_id, **suzgec
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    kayitlar = json.loads(df.to_json(orient="records", force_ascii=False))
+    return JSONResponse({"kayitlar": kayitlar, "onceki": onceki, "sonraki": sonraki})
+
+
+@app.get("/sonuclar/{dataset}/export")
+def sonuc_disa_aktar(
+    dataset: str,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson|parquet)$"),
+    mahalle: Optional[str] = None,
+    ada_min: Optional[int] = None,
+    ada_max: Optional[int] = None,
+    baslangic: Optional[datetime] = None,
+    bitis: Optional[datetime] = None,
+    sistem: bool = False,
+):
+    """Süzgeçli dışa aktarım; dosya parça parça akıtılır, tamamı belleğe alınmaz."""
+    write_behind.flush(WRITE_BEHIND_FLUSH_TIMEOUT)
+    suzgec = _sonuc_suzgeci(mahalle, ada_min, ada_max, baslangic, bitis)
+    try:
+        govde = result_store.stream(dataset, fmt, sistem, **suzgec)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Veri kümesi bulunamadı.")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return StreamingResponse(
+        govde,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{fmt}"'},
+    )
+
+
+# ─────────────────────────────
+# ETİKET DENETİM GÜNLÜĞÜ
+# ─────────────────────────────
+
+
+@app.get("/etiket_denetim")
+def etiket_denetim(
+    mahalle: Optional[str] = None,
+    ada: Optional[str] = None,
+    parsel: Optional[str] = None,
+    etiket: Optional[str] = None,
+    kullanici: Optional[str] = None,
+    baslangic: Optional[datetime] = None,
+    bitis: Optional[datetime] = None,
+    limit: int = Query(1000, ge=1, le=100000),
+):
+    """Kim, hangi parseli, ne zaman, hangi etiketle işaretledi (eskiden yeniye)."""
+    df = label_audit.query(mahalle, ada, parsel, etiket, kullanici, baslangic, bitis)
+    df = df.tail(limit)
+    return JSONResponse(json.loads(df.to_json(orient="records", force_ascii=False)))
+
+
+@app.get("/etiket_denetim/sayim")
+def etiket_denetim_sayim(
+    baslangic: Optional[datetime] = None,
+    bitis: Optional[datetime] = None,
+    son_etiket: bool = False,
+):
+    """Mahalle ve etiket başına sayım; `son_etiket` ile parsel başına son etiket."""
+    df = label_audit.label_counts(baslangic, bitis, son_etiket)
+    return JSONResponse(json.loads(df.to_json(orient="records", force_ascii=False)))
+
+
+@app.post("/etiket_denetim/sikistir")
+def etiket_denetim_sikistir():
+    return {"tasinan": label_audit.compact()}
+
+
+@app.get("/write_behind/stats")
+def write_behind_stats():
+    stats = {**write_behind.stats, "pending": write_behind.pending()}
+    if write_behind.spool is not None:
+        stats["spool_pending"] = write_behind.spool.pending()
+        stats["spool_writer"] = write_behind.spool.is_writer
+    return stats
+
+
+@app.get("/parsel_cache/stats")
+def parsel_cache_stats():
+    return parcel_cache.stats()
+
+
 # uvicorn api_main:app --reload
@@ -2,6 +2,7 @@ import json
 import os
 import sys
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from io import BytesIO
 
@@ -10,30 +11,23 @@ import geopandas as gpd
 import pandas as pd
 import requests
 import streamlit as st
-from bs4 import BeautifulSoup
 from shapely import geometry, wkt
 from shapely.errors import WKTReadingError
 from streamlit_folium import st_folium
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-import time
 
 from mevzuat_rag.agent4 import chain, merged_retrieve
 
 # --- Utils ve modüller ---
 from utils import (
+    DOWNLOAD_FORMATS,
     apply_label,
-    extract_osm_geometries,
     file_exists,
     filter_by_columns,
     fix_wkt,
     get_download_buffer,
-    load_excel,
-    load_polygons,
-    load_slope_data,
     log_action,
     plot_folium_polygon_map,
+    read_results,
     save_csv,
     save_excel,
     section_header,
@@ -43,6 +37,22 @@ from utils import (
     show_warning,
     to_excel_download_buffer,
 )
+from utils.browser_pool import BrowserPool
+from utils.http_client import http_get
+from utils.idari_yapi import idari_yapi_index
+from utils.imar_ops import (
+    imar_detay_url,
+    imar_kml_url,
+    imar_sorgu_url,
+    parse_imar_html,
+)
+from utils.label_store import label_store
+from utils.parcel_table import load_parcel_table
+from utils.parcel_warehouse import parcel_warehouse
+from utils.polygon_features import load_polygon_features, refresh_polygon_features
+from utils.storage import write_bytes_atomic
+from utils.tkgm_ops import resolve_parcel_lineage
+from utils.write_behind import WRITE_BEHIND_FLUSH_TIMEOUT, write_behind
 
 # --- Ortak Ayarlar ---
 HEADERS = {
@@ -54,7 +64,6 @@ HEADERS = {
 }
 CSV_PATH_IMAR = "data/imar_sonuclari.csv"
 CSV_PATH_DETAY = "data/imar_detaylari.csv"
-CSV_PATH_PARSEL = "data/parsel.csv"
 KML_FOLDER = "kml_parseller"
 DATA_DIR = "data"
 VISUAL_MAP_DIR = "visual_map"
@@ -63,62 +72,25 @@ os.makedirs(KML_FOLDER, exist_ok=True)
 os.makedirs(VISUAL_MAP_DIR, exist_ok=True)
 
 
+@st.cache_resource
+def get_browser_pool():
+    # Streamlit yeniden çalıştırmaları arasında sıcak Chrome havuzu paylaşılır
+    return BrowserPool()
+
+
 def get_updated_parcel_from_browser(mahalle_id, ada, parsel):
-    url = f"https://parselsorgu.tkgm.gov.tr/#/ara/idari/{mahalle_id}/{ada}/{parsel}/0"
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # GUI olmadan çalışsın
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    driver = webdriver.Chrome(options=chrome_options)
-    try:
-        driver.get(url)
-        time.sleep(5)  # sayfanın yüklenmesini bekle
-        try:
-            show_link = driver.find_element(By.XPATH, '//*[@id="show-disabled-detail-link"]')
-            show_link.click()
-            time.sleep(2)
-            yeni_adaparsel = driver.find_element(By.XPATH, '//*[@id="list-table"]/tbody/tr[2]/td[4]').text
-            if "/" in yeni_adaparsel:
-                yeni_ada, yeni_parsel = yeni_adaparsel.split("/")
-                return int(yeni_ada), int(yeni_parsel)
-        except Exception as e:
-            return None, None
-    finally:
-        driver.quit()
-    return None, None
-
-def get_parcel_json(mahalle_id: int, ada: int, parsel: int, _rec=0, _info=None):
-    url = f"https://cbsapi.tkgm.gov.tr/megsiswebapi.v3/api/parsel/{mahalle_id}/{ada}/{parsel}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        return None, _info
-    try:
-        data = response.json()
-        # Eğer geometry None ve gittigiParselListe varsa, yeni parsele yönlendir
-        if (
-            isinstance(data, dict)
-            and (data.get("geometry") is None)
-            and data.get("properties", {}).get("gittigiParselListe")
-            and _rec < 2
-        ):
-            try:
-                gitti = json.loads(data["properties"]["gittigiParselListe"])
-                if (
-                    gitti.get("features")
-                    and len(gitti["features"]) > 0
-                    and gitti["features"][0]["properties"].get("adaNo")
-                    and gitti["features"][0]["properties"].get("parselNo")
-                ):
-                    yeni_ada = int(gitti["features"][0]["properties"]["adaNo"])
-                    yeni_parsel = int(gitti["features"][0]["properties"]["parselNo"])
-                    sebep = data["properties"].get("gittigiParselSebep", "Taşınmaz pasife alınmış.")
-                    msg = f"Sorguladığınız parsel taşınmaz olarak pasife alınmış. {sebep} Yeni parsel: {yeni_ada}/{yeni_parsel}"
-                    return get_parcel_json(mahalle_id, yeni_ada, yeni_parsel, _rec=_rec+1, _info=msg)
-            except Exception:
-                return None, _info
-        return data, _info
-    except Exception:
-        return None, _info
+    return get_browser_pool().lookup_successor(mahalle_id, ada, parsel)
+
+
+def get_parcel_json(mahalle_id: int, ada: int, parsel: int):
+    # Pasif parseller için halef indeksi ile doğrudan aktif parsele git
+    sonuc = resolve_parcel_lineage(mahalle_id, ada, parsel)
+    info = None
+    if sonuc["zincir"]:
+        sebep = sonuc["zincir"][-1]["sebep"] or "Taşınmaz pasife alınmış."
+        aktif = sonuc["aktif"]
+        info = f"Sorguladığınız parsel taşınmaz olarak pasife alınmış. {sebep} Yeni parsel: {aktif['ada']}/{aktif['parsel']}"
+    return sonuc["data"], info
 
 
 def extract_parcel_info(data: dict):
@@ -129,42 +101,12 @@ def extract_parcel_info(data: dict):
     return coords, props
 
 
-def append_props_to_csv(props: dict, filename: str):
-    # Anahtar eşleştirme: API'den gelen property isimlerini tablo başlıklarına eşleştir
-    mapping = {
-        "mahalleAd": "Mahalle",
-        "adaNo": "Ada",
-        "parselNo": "Parsel",
-        "alan": "Alan",
-        "pafta": "Pafta"
-    }
-    props_clean = {k: (v if v is not None else "") for k, v in props.items()}
-    # Eşleştirilmiş anahtarları ekle
-    for src, dst in mapping.items():
-        if src in props_clean:
-            props_clean[dst] = props_clean[src]
-    df_new = pd.DataFrame([props_clean])
-    # Eğer dosya varsa, eksik sütunları tamamla ve sıralamayı koru
-    if os.path.exists(filename):
-        df = pd.read_csv(filename)
-        for col in df_new.columns:
-            if col not in df.columns:
-                df[col] = ""
-        for col in df.columns:
-            if col not in df_new.columns:
-                df_new[col] = ""
-        # Sütun sıralamasını koru
-        df_new = df_new[df.columns]
-        df = pd.concat([df, df_new], ignore_index=True)
-    else:
-        # Eğer ilk kayıt ise, ana başlıkları öne al
-        main_cols = ["Mahalle", "Ada", "Parsel", "Alan", "Pafta"]
-        other_cols = [c for c in df_new.columns if c not in main_cols]
-        df_new = df_new[main_cols + other_cols]
-        df = df_new
-    df = df.fillna("")
-    df.to_csv(filename, index=False)
-    return filename
+def append_props_to_csv(props: dict):
+    # Parsel (mahalleId, adaNo, parselNo) anahtarıyla ambara yazılır; aynı
+    # parsel tekrar sorgulandığında yeni satır açılmaz. Yazım arka planda
+    # harita çizimiyle çakışır; tablo gösterilmeden önce flush edilir.
+    write_behind.submit(parcel_warehouse.upsert_many, props)
+    return parcel_warehouse.path
 
 
 def plot_parcel_on_map(coords, filename: str):
@@ -180,12 +122,9 @@ def plot_parcel_on_map(coords, filename: str):
 
 
 def imar_sorgula(ada: int, parsel: int):
-    sorgu_url = (
-        f"https://eimar.dilovasi.bel.tr/imardurumu/service/imarsvc.aspx"
-        f"?type=adaparsel&adaparsel={ada}/{parsel}&ilce=-100000&tmahalle=-100000&tamKelimeAra=1"
-    )
+    sorgu_url = imar_sorgu_url(ada, parsel)
     try:
-        r1 = requests.get(sorgu_url, headers=HEADERS, timeout=10)
+        r1 = http_get(sorgu_url, headers=HEADERS, timeout=10)
     except requests.exceptions.Timeout:
         st.error("Dilovası sunucusu yanıt vermedi (timeout).")
         return None
@@ -202,44 +141,35 @@ def imar_sorgula(ada: int, parsel: int):
     except Exception as e:
         st.error(f"JSON parse hatası: {e}")
         return None
-    imar_url = f"https://eimar.dilovasi.bel.tr/imardurumu/imar.aspx?parselid={objectid}"
-    try:
-        r2 = requests.get(imar_url, headers=HEADERS, timeout=10)
-    except requests.exceptions.RequestException as e:
-        st.error(f"İmar sayfası alınamadı: {e}")
-        return None
-    soup = BeautifulSoup(r2.text, "html.parser")
-    save_csv(
-        {"Mahalle": mahalle, "Ada": ada, "Parsel": parsel, "OBJECTID": objectid},
-        CSV_PATH_IMAR,
-    )
-    detay = {"Mahalle": mahalle, "Ada": ada, "Parsel": parsel, "OBJECTID": objectid}
-    for table_row in soup.select("div.divTableRow"):
-        label = table_row.select_one("div.divTableCellLabel")
-        value = table_row.select_one("div.divTableContent")
-        if label and value:
-            key = label.get_text(strip=True)
-            val = value.get_text(strip=True)
-            if key:
-                detay[key] = val
-    fonksiyonlar = [a.get_text(strip=True) for a in soup.select("a.fonksiyonalani")]
-    if fonksiyonlar:
-        detay["Plan Fonksiyonu"] = " | ".join(fonksiyonlar)
-    save_csv(detay, CSV_PATH_DETAY)
-    # KML dosyası
-    kml_url = (
-        f"https://eimar.dilovasi.bel.tr/imardurumu/service/kml.ashx?token={objectid}"
-    )
+    imar_url = imar_detay_url(objectid)
     kml_path = os.path.join(KML_FOLDER, f"parsel_{ada}{parsel}{objectid}.kml")
-    try:
-        r_kml = requests.get(kml_url, headers=HEADERS, timeout=30)
-        if r_kml.status_code == 200:
-            with open(kml_path, "wb") as f:
-                f.write(r_kml.content)
-        else:
-            kml_path = f"KML indirilemedi: {r_kml.status_code}"
-    except Exception as e:
-        kml_path = f"KML hata: {e}"
+    # Detay sayfası ve KML birbirinden bağımsız: ikisi aynı anda istenir
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        detay_future = executor.submit(http_get, imar_url, headers=HEADERS, timeout=10)
+        kml_future = executor.submit(
+            http_get, imar_kml_url(objectid), headers=HEADERS, timeout=30
+        )
+        try:
+            r2 = detay_future.result()
+        except requests.exceptions.RequestException as e:
+            st.error(f"İmar sayfası alınamadı: {e}")
+            return None
+        save_csv(
+            {"Mahalle": mahalle, "Ada": ada, "Parsel": parsel, "OBJECTID": objectid},
+            CSV_PATH_IMAR,
+        )
+        detay = {"Mahalle": mahalle, "Ada": ada, "Parsel": parsel, "OBJECTID": objectid}
+        detay.update(parse_imar_html(r2.text))
+        save_csv(detay, CSV_PATH_DETAY)
+        # KML dosyası
+        try:
+            r_kml = kml_future.result()
+            if r_kml.status_code == 200:
+                write_bytes_atomic(kml_path, r_kml.content)
+            else:
+                kml_path = f"KML indirilemedi: {r_kml.status_code}"
+        except Exception as e:
+            kml_path = f"KML hata: {e}"
     return {
         "success": True,
         "objectid": objectid,
@@ -250,6 +180,15 @@ def imar_sorgula(ada: int, parsel: int):
     }
 
 
+@st.cache_data
+def load_mahalle_options(path: str):
+    df = pd.read_csv(path)
+    if "MahalleID" not in df.columns or "MahalleAdı" not in df.columns:
+        return None
+    etiketler = df["MahalleID"].astype(str) + " (" + df["MahalleAdı"].astype(str) + ")"
+    return dict(zip(etiketler, df["MahalleID"]))
+
+
 # --- Mevzuat RAG UI ---
 def mevzuat_rag_ui():
     section_header(
@@ -289,7 +228,7 @@ def parsel_sorgu_ui():
         if data and isinstance(data, dict):
             coords, props = extract_parcel_info(data)
             if coords and props:
-                csv_path = append_props_to_csv(props, filename=CSV_PATH_PARSEL)
+                csv_path = append_props_to_csv(props)
                 map_path = f"{VISUAL_MAP_DIR}/parsel_{mahalle_id}{ada}{parsel}.html"
                 harita_dosyasi = plot_parcel_on_map(coords, map_path)
                 st.subheader("Parsel Özellikleri")
@@ -305,10 +244,10 @@ def parsel_sorgu_ui():
                     m = folium.Map(location=[coords[0][0][1], coords[0][0][0]], zoom_start=16)
                     folium.Polygon(locations=[(lat, lon) for lon, lat in coords[0]], color="red").add_to(m)
                     st_folium(m, width=700, height=500)
-                if csv_path and os.path.exists(csv_path):
-                    st.subheader("CSV Kayıtları (Son eklenen dahil)")
-                    df = pd.read_csv(csv_path)
-                    st.dataframe(df.tail(10))
+                if csv_path:
+                    st.subheader("Parsel Kayıtları (Son güncellenen dahil)")
+                    write_behind.flush(WRITE_BEHIND_FLUSH_TIMEOUT)
+                    st.dataframe(parcel_warehouse.recent(10))
             # else: hiçbir açıklama veya hata mesajı gösterme
         else:
             show_error("Parsel verisi alınamadı.")
@@ -346,13 +285,12 @@ def imar_sorgu_ui():
         else:
             show_warning("KML dosyası bulunamadı veya indirilemedi.")
         csv_path = data.get("csv_kayit")
-        if csv_path and os.path.exists(csv_path):
+        if csv_path:
             st.subheader("İmar Detayları Tablosu")
             try:
-                df = pd.read_csv(csv_path)
-                st.dataframe(df.tail(10))
+                st.dataframe(read_results(csv_path, tail=10))
             except Exception as e:
-                show_error(f"CSV dosyası okunamadı: {e}")
+                show_error(f"Kayıtlar okunamadı: {e}")
 
 
 # --- Poligon Analiz UI ---
@@ -362,14 +300,12 @@ def poligon_analiz_ui():
         description="Poligonların yapılaşma, yol yakınlığı ve eğim analizini yapabilirsiniz.",
         help_text="Poligon, eğim ve OSM verileriyle analiz ve harita görselleştirme.",
     )
-    gdf = load_polygons("data/poligon.json").to_crs("EPSG:4326")
-    slope_df = load_slope_data("data/slope/slope_cache.csv")
-    buildings, roads = extract_osm_geometries("data/osm_results")
-    gdf = gdf.merge(slope_df, on="ID", how="left")
-    gdf["Yapı Var"] = gdf.geometry.apply(
-        lambda p: not buildings[buildings.intersects(p)].empty
-    )
-    gdf["Yol Var"] = gdf.geometry.apply(lambda p: not roads[roads.intersects(p)].empty)
+    # Özellikler çevrimdışı hazırlanan GeoParquet tablosundan okunur
+    # (python -m poli_analiz.ozellik_tablosu); yenileme yalnızca değişenleri hesaplar
+    if st.sidebar.button("🔄 Özellikleri Yenile"):
+        sonuc = refresh_polygon_features()
+        st.sidebar.success(f"{sonuc['yeniden']} poligon yeniden hesaplandı.")
+    gdf, buildings, roads = load_polygon_features()
     st.sidebar.header("🔍 Filtrele")
     if st.sidebar.checkbox("🏠 Yapı İçeren"):
         gdf = gdf[gdf["Yapı Var"]]
@@ -381,7 +317,21 @@ def poligon_analiz_ui():
         gdf = gdf[gdf["Eğim (%)"] >= 10]
     st.subheader(f"📊 Eşleşen Poligon Sayısı: {len(gdf)}")
     st.dataframe(
-        gdf[["ID", "Yapı Var", "Yol Var", "Eğim (%)"]], use_container_width=True
+        gdf[
+            [
+                "ID",
+                "Yapı Var",
+                "Yol Var",
+                "Yapı Sayısı",
+                "Yapı Alanı (m²)",
+                "Yol Sayısı",
+                "Yol Uzunluğu (m)",
+                "En Yakın Yapı (m)",
+                "En Yakın Yol (m)",
+                "Eğim (%)",
+            ]
+        ],
+        use_container_width=True,
     )
     if not gdf.empty:
         m = plot_folium_polygon_map(gdf, buildings, roads)
@@ -400,26 +350,18 @@ def parsel_etiketleme_ui():
     FILE_PATH = "data/csv/dilovası.xlsx"
     LOG_PATH = "data/logs/etiket_log.csv"
     os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
-    df = load_excel(FILE_PATH)
-    if "Etiket" not in df.columns:
-        df["Etiket"] = ""
+    # Tablo dosyanın her sürümü için bir kez yüklenir; il/ilçe/mahalle
+    # seçimleri hazır dizinden yalnızca eşleşen satırları alır
+    table = load_parcel_table(FILE_PATH)
     st.sidebar.header("🔍 Filtre Seç")
-    il = st.sidebar.selectbox("İl", sorted(df["İl"].dropna().unique()))
-    ilce = st.sidebar.selectbox(
-        "İlçe", sorted(df[df["İl"] == il]["İlçe"].dropna().unique())
-    )
-    mahalle = st.sidebar.selectbox(
-        "Mahalle",
-        sorted(
-            df[(df["İl"] == il) & (df["İlçe"] == ilce)]["Mahalle"].dropna().unique()
-        ),
-    )
+    il = st.sidebar.selectbox("İl", table.iller())
+    ilce = st.sidebar.selectbox("İlçe", table.ilceler(il))
+    mahalle = st.sidebar.selectbox("Mahalle", table.mahalleler(il, ilce))
     etiket_filtre = st.sidebar.selectbox(
         "Etiket Filtrele", ["Tümü", "Uygun", "Red", "Beklemede"]
     )
-    filtered_df = df[
-        (df["İl"] == il) & (df["İlçe"] == ilce) & (df["Mahalle"] == mahalle)
-    ]
+    # Etiketler ayrı depodan okunup yalnızca seçili satırlara bindirilir
+    filtered_df = label_store.overlay(table.select(il, ilce, mahalle), FILE_PATH)
     if etiket_filtre != "Tümü":
         filtered_df = filtered_df[filtered_df["Etiket"] == etiket_filtre]
     st.subheader(f"📊 Eşleşen Parseller: {len(filtered_df)} adet")
@@ -436,18 +378,22 @@ def parsel_etiketleme_ui():
         st.markdown("### 🎯 Seçilen Parsellere Etiket Ata")
         yeni_etiket = st.selectbox("Etiket Seç", ["Uygun", "Red", "Beklemede"])
         if st.button("✅ Etiketi Uygula"):
-            df = apply_label(
-                df, secili_satirlar.index, yeni_etiket, FILE_PATH, LOG_PATH
+            apply_label(
+                filtered_df, secili_satirlar.index, yeni_etiket, FILE_PATH, LOG_PATH
             )
             show_success("Seçilenlere etiket uygulandı ve loglandı.")
     st.markdown("---")
-    buffer = get_download_buffer(df)
-    st.download_button(
-        label="📥 Etiketlenmiş Veriyi İndir (Excel)",
-        data=buffer,
-        file_name="etiketlenmis_veri.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
+    fmt = st.radio("İndirme biçimi", ["xlsx", "csv", "parquet"], horizontal=True)
+    # Tüm tablo yalnızca indirme istendiğinde etiketlenir; dosya da yalnızca
+    # etiketler değiştiğinde yeniden üretilir
+    if st.checkbox("📦 İndirme dosyasını hazırla"):
+        buffer = get_download_buffer(table, FILE_PATH, fmt)
+        st.download_button(
+            label=f"📥 Etiketlenmiş Veriyi İndir ({fmt})",
+            data=buffer,
+            file_name=f"etiketlenmis_veri.{fmt}",
+            mime=DOWNLOAD_FORMATS[fmt],
+        )
 
 
 # --- GÖRSEL VE YAZISAL İYİLEŞTİRMELER ---
@@ -485,19 +431,28 @@ elif menu == "Parsel Sorgu ve Harita":
     with st.expander("🔎 Nasıl Çalışır?"):
         st.write("Girilen mahalle, ada ve parsel bilgisiyle TKGM API'sine sorgu atılır, dönen geometri haritada gösterilir ve özellikler tabloya kaydedilir.")
 
-    # Mahalle ID seçim kutusu (yeni özellik)
-    mahalle_df = None
-    try:
-        mahalle_df = pd.read_csv("data/mahalle_id.csv")
-    except Exception:
-        st.warning("Mahalle ID listesi yüklenemedi, manuel giriş yapabilirsiniz.")
+    # Mahalle ID seçim kutusu: önce idari yapı indeksi, yoksa data/mahalle_id.csv
     mahalle_id = None
-    if mahalle_df is not None and "MahalleID" in mahalle_df.columns and "MahalleAdı" in mahalle_df.columns:
-        mahalle_options = [f"{row.MahalleID} ({row.MahalleAdı})" for _, row in mahalle_df.iterrows()]
-        mahalle_map = {f"{row.MahalleID} ({row.MahalleAdı})": row.MahalleID for _, row in mahalle_df.iterrows()}
-        secim = st.selectbox("Mahalle ID seçin", mahalle_options)
-        mahalle_id = mahalle_map[secim]
+    if len(idari_yapi_index):
+        arama = st.text_input("Mahalle ara (ad veya önek)", value="")
+        bulunanlar = idari_yapi_index.search_mahalle(arama, limit=50) if arama else []
+        if bulunanlar:
+            secim = st.selectbox(
+                "Mahalle seçin",
+                bulunanlar,
+                format_func=lambda r: f"{r['mahalle_id']} ({r['mahalle']} / {r['ilce']} / {r['il']})",
+            )
+            mahalle_id = secim["mahalle_id"]
     else:
+        try:
+            mahalle_map = load_mahalle_options("data/mahalle_id.csv")
+        except Exception:
+            mahalle_map = None
+            st.warning("Mahalle ID listesi yüklenemedi, manuel giriş yapabilirsiniz.")
+        if mahalle_map:
+            secim = st.selectbox("Mahalle ID seçin", list(mahalle_map))
+            mahalle_id = mahalle_map[secim]
+    if mahalle_id is None:
         mahalle_id = st.number_input("Mahalle ID", min_value=1, value=150127)
 
     ada = st.number_input("Ada No", min_value=0, value=3718)
@@ -509,7 +464,7 @@ elif menu == "Parsel Sorgu ve Harita":
         if data and isinstance(data, dict):
             coords, props = extract_parcel_info(data)
             if coords and props:
-                csv_path = append_props_to_csv(props, filename=CSV_PATH_PARSEL)
+                csv_path = append_props_to_csv(props)
                 map_path = f"visual_map/parsel_{mahalle_id}{ada}{parsel}.html"
                 harita_dosyasi = plot_parcel_on_map(coords, map_path)
                 st.subheader("Parsel Özellikleri")
@@ -525,10 +480,10 @@ elif menu == "Parsel Sorgu ve Harita":
                     m = folium.Map(location=[coords[0][0][1], coords[0][0][0]], zoom_start=16)
                     folium.Polygon(locations=[(lat, lon) for lon, lat in coords[0]], color="red").add_to(m)
                     st_folium(m, width=700, height=500)
-                if csv_path and os.path.exists(csv_path):
-                    st.subheader("CSV Kayıtları (Son eklenen dahil)")
-                    df = pd.read_csv(csv_path)
-                    st.dataframe(df.tail(10))
+                if csv_path:
+                    st.subheader("Parsel Kayıtları (Son güncellenen dahil)")
+                    write_behind.flush(WRITE_BEHIND_FLUSH_TIMEOUT)
+                    st.dataframe(parcel_warehouse.recent(10))
             # else: hiçbir açıklama veya hata mesajı gösterme
         else:
             st.error("Parsel verisi alınamadı.")
@@ -3,12 +3,14 @@ import os
 import streamlit as st
 
 from utils import (
+    DOWNLOAD_FORMATS,
     apply_label,
     get_download_buffer,
-    load_excel,
     section_header,
     show_success,
 )
+from utils.label_store import label_store
+from utils.parcel_table import load_parcel_table
 
 FILE_PATH = "data/csv/dilovası.xlsx"
 LOG_PATH = "data/logs/etiket_log.csv"
@@ -21,26 +23,18 @@ def parsel_etiketleme_ui():
         description="5 sütunlu veri üzerinde 3 sütuna göre filtreleme ve satırlara etiket atama.",
         help_text="Filtreleme, etiketleme, loglama ve Excel'e indirme işlemleri.",
     )
-    df = load_excel(FILE_PATH)
-    if "Etiket" not in df.columns:
-        df["Etiket"] = ""
+    # Tablo dosyanın her sürümü için bir kez yüklenir; il/ilçe/mahalle
+    # seçimleri hazır dizinden yalnızca eşleşen satırları alır
+    table = load_parcel_table(FILE_PATH)
     st.sidebar.header("🔍 Filtre Seç")
-    il = st.sidebar.selectbox("İl", sorted(df["İl"].dropna().unique()))
-    ilce = st.sidebar.selectbox(
-        "İlçe", sorted(df[df["İl"] == il]["İlçe"].dropna().unique())
-    )
-    mahalle = st.sidebar.selectbox(
-        "Mahalle",
-        sorted(
-            df[(df["İl"] == il) & (df["İlçe"] == ilce)]["Mahalle"].dropna().unique()
-        ),
-    )
+    il = st.sidebar.selectbox("İl", table.iller())
+    ilce = st.sidebar.selectbox("İlçe", table.ilceler(il))
+    mahalle = st.sidebar.selectbox("Mahalle", table.mahalleler(il, ilce))
     etiket_filtre = st.sidebar.selectbox(
         "Etiket Filtrele", ["Tümü", "Uygun", "Red", "Beklemede"]
     )
-    filtered_df = df[
-        (df["İl"] == il) & (df["İlçe"] == ilce) & (df["Mahalle"] == mahalle)
-    ]
+    # Etiketler ayrı depodan okunup yalnızca seçili satırlara bindirilir
+    filtered_df = label_store.overlay(table.select(il, ilce, mahalle), FILE_PATH)
     if etiket_filtre != "Tümü":
         filtered_df = filtered_df[filtered_df["Etiket"] == etiket_filtre]
     st.subheader(f"📊 Eşleşen Parseller: {len(filtered_df)} adet")
@@ -57,18 +51,22 @@ def parsel_etiketleme_ui():
         st.markdown("### 🎯 Seçilen Parsellere Etiket Ata")
         yeni_etiket = st.selectbox("Etiket Seç", ["Uygun", "Red", "Beklemede"])
         if st.button("✅ Etiketi Uygula"):
-            df = apply_label(
-                df, secili_satirlar.index, yeni_etiket, FILE_PATH, LOG_PATH
+            apply_label(
+                filtered_df, secili_satirlar.index, yeni_etiket, FILE_PATH, LOG_PATH
             )
             show_success("Seçilenlere etiket uygulandı ve loglandı.")
     st.markdown("---")
-    buffer = get_download_buffer(df)
-    st.download_button(
-        label="📥 Etiketlenmiş Veriyi İndir (Excel)",
-        data=buffer,
-        file_name="etiketlenmis_veri.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
+    fmt = st.radio("İndirme biçimi", ["xlsx", "csv", "parquet"], horizontal=True)
+    # Tüm tablo yalnızca indirme istendiğinde etiketlenir; dosya da yalnızca
+    # etiketler değiştiğinde yeniden üretilir
+    if st.checkbox("📦 İndirme dosyasını hazırla"):
+        buffer = get_download_buffer(table, FILE_PATH, fmt)
+        st.download_button(
+            label=f"📥 Etiketlenmiş Veriyi İndir ({fmt})",
+            data=buffer,
+            file_name=f"etiketlenmis_veri.{fmt}",
+            mime=DOWNLOAD_FORMATS[fmt],
+        )
 
 
 if __name__ == "__main__":
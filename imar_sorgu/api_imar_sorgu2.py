@@ -1,10 +1,10 @@
 import os
 
-import requests
 from bs4 import BeautifulSoup
 from fastapi import FastAPI, Query
 
-from utils import save_csv
+from utils.file_ops import save_csv
+from utils.http_client import http_get
 
 app = FastAPI(title="Dilovası İmar Sorgu API")
 
@@ -20,7 +20,7 @@ def sorgula(
     ada: int = Query(...), parsel: int = Query(...), mahalle: str = Query(None)
 ):
     sorgu_url = f"https://eimar.dilovasi.bel.tr/imardurumu/imarsvc.aspx?type=adaparsel&adaparsel={ada}/{parsel}"
-    r1 = requests.get(sorgu_url)
+    r1 = http_get(sorgu_url)
     if r1.status_code != 200 or not r1.text.strip():
         return {
             "success": False,
@@ -39,7 +39,7 @@ def sorgula(
             "raw_response": r1.text,
         }
     imar_url = f"https://eimar.dilovasi.bel.tr/imardurumu/imar.aspx?parselid={objectid}"
-    r2 = requests.get(imar_url)
+    r2 = http_get(imar_url)
     soup = BeautifulSoup(r2.text, "html.parser")
     sonuc = {"Mahalle": mahalle, "Ada": ada, "Parsel": parsel}
     for tablo in soup.find_all("table"):
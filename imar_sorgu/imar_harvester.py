@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+
+from utils.http_client import aclose_async_client
+from utils.imar_harvest import (
+    IMAR_HARVEST_CHUNK_SIZE,
+    IMAR_HARVEST_MAX_ATTEMPTS,
+    IMAR_HARVEST_MAX_CONCURRENCY,
+    harvest_dir,
+    harvest_imar,
+    imar_targets,
+    read_imar_targets_csv,
+)
+from utils.imar_zoning import refresh_zoning_table
+from utils.process_pool import shutdown_process_pool
+
+# Kullanım (depo kökünden):
+#   python -m imar_sorgu.imar_harvester --job dilovasi --ada 100-250 --parsel 1-80
+#   python -m imar_sorgu.imar_harvester --job liste --csv data/parseller.csv
+#   python -m imar_sorgu.imar_harvester --job dilovasi   # yarıda kalan işe devam
+
+
+async def harvest(args, targets):
+    try:
+        return await harvest_imar(
+            args.job,
+            targets,
+            max_concurrency=args.concurrency,
+            chunk_size=args.chunk_size,
+            max_attempts=args.max_attempts,
+            on_progress=lambda p: print(f"… {p}"),
+        )
+    finally:
+        await aclose_async_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Dilovası e-imar'dan ada/parsel aralıkları için toplu imar durumu."
+    )
+    parser.add_argument("--job", required=True, help="İş adı (devam için aynı ad)")
+    parser.add_argument("--ada", help="Ada aralığı, örn. 100-250,300")
+    parser.add_argument("--parsel", help="Parsel aralığı, örn. 1-80")
+    parser.add_argument("--csv", help="Ada, Parsel sütunlu hedef listesi")
+    parser.add_argument("--concurrency", type=int, default=IMAR_HARVEST_MAX_CONCURRENCY)
+    parser.add_argument("--chunk-size", type=int, default=IMAR_HARVEST_CHUNK_SIZE)
+    parser.add_argument("--max-attempts", type=int, default=IMAR_HARVEST_MAX_ATTEMPTS)
+    args = parser.parse_args()
+
+    targets = []
+    if args.ada or args.parsel:
+        if not (args.ada and args.parsel):
+            parser.error("--ada ve --parsel birlikte verilmelidir")
+        targets += imar_targets(args.ada, args.parsel)
+    if args.csv:
+        with open(args.csv, "rb") as f:
+            targets += read_imar_targets_csv(f.read())
+
+    try:
+        sonuc = asyncio.run(harvest(args, targets))
+    finally:
+        shutdown_process_pool()
+    print(f"✅ {sonuc} → {harvest_dir(args.job)}")
+    print(f"📊 Normalize imar tablosu: {refresh_zoning_table()}")
+
+
+if __name__ == "__main__":
+    main()
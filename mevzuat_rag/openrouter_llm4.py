@@ -1,10 +1,11 @@
 import json
 import os
 
-import requests
 from dotenv import load_dotenv
 from langchain_core.language_models.llms import LLM
 
+from utils.http_client import http_post
+
 load_dotenv()  # .env dosyasından API key'i çek
 
 
@@ -19,7 +20,7 @@ class OpenRouterLLM(LLM):
             "X-Title": "LangchainPizzaBot",
         }
         data = {"model": self.model, "messages": [{"role": "user", "content": prompt}]}
-        response = requests.post(
+        response = http_post(
             "https://openrouter.ai/api/v1/chat/completions",
             headers=headers,
             data=json.dumps(data),
@@ -1,36 +1,14 @@
-import json
 import os
 
 import geopandas as gpd
 import numpy as np
 import rasterio
 import rasterio.mask
-from shapely import wkt
-from shapely.errors import WKTReadingError
 
+from utils.geo_ops import load_polygons
 
-# Fazladan parantezleri kaldırarak WKT düzeltici
-def fix_wkt(wkt_str):
-    if not wkt_str or not isinstance(wkt_str, str):
-        return None
-    for _ in range(5):
-        try:
-            return wkt.loads(wkt_str)
-        except WKTReadingError:
-            if wkt_str.startswith("(") and wkt_str.endswith(")"):
-                wkt_str = wkt_str[1:-1]
-            else:
-                break
-    return None
-
-
-# JSON'dan tüm polygonları yükle
-with open("data/poligon.json") as f:
-    data = json.load(f)
-df = gpd.GeoDataFrame(data)
-df["geometry"] = df["geometry"].apply(lambda x: fix_wkt(x))
-df = df[df["geometry"].notnull()]
-df = gpd.GeoDataFrame(df, geometry="geometry", crs="EPSG:3857")
+# JSON'dan tüm polygonları yükle (WKT onarımı utils.geo_ops içinde)
+df = load_polygons("data/poligon.json")
 
 # Tüm TIF'leri indexle
 tif_index = []
@@ -1,14 +1,11 @@
-import json
 import math
 import os
-from time import sleep
 
-import geopandas as gpd
 import pandas as pd
-import requests
 from dotenv import load_dotenv
-from shapely import wkt
-from shapely.errors import WKTReadingError
+
+from utils.geo_ops import load_polygons
+from utils.http_client import http_get
 
 # 1. API Key yükle
 load_dotenv()
@@ -16,27 +13,12 @@ API_KEY = os.getenv("GOOGLE_ELEVATION_API_KEY")
 print("🔑 Yüklenen API KEY:", "OK" if API_KEY else "❌ Bulunamadı")
 
 
-# 2. WKT düzeltici ((())) -> (())
-def fix_wkt(wkt_str):
-    if not wkt_str or not isinstance(wkt_str, str):
-        return None
-    for _ in range(5):
-        try:
-            return wkt.loads(wkt_str)
-        except WKTReadingError:
-            if wkt_str.startswith("(") and wkt_str.endswith(")"):
-                wkt_str = wkt_str[1:-1]
-            else:
-                break
-    return None
-
-
 # 3. Google Elevation API çağrısı
 def get_elevation(lat, lon):
     url = f"https://maps.googleapis.com/maps/api/elevation/json?locations={lat},{lon}&key={API_KEY}"
     try:
-        sleep(0.2)
-        response = requests.get(url)
+        # Hız sınırı utils.http_client içindeki token bucket ile uygulanır
+        response = http_get(url)
         print(f"🌍 API çağrısı: {url}")
         response.raise_for_status()
         result = response.json()
@@ -77,13 +59,8 @@ def main():
     os.makedirs("data/slope", exist_ok=True)
     out_path = "data/slope/slope_cache.csv"
 
-    with open("data/poligon.json") as f:
-        raw = json.load(f)
-
-    df = pd.DataFrame(raw)
-    df["geometry"] = df["geometry"].apply(fix_wkt)
-    df = df[df["geometry"].notnull()]
-    gdf = gpd.GeoDataFrame(df, geometry="geometry", crs="EPSG:3857").to_crs("EPSG:4326")
+    # WKT onarımı ve önbellekli yükleme utils.geo_ops.load_polygons içinde
+    gdf = load_polygons("data/poligon.json").to_crs("EPSG:4326")
 
     # Eğer dosya varsa daha önce yazılmış ID'leri oku (isteğe bağlı optimize)
     if os.path.exists(out_path):
@@ -1,11 +1,8 @@
 import json
 import os
-import time
 
-import geopandas as gpd
-import pandas as pd
-import requests
-from shapely import wkt
+from utils.geo_ops import load_polygons
+from utils.http_client import http_post
 
 # --- Ayarlar ---
 POLYGON_PATH = "data/poligon.json"
@@ -16,13 +13,6 @@ OVERPASS_URL = "http://overpass-api.de/api/interpreter"
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
 
-def safe_wkt_load(val):
-    try:
-        return wkt.loads(val)
-    except:
-        return None
-
-
 def download_osm_data(lat, lon, radius=250, tags=("building", "highway")):
     tag_filters = "".join(
         [
@@ -39,7 +29,8 @@ def download_osm_data(lat, lon, radius=250, tags=("building", "highway")):
     >;
     out skel qt;
     """
-    response = requests.post(OVERPASS_URL, data={"data": query})
+    # Sabit bekleme yerine Overpass hızı ortak istemcideki uyarlamalı sınırlayıcıda
+    response = http_post(OVERPASS_URL, data={"data": query})
     if response.status_code == 200:
         return response.json()
     else:
@@ -48,13 +39,7 @@ def download_osm_data(lat, lon, radius=250, tags=("building", "highway")):
 
 
 # --- Poligonları Yükle ---
-with open(POLYGON_PATH, "r") as f:
-    raw = json.load(f)
-df = pd.DataFrame(raw)
-df["geometry"] = df["geometry"].apply(safe_wkt_load)
-df = df[df["geometry"].notnull()]
-gdf = gpd.GeoDataFrame(df, geometry="geometry", crs="EPSG:3857")
-gdf_latlon = gdf.to_crs(epsg=4326)
+gdf_latlon = load_polygons(POLYGON_PATH).to_crs(epsg=4326)
 
 # --- Her poligonun merkezi için OSM verisi indir ---
 downloaded = 0
@@ -73,6 +58,5 @@ for idx, row in gdf_latlon.iterrows():
         with open(save_path, "w") as f:
             json.dump(data, f)
         downloaded += 1
-    time.sleep(1)
 
 print(f"✅ İşlem tamamlandı. Yeni indirilen dosya sayısı: {downloaded}")
@@ -0,0 +1,26 @@
+import argparse
+
+from utils.polygon_features import POLYGON_FEATURES_PATH, refresh_polygon_features
+
+# Kullanım (depo kökünden):
+#   python -m poli_analiz.ozellik_tablosu         # yalnızca değişen poligonlar
+#   python -m poli_analiz.ozellik_tablosu --tam   # tüm tabloyu yeniden kur
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Poligon özellik tablosunu (GeoParquet) artımlı olarak yeniler."
+    )
+    parser.add_argument(
+        "--tam", action="store_true", help="Tüm poligonları yeniden hesapla"
+    )
+    args = parser.parse_args()
+    sonuc = refresh_polygon_features(full=args.tam)
+    print(
+        f"✅ {sonuc['toplam']} poligon, {sonuc['yeniden']} yeniden hesaplandı "
+        f"→ {POLYGON_FEATURES_PATH}"
+    )
+
+
+if __name__ == "__main__":
+    main()
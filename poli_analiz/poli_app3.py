@@ -1,14 +1,8 @@
 import streamlit as st
 from streamlit_folium import st_folium
 
-from utils import (
-    extract_osm_geometries,
-    load_polygons,
-    load_slope_data,
-    plot_folium_polygon_map,
-    section_header,
-    show_warning,
-)
+from utils import plot_folium_polygon_map, section_header, show_warning
+from utils.polygon_features import load_polygon_features, refresh_polygon_features
 
 
 def poligon_analiz_ui():
@@ -17,14 +11,12 @@ def poligon_analiz_ui():
         description="Poligonların yapılaşma, yol yakınlığı ve eğim analizini yapabilirsiniz.",
         help_text="Poligon, eğim ve OSM verileriyle analiz ve harita görselleştirme.",
     )
-    gdf = load_polygons("data/poligon.json").to_crs("EPSG:4326")
-    slope_df = load_slope_data("data/slope/slope_cache.csv")
-    buildings, roads = extract_osm_geometries("data/osm_results")
-    gdf = gdf.merge(slope_df, on="ID", how="left")
-    gdf["Yapı Var"] = gdf.geometry.apply(
-        lambda p: not buildings[buildings.intersects(p)].empty
-    )
-    gdf["Yol Var"] = gdf.geometry.apply(lambda p: not roads[roads.intersects(p)].empty)
+    # Özellikler çevrimdışı hazırlanan GeoParquet tablosundan okunur
+    # (python -m poli_analiz.ozellik_tablosu); yenileme yalnızca değişenleri hesaplar
+    if st.sidebar.button("🔄 Özellikleri Yenile"):
+        sonuc = refresh_polygon_features()
+        st.sidebar.success(f"{sonuc['yeniden']} poligon yeniden hesaplandı.")
+    gdf, buildings, roads = load_polygon_features()
     st.sidebar.header("🔍 Filtrele")
     if st.sidebar.checkbox("🏠 Yapı İçeren"):
         gdf = gdf[gdf["Yapı Var"]]
@@ -36,7 +28,21 @@ def poligon_analiz_ui():
         gdf = gdf[gdf["Eğim (%)"] >= 10]
     st.subheader(f"📊 Eşleşen Poligon Sayısı: {len(gdf)}")
     st.dataframe(
-        gdf[["ID", "Yapı Var", "Yol Var", "Eğim (%)"]], use_container_width=True
+        gdf[
+            [
+                "ID",
+                "Yapı Var",
+                "Yol Var",
+                "Yapı Sayısı",
+                "Yapı Alanı (m²)",
+                "Yol Sayısı",
+                "Yol Uzunluğu (m)",
+                "En Yakın Yapı (m)",
+                "En Yakın Yol (m)",
+                "Eğim (%)",
+            ]
+        ],
+        use_container_width=True,
     )
     if not gdf.empty:
         m = plot_folium_polygon_map(gdf, buildings, roads)
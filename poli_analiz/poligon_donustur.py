@@ -0,0 +1,20 @@
+import argparse
+
+from utils.polygon_store import POLYGON_PATH, POLYGON_STORE_PATH, convert_polygons
+
+# Kullanım (depo kökünden):
+#   python -m poli_analiz.poligon_donustur
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Poligon JSON'unu bbox süzgeçli okunabilen GeoParquet'e dönüştürür."
+    )
+    parser.add_argument("--kaynak", default=POLYGON_PATH)
+    parser.add_argument("--hedef", default=POLYGON_STORE_PATH)
+    args = parser.parse_args()
+    print(f"✅ {convert_polygons(args.kaynak, args.hedef)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import pytest
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    TimeoutException,
+    WebDriverException,
+)
+
+import utils.browser_pool as browser_pool
+from utils.browser_pool import DETAIL_LINK, NEW_PARCEL_CELL, NO_RESULT_MARKER
+
+
+class FakeElement:
+    def __init__(self, driver, locator, text=""):
+        self.driver = driver
+        self.locator = locator
+        self.text = text
+
+    def get_attribute(self, name):
+        return self.locator[1] if self.locator == DETAIL_LINK else None
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def click(self):
+        self.driver.clicked = True
+
+
+class FakeDriver:
+    """`page`: "pasif" (yeni parsel var), "yok" (sonuç yok bildirimi), "bos"."""
+
+    page = "pasif"
+
+    def __init__(self):
+        self.clicked = False
+        self.quit_called = False
+
+    def get(self, url):
+        self.clicked = False
+
+    def find_element(self, by, value):
+        locator = (by, value)
+        if locator == DETAIL_LINK and self.page == "pasif":
+            return FakeElement(self, locator)
+        if locator == NEW_PARCEL_CELL and self.clicked:
+            return FakeElement(self, locator, "1001/5")
+        if locator == NO_RESULT_MARKER and self.page == "yok":
+            return FakeElement(self, locator)
+        raise NoSuchElementException(value)
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeSuccessorIndex:
+    def __init__(self):
+        self.records = {}
+
+    def successor(self, key):
+        return self.records.get(key)
+
+    def record(self, key, successor, source):
+        self.records[key] = [successor]
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(browser_pool, "parcel_successor_index", FakeSuccessorIndex())
+    pool = browser_pool.BrowserPool(size=1, wait_timeout=0.2, driver_factory=FakeDriver)
+    yield pool
+    pool.close()
+
+
+def test_successor_is_read_from_page(pool, monkeypatch):
+    monkeypatch.setattr(FakeDriver, "page", "pasif")
+    assert pool.lookup_successor(1, 2, 5) == (1001, 5)
+
+
+def test_only_explicit_miss_is_cached(pool, monkeypatch):
+    monkeypatch.setattr(FakeDriver, "page", "bos")
+    assert pool.lookup_successor(1, 2, 3) == (None, None)
+    assert not pool._is_negative((1, 2, 3))
+
+    monkeypatch.setattr(FakeDriver, "page", "yok")
+    assert pool.lookup_successor(1, 2, 3) == (None, None)
+    assert pool._is_negative((1, 2, 3))
+
+
+def test_driver_error_is_not_cached(pool, monkeypatch):
+    def broken(self, url):
+        raise WebDriverException("sekme çöktü")
+
+    monkeypatch.setattr(FakeDriver, "get", broken)
+    assert pool.lookup_successor(1, 2, 4) == (None, None)
+    assert not pool._is_negative((1, 2, 4))
+
+
+def test_driver_is_discarded_on_any_exception(pool):
+    with pytest.raises(KeyboardInterrupt):
+        with pool.driver() as driver:
+            raise KeyboardInterrupt
+    assert driver.quit_called
+    with pool.driver() as yeni:
+        assert yeni is not driver
+    assert pool._created == 1
+
+
+def test_acquire_times_out_when_pool_is_busy(pool):
+    pool.acquire_timeout = 0.1
+    with pool.driver():
+        with pytest.raises(TimeoutException):
+            pool._acquire()
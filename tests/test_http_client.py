@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from utils.http_client import _retry_after, _retry_delay
+
+POLICY = {"timeout": 15, "backoff": 0.5}
+
+
+def response(retry_after=None):
+    headers = {} if retry_after is None else {"Retry-After": retry_after}
+    return httpx.Response(503, headers=headers)
+
+
+@pytest.mark.parametrize(
+    "value, seconds", [("3", 3.0), ("0", 0.0), ("", None), ("yarın", None)]
+)
+def test_retry_after_seconds(value, seconds):
+    assert _retry_after(value) == seconds
+
+
+def test_retry_after_http_date():
+    tarih = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 <= _retry_after(format_datetime(tarih, usegmt=True)) <= 30
+    gecmis = datetime.now(timezone.utc) - timedelta(hours=1)
+    assert _retry_after(format_datetime(gecmis, usegmt=True)) == 0.0
+
+
+def test_retry_delay_is_capped_at_host_timeout():
+    assert _retry_delay(response("3600"), POLICY, 0) == 15
+    tarih = datetime.now(timezone.utc) + timedelta(hours=1)
+    assert _retry_delay(response(format_datetime(tarih, usegmt=True)), POLICY, 0) == 15
+
+
+def test_retry_delay_falls_back_to_backoff():
+    assert _retry_delay(response(), POLICY, 2) == 2.0
+    assert _retry_delay(response("sonra"), POLICY, 0) == 0.5
@@ -0,0 +1,13 @@
+from utils.imar_zoning import build_zoning_table, filter_zoning
+
+
+def test_function_filter_on_empty_table():
+    table = build_zoning_table([])
+    assert filter_zoning(table, fonksiyon="Sanayi").num_rows == 0
+    assert filter_zoning(table, fonksiyon=[]).num_rows == 0
+
+
+def test_function_filter_without_parsed_functions():
+    table = build_zoning_table([{"Ada": "1", "Parsel": "2"}])
+    assert table.num_rows == 1
+    assert filter_zoning(table, fonksiyon="Sanayi").num_rows == 0
@@ -0,0 +1,50 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+import utils.label_audit as label_audit_module
+from utils.label_audit import LabelAudit
+from utils.result_store import ResultStore
+
+OCAK = datetime(2024, 1, 10, tzinfo=timezone.utc).timestamp()
+SUBAT = datetime(2024, 2, 10, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ResultStore(str(tmp_path / "sonuc.sqlite"))
+    iter_chunks = store.iter_chunks
+
+    def kucuk_parcalar(dataset, chunk_size, **kwargs):
+        return iter_chunks(dataset, chunk_size=2, **kwargs)
+
+    monkeypatch.setattr(store, "iter_chunks", kucuk_parcalar)
+    monkeypatch.setattr(label_audit_module, "result_store", store)
+    return store
+
+
+def test_compact_writes_one_segment_per_chunk_and_month(store, tmp_path):
+    audit = LabelAudit(log_path="etiket_log.csv", root=str(tmp_path / "arsiv"))
+    kayitlar = [
+        {"mahalle": 150127, "ada": 101, "parsel": p, "etiket": "uygun"}
+        for p in range(1, 6)
+    ]
+    store.append_many(audit.dataset, kayitlar)
+    with store._conn() as conn:
+        conn.execute(
+            f"UPDATE {audit.dataset} SET _zaman = CASE WHEN _id <= 2 THEN ? ELSE ? END",
+            (OCAK, SUBAT),
+        )
+
+    assert audit.compact(before=SUBAT + 1) == 5
+
+    dosyalar = [os.path.relpath(d, audit.root) for d in audit.segments()]
+    assert dosyalar == [
+        os.path.join("ay=2024-01", "part-000000000001-000000000002.parquet"),
+        os.path.join("ay=2024-02", "part-000000000003-000000000004.parquet"),
+        os.path.join("ay=2024-02", "part-000000000005-000000000005.parquet"),
+    ]
+    assert store.read(audit.dataset).empty
+    df = audit.query(mahalle=150127)
+    assert df["parsel"].tolist() == ["1", "2", "3", "4", "5"]
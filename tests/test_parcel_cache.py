@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.parcel_cache import ParcelCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParcelCache(path=str(tmp_path / "cache.sqlite"), ttl=60, max_entries=100)
+
+
+def test_fresh_hit_skips_fetch(cache):
+    cache.set((1, 2, 3), {"alan": "100"})
+    payload = cache.get_or_fetch((1, 2, 3), lambda *key: pytest.fail("fetch"))
+    assert payload == {"alan": "100"}
+    assert cache.counters["hit"] == 1
+
+
+def test_expired_entry_served_stale_and_revalidated_once(cache):
+    cache.set((1, 2, 3), {"alan": "eski"}, ttl=-1)
+    cagrilar = []
+    bitti = threading.Event()
+    devam = threading.Event()
+
+    def fetch(*key):
+        cagrilar.append(key)
+        devam.wait(5)
+        bitti.set()
+        return {"alan": "yeni"}
+
+    assert cache.get_or_fetch((1, 2, 3), fetch) == {"alan": "eski"}
+    # Yenileme sürerken gelen ikinci istek ayrı bir yenileme başlatmaz
+    assert cache.get_or_fetch((1, 2, 3), fetch) == {"alan": "eski"}
+    devam.set()
+    assert bitti.wait(5)
+    # Yenileme iş parçacığı kaydı yazıp sayacı artırana kadar
+    son = time.monotonic() + 5
+    while not cache.counters["revalidation"] and time.monotonic() < son:
+        time.sleep(0.01)
+
+    assert cagrilar == [(1, 2, 3)]
+    assert cache.counters["stale_hit"] == 2
+    assert cache.counters["revalidation"] == 1
+    assert cache.get((1, 2, 3)) == ({"alan": "yeni"}, True)
+
+
+def test_expired_entry_refetched_without_stale_mode(cache):
+    cache.stale_while_revalidate = False
+    cache.set((1, 2, 3), {"alan": "eski"}, ttl=-1)
+    assert cache.get_or_fetch((1, 2, 3), lambda *k: {"alan": "yeni"}) == {
+        "alan": "yeni"
+    }
+    assert cache.counters["miss"] == 1
+
+
+def test_eviction_drops_least_recently_accessed(cache):
+    cache.max_entries = 4
+    cache.touch_batch = 1000
+    for parsel in range(4):
+        cache.set((1, 1, parsel), {"p": parsel}, ttl=60)
+    # 0 ve 1 okunur; erişim zamanları henüz yalnızca bellekte bekler
+    cache.get((1, 1, 0))
+    cache.get((1, 1, 1))
+    cache.set((1, 1, 4), {"p": 4})
+
+    kalan = {
+        parsel for (parsel,) in cache._conn().execute("SELECT parsel FROM parsel_cache")
+    }
+    # Sınırın %95'i (3 kayıt) kalana kadar en eski erişilenler (2, 3) silinir
+    assert kalan == {0, 1, 4}
+    assert cache.counters["eviction"] == 2
+
+
+def test_replacing_entry_does_not_count_as_new(cache):
+    cache.set((1, 1, 1), {"p": 1})
+    cache.set((1, 1, 2), {"p": 2})
+    cache.set((1, 1, 1), {"p": 3})
+    assert cache._entry_count == 2
+
+
+def test_async_fetch_stores_result(cache):
+    async def afetch(*key):
+        return {"key": list(key)}
+
+    assert asyncio.run(cache.aget_or_fetch((5, 6, 7), afetch)) == {"key": [5, 6, 7]}
+    assert cache.get((5, 6, 7)) == ({"key": [5, 6, 7]}, True)
+    assert cache.counters["miss"] == 1
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from utils.parcel_warehouse import ParcelWarehouse, parse_tr_number
+
+
+@pytest.fixture
+def warehouse(tmp_path):
+    return ParcelWarehouse(
+        path=str(tmp_path / "ambar.sqlite"),
+        parquet_path=str(tmp_path / "ambar.parquet"),
+        legacy_csv=(),
+    )
+
+
+def parcel(parsel, alan="8.371,75", nitelik="Tarla"):
+    return {
+        "mahalleId": "150127",
+        "adaNo": "101",
+        "parselNo": str(parsel),
+        "alan": alan,
+        "nitelik": nitelik,
+    }
+
+
+@pytest.mark.parametrize(
+    "metin, sayi",
+    [
+        ("8.371,75", 8371.75),
+        ("1.250", 1250.0),
+        ("12,5", 12.5),
+        ("12.5", 12.5),
+        ("", None),
+        ("abc", None),
+    ],
+)
+def test_parse_tr_number(metin, sayi):
+    assert parse_tr_number(metin) == sayi
+
+
+def test_same_content_keeps_version(warehouse):
+    assert warehouse.upsert(parcel(1))
+    assert not warehouse.upsert(parcel(1))
+    kayit = warehouse.get(150127, 101, 1)
+    assert kayit["surum"] == 1
+    assert kayit["alan"] == 8371.75
+    assert len(warehouse) == 1
+    assert len(warehouse.history(150127, 101, 1)) == 1
+
+
+def test_changed_content_bumps_version(warehouse):
+    warehouse.upsert(parcel(1))
+    assert warehouse.upsert(parcel(1, nitelik="Bahçe"))
+    assert warehouse.get(150127, 101, 1)["surum"] == 2
+    gecmis = warehouse.history(150127, 101, 1)
+    assert [g["ozellikler"]["nitelik"] for g in gecmis] == ["Tarla", "Bahçe"]
+
+
+def test_read_merges_delta_without_rewriting_snapshot(warehouse):
+    warehouse.upsert_many([parcel(1), parcel(2)])
+    assert len(warehouse.read()) == 2
+    yazim = os.stat(warehouse.parquet_path).st_mtime_ns
+
+    warehouse.upsert(parcel(1, alan="9.000"))
+    warehouse.upsert(parcel(3, alan="10"))
+    df = warehouse.read(columns=["parselNo", "alan"])
+    assert df.to_dict("records") == [
+        {"parselNo": 1, "alan": 9000.0},
+        {"parselNo": 2, "alan": 8371.75},
+        {"parselNo": 3, "alan": 10.0},
+    ]
+    buyuk = warehouse.read(columns=["parselNo"], filters=[("alan", ">", 8500)])
+    assert buyuk["parselNo"].tolist() == [1]
+    assert os.stat(warehouse.parquet_path).st_mtime_ns == yazim
+
+
+def test_large_delta_rewrites_snapshot(warehouse):
+    warehouse.snapshot_delta = 1
+    warehouse.upsert(parcel(1))
+    warehouse.read()
+    degisiklik = warehouse._snapshot_change_count()
+    warehouse.upsert_many([parcel(2), parcel(3)])
+    assert len(warehouse.read()) == 3
+    assert warehouse._snapshot_change_count() > degisiklik
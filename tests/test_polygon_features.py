@@ -0,0 +1,100 @@
+import json
+
+import geopandas as gpd
+import pytest
+import shapely
+from geopandas.testing import assert_geodataframe_equal
+
+from utils.polygon_features import refresh_polygon_features
+
+# Aralarında ~850 m olan dört poligon; yarıçap 250 m
+MERKEZLER = {"1": 32.850, "2": 32.860, "3": 32.870, "4": 32.880}
+ENLEM = 39.930
+
+
+def kare(lon, lat, yari=0.0003):
+    return shapely.box(lon - yari, lat - yari, lon + yari, lat + yari)
+
+
+def write_polygons(path, buyuk=()):
+    geometriler = gpd.GeoSeries(
+        [
+            kare(lon, ENLEM, 0.0006 if i in buyuk else 0.0003)
+            for i, lon in MERKEZLER.items()
+        ],
+        crs="EPSG:4326",
+    ).to_crs("EPSG:3857")
+    kayitlar = [
+        {"ID": i, "geometry": wkt} for i, wkt in zip(MERKEZLER, geometriler.to_wkt())
+    ]
+    path.write_text(json.dumps(kayitlar), encoding="utf-8")
+
+
+def write_osm(path, bina_lon, yol_lon, ilk_id):
+    """Bir yapı (kapalı way) ve bir yol (açık way) içeren Overpass çıktısı."""
+    kose = kare(bina_lon, ENLEM + 0.0005, 0.0001).exterior.coords
+    noktalar = list(kose)[:4]
+    noktalar += [(yol_lon - 0.001, ENLEM - 0.0008), (yol_lon + 0.001, ENLEM - 0.0008)]
+    elements = [
+        {"type": "node", "id": ilk_id + n, "lon": x, "lat": y}
+        for n, (x, y) in enumerate(noktalar)
+    ]
+    elements += [
+        {
+            "type": "way",
+            "id": ilk_id,
+            "nodes": [ilk_id, ilk_id + 1, ilk_id + 2, ilk_id + 3, ilk_id],
+            "tags": {"building": "yes"},
+        },
+        {
+            "type": "way",
+            "id": ilk_id + 1,
+            "nodes": [ilk_id + 4, ilk_id + 5],
+            "tags": {"highway": "residential"},
+        },
+    ]
+    path.write_text(json.dumps({"elements": elements}), encoding="utf-8")
+
+
+@pytest.fixture
+def kaynak(tmp_path, monkeypatch):
+    # Poligon ve OSM önbellekleri göreli data/cache altına yazılır
+    monkeypatch.chdir(tmp_path)
+    osm = tmp_path / "osm"
+    osm.mkdir()
+    write_polygons(tmp_path / "poligon.json")
+    (tmp_path / "egim.csv").write_text(
+        "ID,Eğim (%)\n1,4.5\n2,7.0\n3,12.25\n4,3.0\n", encoding="utf-8"
+    )
+    write_osm(osm / "a.json", MERKEZLER["1"], MERKEZLER["1"], 100)
+    write_osm(osm / "b.json", MERKEZLER["3"] + 0.001, MERKEZLER["3"], 200)
+    return tmp_path
+
+
+def refresh(kaynak, path, **kwargs):
+    return refresh_polygon_features(
+        str(kaynak / path),
+        polygon_path=str(kaynak / "poligon.json"),
+        slope_path=str(kaynak / "egim.csv"),
+        osm_folder=str(kaynak / "osm"),
+        radius=250,
+        **kwargs,
+    )
+
+
+def test_incremental_refresh_matches_full_rebuild(kaynak):
+    assert refresh(kaynak, "ozellik.parquet") == {"toplam": 4, "yeniden": 4}
+    ilk = gpd.read_parquet(kaynak / "ozellik.parquet")
+
+    # 2. poligon büyür, 3. poligonun yakınındaki yapı poligona yaklaşır
+    write_polygons(kaynak / "poligon.json", buyuk={"2"})
+    write_osm(kaynak / "osm" / "b.json", MERKEZLER["3"], MERKEZLER["3"], 200)
+
+    assert refresh(kaynak, "ozellik.parquet") == {"toplam": 4, "yeniden": 2}
+    artimli = gpd.read_parquet(kaynak / "ozellik.parquet")
+    refresh(kaynak, "tam.parquet", full=True)
+    tam = gpd.read_parquet(kaynak / "tam.parquet")
+
+    assert_geodataframe_equal(artimli, tam)
+    degisen = ilk.set_index("ID").compare(artimli.set_index("ID")).index
+    assert sorted(degisen) == ["2", "3"]
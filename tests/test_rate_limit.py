@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+from utils.rate_limit import AdaptiveLimiter
+
+
+def test_cancelled_waiter_returns_no_slot():
+    limiter = AdaptiveLimiter("test", max_concurrency=2)
+    limiter.concurrency_limit = 1
+
+    async def main():
+        await limiter.aacquire()
+        bekleyen = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        assert len(limiter._waiters) == 1
+        bekleyen.cancel()
+        await asyncio.gather(bekleyen, return_exceptions=True)
+        limiter.release(200, 0.01)
+
+    asyncio.run(main())
+    assert limiter.in_flight == 0
+    assert limiter._waiters == []
+
+
+def test_cancel_during_bucket_wait_returns_slot():
+    limiter = AdaptiveLimiter("test", rate=0.5, min_rate=0.1)
+
+    async def main():
+        # Kovadaki tek jeton harcanır; sonraki istek jeton beklerken iptal edilir
+        await limiter.aacquire()
+        limiter.release(200, 0.01)
+        istek = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        assert limiter.in_flight == 1
+        istek.cancel()
+        await asyncio.gather(istek, return_exceptions=True)
+
+    asyncio.run(main())
+    assert limiter.in_flight == 0
+    assert limiter.stats["requests"] == 1
+
+
+def test_release_from_other_thread_wakes_async_waiter():
+    limiter = AdaptiveLimiter("test", max_concurrency=2)
+    limiter.concurrency_limit = 1
+    limiter.acquire()
+
+    async def main():
+        threading.Timer(0.05, limiter.release, (200, 0.01)).start()
+        await asyncio.wait_for(limiter.aacquire(), timeout=2)
+
+    asyncio.run(main())
+    assert limiter.in_flight == 1
+
+
+def test_throttle_halves_and_success_raises():
+    limiter = AdaptiveLimiter(
+        "test", rate=10, max_rate=40, max_concurrency=16, cooldown=0
+    )
+    assert limiter.concurrency_limit == 8
+
+    limiter.acquire()
+    limiter.release(429, 0.1)
+    assert limiter.concurrency_limit == 4
+    assert limiter.bucket.rate == 5
+    assert limiter.stats["throttled"] == 1
+
+    hiz = limiter.bucket.rate
+    for _ in range(4):
+        limiter.in_flight += 1
+        limiter.release(200, 0.1)
+    assert limiter.concurrency_limit == 5
+    assert limiter.bucket.rate > hiz
+
+
+def test_abandon_does_not_touch_aimd_state():
+    limiter = AdaptiveLimiter("test", rate=10, cooldown=0)
+    limite, hiz = limiter.concurrency_limit, limiter.bucket.rate
+    limiter.acquire()
+    limiter.abandon()
+    assert limiter.in_flight == 0
+    assert (limiter.concurrency_limit, limiter.bucket.rate) == (limite, hiz)
+    assert limiter.stats["requests"] == 0
@@ -0,0 +1,21 @@
+from utils.result_store import ResultStore
+
+
+def test_keys_differing_only_by_case_share_a_column(tmp_path):
+    legacy = tmp_path / "parsel.csv"
+    legacy.write_text("Ada,Alan,alan\n1,500.0,\n", encoding="utf-8")
+    store = ResultStore(str(tmp_path / "sonuc.sqlite"))
+
+    store.append_many("parsel", [{"ada": 2, "alan": 750.0}], legacy_path=str(legacy))
+
+    df = store.read("parsel")
+    assert list(df.columns) == ["Ada", "Alan"]
+    assert df["Alan"].tolist() == [500.0, 750.0]
+    assert df["Ada"].tolist() == [1, 2]
+
+
+def test_empty_record_is_stored(tmp_path):
+    store = ResultStore(str(tmp_path / "sonuc.sqlite"))
+    store.append_many("log", [{}])
+    store.append_many("log", [{"islem": "etiket"}, {}])
+    assert len(store.read("log")) == 3
@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+
+import pytest
+
+from utils.write_behind import WriteBehindQueue
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    kuyruklar = []
+
+    def make(**kwargs):
+        kwargs.setdefault("dead_letter", str(tmp_path / "dead.jsonl"))
+        kuyruk = WriteBehindQueue(**kwargs)
+        kuyruklar.append(kuyruk)
+        return kuyruk
+
+    yield make
+    for kuyruk in kuyruklar:
+        kuyruk.close(timeout=5)
+
+
+def test_flush_on_full_queue_times_out(make_queue):
+    kapi = threading.Event()
+    kuyruk = make_queue(max_pending=1, flush_size=1)
+
+    def yavas(items):
+        kapi.wait(5)
+
+    kuyruk.submit(yavas, 0)
+    # Yazıcı ilk kaydı alıp beklerken kuyruk dolar
+    son = time.monotonic() + 2
+    while kuyruk.pending() and time.monotonic() < son:
+        time.sleep(0.01)
+    kuyruk.submit(yavas, 1)
+
+    basla = time.monotonic()
+    assert kuyruk.flush(timeout=0.1) is False
+    assert time.monotonic() - basla < 1
+    kapi.set()
+    assert kuyruk.flush(timeout=5)
+
+
+def test_flush_and_close_drain_queue(make_queue):
+    yazilan = {}
+    kuyruk = make_queue(flush_size=1000, flush_interval_ms=60000)
+
+    def yaz(hedef, items):
+        yazilan.setdefault(hedef, []).extend(items)
+
+    for i in range(5):
+        kuyruk.submit(yaz, i, "sonuc")
+    assert kuyruk.flush(timeout=5)
+    assert yazilan == {"sonuc": [0, 1, 2, 3, 4]}
+
+    kuyruk.submit(yaz, 5, "sonuc")
+    kuyruk.submit(yaz, 6, "parsel")
+    kuyruk.close(timeout=5)
+    assert yazilan == {"sonuc": [0, 1, 2, 3, 4, 5], "parsel": [6]}
+    assert kuyruk.pending() == 0
+    assert kuyruk.stats["written"] == 7
+
+
+def test_bad_record_goes_to_dead_letter(make_queue, tmp_path):
+    yazilan = []
+    kuyruk = make_queue(flush_size=1000, flush_interval_ms=60000)
+
+    def yaz(items):
+        if any(item.get("bozuk") for item in items):
+            raise ValueError("bozuk kayıt")
+        yazilan.extend(items)
+
+    for kayit in [{"no": 1}, {"no": 2, "bozuk": True}, {"no": 3}]:
+        kuyruk.submit(yaz, kayit)
+    assert kuyruk.flush(timeout=5)
+
+    assert yazilan == [{"no": 1}, {"no": 3}]
+    assert kuyruk.stats["errors"] == 1
+    satirlar = (tmp_path / "dead.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(satirlar) == 1
+    olu = json.loads(satirlar[0])
+    assert olu["kayit"] == {"no": 2, "bozuk": True}
+    assert olu["hedef"].endswith("yaz")
@@ -19,11 +19,11 @@ def parsel_sorgu(
     parsel: int = Query(..., description="Parsel numarası"),
 ) -> Any:
     """
-    TKGM API üzerinden parsel sorgulama yapar, sonucu parsel.csv'ye ekler ve harita görselini visual_map/ klasörüne kaydeder.
+    TKGM API üzerinden parsel sorgulama yapar, sonucu parsel ambarına ekler ve harita görselini visual_map/ klasörüne kaydeder.
     """
     data = get_parcel_json(mahalle_id, ada, parsel)
     coords, props = extract_parcel_info(data)
-    csv_path = append_props_to_csv(props, filename="parsel.csv")
+    csv_path = append_props_to_csv(props)
     map_dir = "visual_map"
     map_path = os.path.join(map_dir, f"parsel_{mahalle_id}_{ada}_{parsel}.html")
     plot_parcel_on_map(coords, filename=map_path)
@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+
+import pandas as pd
+
+from utils.http_client import aclose_async_client
+from utils.idari_yapi import (
+    IDARI_YAPI_MAX_CONCURRENCY,
+    crawl_idari_yapi,
+    idari_yapi_index,
+)
+
+# Kullanım (depo kökünden):
+#   python -m tkgm.idari_yapi_crawler                 # tüm Türkiye
+#   python -m tkgm.idari_yapi_crawler --il 35 41      # yalnızca seçilen iller
+#   python -m tkgm.idari_yapi_crawler --csv data/mahalle_id.csv
+
+
+async def crawl(il_ids, concurrency):
+    try:
+        return await crawl_idari_yapi(il_ids=il_ids, max_concurrency=concurrency)
+    finally:
+        await aclose_async_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="TKGM idariYapi hiyerarşisini (il → ilçe → mahalle) indeksler."
+    )
+    parser.add_argument("--il", type=int, nargs="*", help="Yalnızca bu il ID'leri")
+    parser.add_argument("--concurrency", type=int, default=IDARI_YAPI_MAX_CONCURRENCY)
+    parser.add_argument(
+        "--csv", help="Mahalleleri eski biçimde (MahalleAdı, MahalleID) CSV'ye de yaz"
+    )
+    args = parser.parse_args()
+
+    iller, ilceler, mahalleler = asyncio.run(crawl(args.il, args.concurrency))
+    idari_yapi_index.replace(iller, ilceler, mahalleler)
+    print(
+        f"✅ {len(iller)} il, {len(ilceler)} ilçe, {len(mahalleler)} mahalle "
+        f"→ {idari_yapi_index.path}"
+    )
+
+    if args.csv:
+        df = pd.DataFrame(
+            [(ad, mahalle_id) for mahalle_id, _, _, ad in mahalleler],
+            columns=["MahalleAdı", "MahalleID"],
+        )
+        df.to_csv(args.csv, index=False, encoding="utf-8")
+        print(f"✅ CSV yazıldı → {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
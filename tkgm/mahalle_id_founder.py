@@ -1,12 +1,13 @@
-import requests
 import pandas as pd
 import os
 
+from utils.http_client import http_get
+
 # 📌 Urla ilçe ID'si
 ILCE_ID = 563
 URL = f"https://cbsapi.tkgm.gov.tr/megsiswebapi.v3.1/api/idariYapi/mahalleListe/{ILCE_ID}"
 
-response = requests.get(URL)
+response = http_get(URL)
 
 if response.status_code == 200:
     data = response.json()
@@ -1,23 +1,25 @@
 import os
+from typing import Optional
 
 import pandas as pd
-import requests
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.responses import JSONResponse
 
-from utils import plot_folium_polygon_map, save_csv
+from utils import plot_folium_polygon_map
+from utils.idari_yapi import idari_yapi_index
+from utils.parcel_warehouse import parcel_warehouse
+from utils.tkgm_ops import fetch_parcel_cached
 
 app = FastAPI(title="TKGM Parsel Sorgu API")
 
 
 def get_parcel_json(mahalle_id: int, ada: int, parsel: int):
-    url = f"https://cbsapi.tkgm.gov.tr/megsiswebapi.v3/api/parsel/{mahalle_id}/{ada}/{parsel}"
-    response = requests.get(url)
-    if response.status_code != 200:
+    data = fetch_parcel_cached(mahalle_id, ada, parsel)
+    if data is None:
         raise HTTPException(
             status_code=404, detail="Parsel bulunamadı veya API hatası."
         )
-    return response.json()
+    return data
 
 
 def extract_parcel_info(data: dict):
@@ -26,8 +28,10 @@ def extract_parcel_info(data: dict):
     return coords, props
 
 
-def append_props_to_csv(props: dict, filename: str = "parsel.csv"):
-    return save_csv(props, filename)
+def append_props_to_csv(props: dict):
+    # Parsel (mahalleId, adaNo, parselNo) anahtarıyla ambara yazılır
+    parcel_warehouse.upsert(props)
+    return parcel_warehouse.path
 
 
 def plot_parcel_on_map(coords, filename: str):
@@ -57,4 +61,14 @@ def parsel_sorgu(mahalle_id: int, ada: int, parsel: int):
     )
 
 
+@app.get("/idari_yapi/mahalle_ara")
+def mahalle_ara(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=200),
+    il_id: Optional[int] = None,
+    ilce_id: Optional[int] = None,
+):
+    return idari_yapi_index.search_mahalle(q, limit=limit, il_id=il_id, ilce_id=ilce_id)
+
+
 # uvicorn tkgm_api:app --reload --port 8000
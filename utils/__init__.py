@@ -1,6 +1,82 @@
-from .etiket_ops import *
-from .file_ops import *
-from .geo_ops import *
-from .llm_ops import *
-from .rag_ops import *
-from .streamlit_ui import *
+import importlib
+
+# Paket düzeyindeki adlar ilk erişimde kendi alt modüllerinden yüklenir.
+# `utils.parcel_cache` gibi bir alt modülü içe aktarmak böylece LLM, Chroma
+# ve Streamlit bağımlılıklarını yüklemez. Diğer alt modüller doğrudan
+# (`from utils.write_behind import write_behind`) içe aktarılır.
+_EXPORTS = {
+    "etiket_ops": (
+        "apply_label",
+        "filter_by_columns",
+        "get_download_buffer",
+        "load_labeled",
+    ),
+    "file_ops": (
+        "DOWNLOAD_CACHE_DIR",
+        "DOWNLOAD_CACHE_KEEP",
+        "DOWNLOAD_FORMATS",
+        "cached_download",
+        "export_results_csv",
+        "file_exists",
+        "frame_hash",
+        "load_excel",
+        "load_json",
+        "log_action",
+        "log_actions",
+        "read_results",
+        "save_csv",
+        "save_csv_deferred",
+        "save_excel",
+        "save_json",
+        "to_excel_download_buffer",
+        "write_xlsx",
+    ),
+    "geo_ops": (
+        "OSM_CACHE_DIR",
+        "OSM_PARALLEL_MIN_FILES",
+        "POLYGON_CACHE_DIR",
+        "extract_osm_geometries",
+        "fix_wkt",
+        "geometries_from_wkt",
+        "load_polygons",
+        "load_slope_data",
+        "osm_cache_path",
+        "plot_folium_polygon_map",
+        "polygon_presence",
+        "save_parcel_map",
+    ),
+    "llm_ops": ("OpenRouterLLM",),
+    "rag_ops": (
+        "CSV_DIR",
+        "DB_DIR",
+        "EMBED_MODEL",
+        "create_or_update_collections",
+        "embeddings",
+        "get_all_collections",
+        "get_retriever",
+        "split_into_chunks",
+    ),
+    "streamlit_ui": (
+        "section_header",
+        "show_error",
+        "show_info",
+        "show_success",
+        "show_warning",
+    ),
+}
+_NAME_TO_MODULE = {ad: modul for modul, adlar in _EXPORTS.items() for ad in adlar}
+
+__all__ = sorted(_NAME_TO_MODULE)
+
+
+def __getattr__(name):
+    modul = _NAME_TO_MODULE.get(name)
+    if modul is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{modul}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,223 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from utils.parcel_lineage import parcel_successor_index
+
+# Test için yerel taslak sayfa: PARSELSORGU_URL=file:///.../tkgm/stub/parselsorgu.html
+PARSELSORGU_URL = os.getenv("PARSELSORGU_URL", "https://parselsorgu.tkgm.gov.tr/")
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_WAIT_TIMEOUT = float(os.getenv("BROWSER_WAIT_TIMEOUT", "10"))
+BROWSER_NEGATIVE_TTL = float(os.getenv("BROWSER_NEGATIVE_TTL", "3600"))
+BROWSER_NEGATIVE_MAX = int(os.getenv("BROWSER_NEGATIVE_MAX", "10000"))
+# Boşta sürücü için en fazla bu kadar saniye beklenir
+BROWSER_ACQUIRE_TIMEOUT = float(os.getenv("BROWSER_ACQUIRE_TIMEOUT", "60"))
+
+DETAIL_LINK = (By.ID, "show-disabled-detail-link")
+NEW_PARCEL_CELL = (By.XPATH, '//*[@id="list-table"]/tbody/tr[2]/td[4]')
+# Parsel aktifse ya da bulunamazsa detay bağlantısı hiç gelmez; sayfanın
+# gösterdiği bu bildirim beklemenin erken bitmesini sağlar
+NO_RESULT_MARKER = (By.CSS_SELECTOR, ".toast-message")
+
+# Sayfa halef olmadığını açıkça bildirdi; zaman aşımı ve sürücü hatalarından
+# farklı olarak yalnızca bu sonuç olumsuz önbelleğe yazılır
+_NO_SUCCESSOR = object()
+# Atılan sürücünün yeri: kuyruktan bunu alan yeni bir sürücü açar
+_FREED = object()
+
+
+def new_chrome_driver():
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")  # GUI olmadan çalışsın
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    return webdriver.Chrome(options=chrome_options)
+
+
+class BrowserPool:
+    """
+    parselsorgu.tkgm.gov.tr sorguları için sıcak tutulan headless Chrome havuzu.
+    Sürücüler istekler arasında yeniden kullanılır; boşta sürücü yoksa istek
+    kuyrukta bekler. Sabit `sleep` yerine elemanlar için açık bekleme yapılır.
+    """
+
+    def __init__(
+        self,
+        size=BROWSER_POOL_SIZE,
+        base_url=PARSELSORGU_URL,
+        wait_timeout=BROWSER_WAIT_TIMEOUT,
+        driver_factory=new_chrome_driver,
+        acquire_timeout=BROWSER_ACQUIRE_TIMEOUT,
+    ):
+        self.size = size
+        self.base_url = base_url
+        self.wait_timeout = wait_timeout
+        self.driver_factory = driver_factory
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        # Anahtar -> bitiş zamanı; TTL sabit olduğu için ekleme sırası bitiş sırasıdır
+        self._negative = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=size)
+        atexit.register(self.close)
+
+    def warm_up(self):
+        drivers = []
+        with self._lock:
+            while self._created < self.size:
+                drivers.append(self.driver_factory())
+                self._created += 1
+        for driver in drivers:
+            self._idle.put(driver)
+
+    def _acquire(self):
+        try:
+            driver = self._idle.get_nowait()
+        except queue.Empty:
+            driver = None
+        if driver is None:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    return self.driver_factory()
+                except BaseException:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            try:
+                driver = self._idle.get(timeout=self.acquire_timeout)
+            except queue.Empty:
+                raise TimeoutException(
+                    f"{self.acquire_timeout} sn içinde boşta tarayıcı bulunamadı"
+                ) from None
+        if driver is _FREED:
+            try:
+                return self.driver_factory()
+            except BaseException:
+                self._idle.put(_FREED)
+                raise
+        return driver
+
+    @contextmanager
+    def driver(self):
+        driver = self._acquire()
+        try:
+            yield driver
+        except BaseException:
+            # Hata (ya da kesme) sonrası sürücünün durumu bilinmez: atılır,
+            # yeri bekleyen bir isteğin yenisini açması için kuyruğa bırakılır
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            self._idle.put(_FREED)
+            raise
+        else:
+            self._idle.put(driver)
+
+    def _lookup(self, mahalle_id, ada, parsel):
+        """
+        (yeni_ada, yeni_parsel), sayfa sonuç yok dediyse `_NO_SUCCESSOR`,
+        sonuç alınamadıysa (zaman aşımı, okunamayan hücre) None döner.
+        """
+        url = f"{self.base_url}#/ara/idari/{mahalle_id}/{ada}/{parsel}/0"
+        with self.driver() as driver:
+            # Yalnızca hash değişimi sayfayı yenilemez; önceki sorgunun DOM'u kalmasın
+            driver.get("about:blank")
+            driver.get(url)
+            wait = WebDriverWait(driver, self.wait_timeout)
+            try:
+                eleman = wait.until(
+                    EC.any_of(
+                        EC.element_to_be_clickable(DETAIL_LINK),
+                        EC.presence_of_element_located(NO_RESULT_MARKER),
+                    )
+                )
+                if eleman.get_attribute("id") != DETAIL_LINK[1]:
+                    return _NO_SUCCESSOR
+                eleman.click()
+                wait.until(lambda d: "/" in d.find_element(*NEW_PARCEL_CELL).text)
+            except TimeoutException:
+                return None
+            yeni_adaparsel = driver.find_element(*NEW_PARCEL_CELL).text
+        try:
+            yeni_ada, yeni_parsel = yeni_adaparsel.split("/")
+            return int(yeni_ada), int(yeni_parsel)
+        except ValueError:
+            return None
+
+    def _is_negative(self, key):
+        with self._lock:
+            bitis = self._negative.get(key)
+            if bitis is not None and bitis <= time.time():
+                del self._negative[key]
+                bitis = None
+        return bitis is not None
+
+    def _remember_negative(self, key):
+        now = time.time()
+        with self._lock:
+            self._negative.pop(key, None)
+            self._negative[key] = now + BROWSER_NEGATIVE_TTL
+            # Süresi dolanlar ve sınırı aşan en eskiler baştan atılır
+            while self._negative and (
+                len(self._negative) > BROWSER_NEGATIVE_MAX
+                or next(iter(self._negative.values())) <= now
+            ):
+                self._negative.popitem(last=False)
+
+    def lookup_successor(self, mahalle_id, ada, parsel):
+        """Pasif parselin yeni (ada, parsel) bilgisini döner; yoksa (None, None)."""
+        key = (int(mahalle_id), int(ada), int(parsel))
+        bilinen = parcel_successor_index.successor(key)
+        if bilinen is not None:
+            return bilinen[0][1], bilinen[0][2]
+        if self._is_negative(key):
+            return None, None
+        try:
+            sonuc = self._lookup(*key)
+        except WebDriverException:
+            sonuc = None
+        if sonuc is _NO_SUCCESSOR:
+            self._remember_negative(key)
+            return None, None
+        if sonuc is None:
+            # Geçici hata: bir sonraki sorgu yeniden denesin
+            return None, None
+        parcel_successor_index.record(key, (key[0], *sonuc), "parselsorgu")
+        return sonuc
+
+    def submit(self, mahalle_id, ada, parsel):
+        return self._executor.submit(self.lookup_successor, mahalle_id, ada, parsel)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if driver is not _FREED:
+                    driver.quit()
+            except Exception:
+                pass
+            with self._lock:
+                self._created -= 1
@@ -1,9 +1,14 @@
+import getpass
+import hashlib
 import os
 from datetime import datetime
 
 import pandas as pd
 
-from utils.file_ops import load_excel, log_action, save_excel, to_excel_download_buffer
+from utils.file_ops import cached_download, load_excel, log_actions
+from utils.label_audit import label_audit
+from utils.label_store import label_store
+from utils.result_store import dataset_name
 
 
 def filter_by_columns(df, filters: dict):
@@ -13,26 +18,55 @@ def filter_by_columns(df, filters: dict):
     return df
 
 
-def apply_label(df, indices, label, file_path, log_path):
-    df.loc[indices, "Etiket"] = label
-    save_excel(df, file_path)
-    log_entries = []
-    for idx in indices:
-        row = df.loc[idx]
-        log_entries.append(
-            {
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "il": row.get("İl", ""),
-                "ilce": row.get("İlçe", ""),
-                "mahalle": row.get("Mahalle", ""),
-                "parsel": row.get("Parsel", ""),
-                "etiket": label,
-            }
-        )
-    for entry in log_entries:
-        log_action(log_path, entry)
-    return df
+def apply_label(df, indices, label, file_path, log_path, user=None):
+    """
+    Seçili satırların etiketini etiket deposuna tek işlemde yazar; kaynak
+    Excel yeniden yazılmaz. Günlük kayıtları da tek seferde eklenir.
+    Dönen tablo, depodaki güncel etiketler bindirilmiş veridir.
+    """
+    secili = df.loc[indices]
+    user = user or getpass.getuser()
+    label_store.set_labels(secili, label, file_path, user)
+    zaman = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    log_entries = pd.DataFrame(
+        {
+            "timestamp": zaman,
+            "il": secili.get("İl", ""),
+            "ilce": secili.get("İlçe", ""),
+            "mahalle": secili.get("Mahalle", ""),
+            "ada": secili.get("Ada", ""),
+            "parsel": secili.get("Parsel", ""),
+            "etiket": label,
+            "kullanici": user,
+        },
+        index=secili.index,
+    )
+    log_actions(log_path, log_entries.to_dict("records"))
+    if dataset_name(log_path) == label_audit.dataset:
+        # Eski günlük kayıtları arada bir Parquet segmentlerine taşınır
+        label_audit.maybe_compact()
+    return label_store.overlay(df, file_path)
+
+
+def load_labeled(file_path):
+    """Ana Excel verisini depodaki etiketlerle birlikte yükler."""
+    return label_store.overlay(load_excel(file_path), file_path)
 
 
-def get_download_buffer(df):
-    return to_excel_download_buffer(df)
+def get_download_buffer(table, file_path, fmt="xlsx"):
+    """
+    `load_parcel_table` tablosunun etiketli indirme baytları. Önbellek
+    anahtarı (dosya sürümü, etiket sürümü) olduğu için ikisi de değişmedikçe
+    tablo yeniden etiketlenmez ve özetlenmez.
+    """
+    surum = [
+        label_store.source_name(file_path),
+        table.version,
+        label_store.version(file_path),
+    ]
+    key = hashlib.sha1(repr(surum).encode("utf-8")).hexdigest()[:20]
+    path = cached_download(
+        lambda: label_store.overlay(table.df, file_path), fmt, key=key
+    )
+    with open(path, "rb") as f:
+        return f.read()
@@ -1,24 +1,61 @@
+import glob
+import hashlib
 import json
 import os
 from datetime import datetime
 from io import BytesIO
 
 import pandas as pd
+import xlsxwriter
+
+from utils.result_store import dataset_name, result_store
+from utils.storage import atomic_write, file_lock, write_spool
+from utils.write_behind import write_behind
+
+DOWNLOAD_CACHE_DIR = os.getenv("DOWNLOAD_CACHE_DIR", "data/cache/indirme")
+DOWNLOAD_CACHE_KEEP = int(os.getenv("DOWNLOAD_CACHE_KEEP", "20"))
+DOWNLOAD_FORMATS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
 
 
 def save_csv(data: dict, path: str):
-    df_new = pd.DataFrame([data])
-    if os.path.exists(path):
-        df = pd.read_csv(path)
-        df = pd.concat([df, df_new], ignore_index=True)
-    else:
-        df = df_new
-    df.to_csv(path, index=False)
+    """
+    Kaydı `path` adına karşılık gelen sonuç deposu tablosuna ekler. Dosya
+    yeniden yazılmaz; mevcut CSV ilk eklemede depoya aktarılır.
+    """
+    result_store.append(dataset_name(path), data, legacy_path=path)
     return path
 
 
+def _append_results(path: str, rows: list):
+    result_store.append_many(dataset_name(path), rows, legacy_path=path)
+
+
+write_spool.register("sonuc_deposu", _append_results)
+
+
+def save_csv_deferred(data: dict, path: str):
+    """save_csv'nin arka plan kuyruğuna yazan, istek yolunu bekletmeyen hali."""
+    write_behind.submit(_append_results, data, path)
+    return path
+
+
+def read_results(path: str, tail: int = None):
+    """save_csv/log_action ile yazılan kayıtları DataFrame olarak okur."""
+    return result_store.read(dataset_name(path), tail=tail)
+
+
+def export_results_csv(path: str, out_path: str = None):
+    return result_store.export_csv(dataset_name(path), out_path or path)
+
+
 def save_excel(df: pd.DataFrame, path: str):
-    df.to_excel(path, index=False)
+    # Okuyucular yarım yazılmış çalışma kitabı görmesin
+    with file_lock(path), atomic_write(path) as f:
+        df.to_excel(f, index=False, engine="openpyxl")
     return path
 
 
@@ -27,7 +64,7 @@ def load_excel(path: str):
 
 
 def save_json(data: dict, path: str):
-    with open(path, "w", encoding="utf-8") as f:
+    with atomic_write(path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
@@ -37,22 +74,98 @@ def load_json(path: str):
 
 
 def log_action(log_path: str, log_data: dict):
-    df_new = pd.DataFrame([log_data])
-    if os.path.exists(log_path):
-        df = pd.read_csv(log_path)
-        df = pd.concat([df, df_new], ignore_index=True)
-    else:
-        df = df_new
-    df.to_csv(log_path, index=False)
+    return save_csv(log_data, log_path)
+
+
+def log_actions(log_path: str, rows: list):
+    """Birden çok günlük kaydını tek işlemde ekler."""
+    _append_results(log_path, rows)
     return log_path
 
 
+def write_xlsx(df: pd.DataFrame, target):
+    """
+    xlsxwriter constant_memory kipinde satır satır yazar; çalışma kitabının
+    tamamı bellekte kurulmaz. `target` dosya yolu ya da ikili dosya nesnesi.
+    """
+    workbook = xlsxwriter.Workbook(
+        target,
+        {
+            "constant_memory": True,
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        },
+    )
+    sheet = workbook.add_worksheet()
+    sheet.write_row(0, 0, [str(c) for c in df.columns])
+    degerler = df.astype(object).where(df.notna(), None)
+    for i, row in enumerate(degerler.itertuples(index=False, name=None), start=1):
+        sheet.write_row(i, 0, row)
+    workbook.close()
+
+
 def to_excel_download_buffer(df: pd.DataFrame):
     buffer = BytesIO()
-    df.to_excel(buffer, index=False, engine="openpyxl")
+    write_xlsx(df, buffer)
     buffer.seek(0)
     return buffer
 
 
+def frame_hash(df: pd.DataFrame):
+    """Sütunlar, türler ve hücre değerlerinden vektörel içerik özeti."""
+    h = hashlib.sha1()
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()[:20]
+
+
+def _parquet_ready(df: pd.DataFrame):
+    # Karışık türlü (örn. sayı + metin) sütunlar Arrow'a metin olarak yazılır
+    karisik = [
+        c
+        for c in df.columns
+        if df[c].dtype == object
+        and pd.api.types.infer_dtype(df[c], skipna=True).startswith("mixed")
+    ]
+    return df.astype({c: "string" for c in karisik}) if karisik else df
+
+
+def cached_download(df, fmt="xlsx", cache_dir=DOWNLOAD_CACHE_DIR, key=None):
+    """
+    İndirme dosyasını içerik özetiyle önbelleğe alır ve yolunu döner; veri
+    değişmedikçe (örn. Streamlit her yeniden çalıştığında) dosya yeniden
+    üretilmez. Biçimler: xlsx, csv, parquet. Verinin sürümünü bilen çağıran
+    `key` verirse özet hesaplanmaz; `df` o zaman tabloyu üreten bir çağrı da
+    olabilir ve yalnızca dosya yoksa çağrılır.
+    """
+    if fmt not in DOWNLOAD_FORMATS:
+        raise ValueError(f"Desteklenmeyen biçim: {fmt}")
+    if key is None:
+        key = frame_hash(df)
+    path = os.path.join(cache_dir, f"{key}.{fmt}")
+    if os.path.exists(path):
+        return path
+    if callable(df):
+        df = df()
+    with atomic_write(path) as f:
+        if fmt == "xlsx":
+            write_xlsx(df, f)
+        elif fmt == "csv":
+            # utf-8-sig: Excel Türkçe karakterleri doğru açsın
+            df.to_csv(f, index=False, encoding="utf-8-sig")
+        else:
+            _parquet_ready(df).to_parquet(f, index=False)
+    eskiler = sorted(
+        glob.glob(os.path.join(cache_dir, "*.*")), key=os.path.getmtime, reverse=True
+    )
+    for eski in eskiler[DOWNLOAD_CACHE_KEEP:]:
+        try:
+            os.remove(eski)
+        except FileNotFoundError:
+            pass
+    return path
+
+
 def file_exists(path: str):
     return os.path.exists(path)
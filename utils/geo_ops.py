@@ -1,33 +1,94 @@
+import contextlib
+import glob
+import hashlib
 import json
 import os
 
 import folium
 import geopandas as gpd
+import numpy as np
+import orjson
 import pandas as pd
-from shapely import geometry, wkt
-from shapely.errors import WKTReadingError
+import shapely
+
+from utils.process_pool import PROCESS_POOL_WORKERS, get_process_pool
+from utils.storage import atomic_write
+
+POLYGON_CACHE_DIR = os.getenv("POLYGON_CACHE_DIR", "data/cache/poligon")
+OSM_CACHE_DIR = os.getenv("OSM_CACHE_DIR", "data/cache/osm")
+# Daha az dosyada süreç havuzunu başlatmak ayrıştırmadan pahalı
+OSM_PARALLEL_MIN_FILES = int(os.getenv("OSM_PARALLEL_MIN_FILES", "64"))
+
+
+def _unwrap(metin):
+    n = len(metin) - len(metin.lstrip("("))
+    return metin[n : len(metin) - n].strip()
+
+
+def geometries_from_wkt(values):
+    """
+    WKT dizisini tek geçişte geometri dizisine çevirir. Metni saran fazla
+    parantezler atılır, `POLYGON (((...)))` gibi bir düzey fazla parantezli
+    yazımlar çok parçalı okunur, geçersiz geometriler toplu `make_valid` ile
+    onarılır ve tek parçalı çoklu geometriler parçasına indirgenir.
+    Okunamayan, boş ya da metin olmayan değerler None olur.
+    """
+    metin = pd.Series(values, dtype=object).str.strip()
+    sarili = metin.str.match(r"\(+\s*[A-Za-z]", na=False)
+    if sarili.any():
+        metin[sarili] = metin[sarili].map(_unwrap)
+    metin = metin.str.replace(
+        r"^POLYGON\s*(?=\(\s*\(\s*\()", "MULTIPOLYGON ", regex=True, case=False
+    )
+    geoms = shapely.from_wkt(
+        metin.where(metin.notna(), None).to_numpy(dtype=object), on_invalid="ignore"
+    )
+    bozuk = ~shapely.is_valid(geoms) & ~shapely.is_missing(geoms)
+    if bozuk.any():
+        geoms[bozuk] = shapely.make_valid(geoms[bozuk])
+    tek_parca = (shapely.get_type_id(geoms) >= 4) & (
+        shapely.get_num_geometries(geoms) == 1
+    )
+    geoms[tek_parca] = shapely.get_geometry(geoms[tek_parca], 0)
+    geoms[shapely.is_empty(geoms)] = None
+    return geoms
 
 
 def fix_wkt(wkt_str):
-    try:
-        return wkt.loads(wkt_str)
-    except WKTReadingError:
-        try:
-            while wkt_str.startswith("("):
-                wkt_str = wkt_str[1:-1]
-            return wkt.loads(wkt_str)
-        except:
-            return None
-
-
-def load_polygons(path: str, crs="EPSG:3857"):
-    with open(path) as f:
-        raw = json.load(f)
-    df = pd.DataFrame(raw)
-    df["geometry"] = df["geometry"].apply(lambda x: fix_wkt(x) if x else None)
+    return geometries_from_wkt([wkt_str])[0]
+
+
+def _prune_cache(cache_dir, anahtar, path):
+    """Aynı kaynağın güncel olmayan önbellek dosyalarını siler."""
+    for eski in glob.glob(os.path.join(cache_dir, f"{anahtar}-*.parquet")):
+        if eski != path:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(eski)
+
+
+def load_polygons(path: str, crs="EPSG:3857", cache_dir=POLYGON_CACHE_DIR):
+    """
+    `{ID, geometry (WKT)}` listesi JSON'unu GeoDataFrame olarak yükler.
+    Dosyanın her sürümü (mtime + boyut) bir kez dönüştürülüp GeoParquet
+    (WKB) olarak önbelleğe yazılır; sonraki yüklemeler WKT ayrıştırmaz.
+    """
+    stat = os.stat(path)
+    anahtar = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    cache_path = os.path.join(
+        cache_dir, f"{anahtar}-{stat.st_mtime_ns}-{stat.st_size}.parquet"
+    )
+    if os.path.exists(cache_path):
+        return gpd.read_parquet(cache_path).set_crs(crs, allow_override=True)
+    with open(path, "rb") as f:
+        df = pd.DataFrame(orjson.loads(f.read()))
+    df["geometry"] = geometries_from_wkt(df["geometry"].to_numpy())
     df = df[df["geometry"].notnull()]
     df["ID"] = df["ID"].astype(str)
-    return gpd.GeoDataFrame(df, geometry="geometry", crs=crs)
+    gdf = gpd.GeoDataFrame(df, geometry="geometry", crs=crs)
+    with atomic_write(cache_path) as f:
+        gdf.to_parquet(f, compression="zstd")
+    _prune_cache(cache_dir, anahtar, cache_path)
+    return gdf
 
 
 def load_slope_data(path: str):
@@ -38,39 +99,176 @@ def load_slope_data(path: str):
     return slope_df
 
 
-def extract_osm_geometries(folder_path):
-    roads, buildings = [], []
-    for file in os.listdir(folder_path):
-        if file.endswith(".json"):
-            with open(os.path.join(folder_path, file)) as f:
-                data = json.load(f)
-            nodes = {
-                el["id"]: (el["lon"], el["lat"])
-                for el in data.get("elements", [])
-                if el["type"] == "node"
-            }
-            for el in data.get("elements", []):
-                if el["type"] == "way" and "nodes" in el:
-                    coords = [nodes[n] for n in el["nodes"] if n in nodes]
-                    if len(coords) < 2:
-                        continue
-                    if coords[0] == coords[-1] and len(coords) >= 4:
-                        geom = geometry.Polygon(coords)
-                    else:
-                        geom = geometry.LineString(coords)
-                    if "building" in el.get("tags", {}) and isinstance(
-                        geom, geometry.Polygon
-                    ):
-                        buildings.append(geom)
-                    elif "highway" in el.get("tags", {}) and isinstance(
-                        geom, geometry.LineString
-                    ):
-                        roads.append(geom)
-    gdf_buildings = gpd.GeoDataFrame(geometry=buildings, crs="EPSG:4326")
-    gdf_roads = gpd.GeoDataFrame(geometry=roads, crs="EPSG:4326")
+def _parse_osm_arrays(path):
+    """
+    Tek bir Overpass JSON dosyasını ayrıştırır (işçi süreçte çalışır). Yapı
+    ve yollar için (way id'leri, koordinatlar, way başına nokta sayısı)
+    dizileri döner; geometriler ana süreçte toplu kurulur.
+    """
+    with open(path, "rb") as f:
+        elements = orjson.loads(f.read()).get("elements", [])
+    node_ids, lon, lat = [], [], []
+    way_ids, refs, counts, bina, yol = [], [], [], [], []
+    for el in elements:
+        if el["type"] == "node":
+            node_ids.append(el["id"])
+            lon.append(el["lon"])
+            lat.append(el["lat"])
+        elif el["type"] == "way" and "nodes" in el:
+            tags = el.get("tags", {})
+            if "building" in tags or "highway" in tags:
+                way_ids.append(el["id"])
+                refs += el["nodes"]
+                counts.append(len(el["nodes"]))
+                bina.append("building" in tags)
+                yol.append("highway" in tags)
+
+    ids, ilk = np.unique(np.asarray(node_ids, dtype=np.int64), return_index=True)
+    xy = np.column_stack([lon, lat])[ilk] if len(ilk) else np.empty((0, 2))
+    refs = np.asarray(refs, dtype=np.int64)
+    way_of_ref = np.repeat(np.arange(len(way_ids)), counts)
+    # Dosyada olmayan düğümler atlanır
+    konum = np.minimum(np.searchsorted(ids, refs), max(len(ids) - 1, 0))
+    bulunan = ids[konum] == refs if len(ids) else np.zeros(len(refs), dtype=bool)
+    xy = xy[konum[bulunan]]
+    way_of_ref = way_of_ref[bulunan]
+    n = np.bincount(way_of_ref, minlength=len(way_ids))
+    bas = np.cumsum(n) - n
+    son = np.maximum(bas + n - 1, 0)
+    gecerli = n >= 2
+    kapali = np.zeros(len(way_ids), dtype=bool)
+    kapali[gecerli] = (xy[bas[gecerli]] == xy[son[gecerli]]).all(axis=1)
+    kapali &= n >= 4
+
+    way_ids = np.asarray(way_ids, dtype=np.int64)
+    sonuc = []
+    for secim in (
+        gecerli & kapali & np.asarray(bina, dtype=bool),
+        gecerli & ~kapali & np.asarray(yol, dtype=bool),
+    ):
+        sonuc.append((way_ids[secim], xy[np.repeat(secim, n)], n[secim]))
+    return sonuc
+
+
+def _osm_layer(parcalar, dosyalar, polygon):
+    """
+    Dosyalardan gelen dizileri birleştirir, aynı way'i (komşu indirmelerin
+    örtüşen alanları) yalnızca ilk dosyasından alır ve geometrileri tek
+    çağrıda kurar.
+    """
+    ids = np.concatenate([p[0] for p in parcalar] or [np.empty(0, np.int64)])
+    xy = np.concatenate([p[1] for p in parcalar] or [np.empty((0, 2))])
+    n = np.concatenate([p[2] for p in parcalar] or [np.empty(0, np.int64)])
+    kaynak = np.repeat(
+        np.asarray(dosyalar, dtype=object), [len(p[0]) for p in parcalar]
+    )
+    _, ilk = np.unique(ids, return_index=True)
+    tut = np.zeros(len(ids), dtype=bool)
+    tut[ilk] = True
+    xy, n = xy[np.repeat(tut, n)], n[tut]
+    if len(n):
+        indices = np.repeat(np.arange(len(n)), n)
+        if polygon:
+            geoms = shapely.polygons(shapely.linearrings(xy, indices=indices))
+        else:
+            geoms = shapely.linestrings(xy, indices=indices)
+    else:
+        geoms = np.empty(0, dtype=object)
+    return gpd.GeoDataFrame(
+        {"osm_id": ids[tut], "dosya": kaynak[tut]}, geometry=geoms, crs="EPSG:4326"
+    )
+
+
+def _dir_signature(folder_path, suffix=".json"):
+    """Klasördeki dosyaların (ad, mtime, boyut) listesinin özeti."""
+    girdiler = sorted(
+        (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+        for entry in os.scandir(folder_path)
+        if entry.name.endswith(suffix)
+    )
+    return hashlib.sha1(json.dumps(girdiler).encode()).hexdigest()[:20]
+
+
+def _osm_cache_key(folder_path):
+    return hashlib.sha1(os.path.abspath(folder_path).encode()).hexdigest()[:12]
+
+
+def osm_cache_path(folder_path, cache_dir=OSM_CACHE_DIR):
+    """Klasörün güncel içeriğine karşılık gelen katman önbelleği dosyası."""
+    anahtar = _osm_cache_key(folder_path)
+    return os.path.join(cache_dir, f"{anahtar}-{_dir_signature(folder_path)}.parquet")
+
+
+def _read_osm_cache(path):
+    katman = gpd.read_parquet(path)
+    return tuple(
+        katman[katman["tur"] == tur].drop(columns="tur").reset_index(drop=True)
+        for tur in ("yapı", "yol")
+    )
+
+
+def extract_osm_geometries(folder_path, cache_dir=OSM_CACHE_DIR):
+    """
+    Klasördeki tüm OSM dosyalarının yapı ve yolları; `osm_id` way kimliği,
+    `dosya` geldiği dosyadır. Birleşik katmanlar klasörün imzasıyla (dosya
+    adları, mtime, boyut) diske önbelleklenir; klasör değişmedikçe JSON
+    dosyaları yeniden okunmaz. Dosyalar süreç havuzunda paralel ayrıştırılır.
+    """
+    path = osm_cache_path(folder_path, cache_dir)
+    if os.path.exists(path):
+        return _read_osm_cache(path)
+
+    dosyalar = sorted(f for f in os.listdir(folder_path) if f.endswith(".json"))
+    yollar = [os.path.join(folder_path, f) for f in dosyalar]
+    if PROCESS_POOL_WORKERS > 1 and len(yollar) >= OSM_PARALLEL_MIN_FILES:
+        parcalar = list(get_process_pool().map(_parse_osm_arrays, yollar, chunksize=32))
+    else:
+        parcalar = [_parse_osm_arrays(p) for p in yollar]
+    gdf_buildings = _osm_layer([p[0] for p in parcalar], dosyalar, polygon=True)
+    gdf_roads = _osm_layer([p[1] for p in parcalar], dosyalar, polygon=False)
+
+    katman = pd.concat(
+        [gdf_buildings.assign(tur="yapı"), gdf_roads.assign(tur="yol")],
+        ignore_index=True,
+    )
+    with atomic_write(path) as f:
+        katman.to_parquet(f, compression="zstd")
+    _prune_cache(cache_dir, _osm_cache_key(folder_path), path)
     return gdf_buildings, gdf_roads
 
 
+def polygon_presence(polygons, buildings, roads, crs=None, max_distance=None):
+    """
+    Her poligon için kesişen yapı/yol sayısı, en yakın yapı/yol uzaklığı (m)
+    ve `Yapı Var`/`Yol Var` bayrakları. Yapı ve yol katmanlarının uzamsal
+    dizini (STRtree) bir kez kurulur ve tüm poligonlar tek seferde sorgulanır;
+    poligon başına tüm katmanı taramaz. Uzaklıklar metrik (UTM) CRS'te
+    ölçülür; kesişen poligonlarda 0, katman boşsa ya da en yakın geometri
+    `max_distance` metreden uzaksa NaN olur.
+    """
+    crs = crs or polygons.estimate_utm_crs()
+    poligonlar = polygons.geometry.to_crs(crs).values
+    out = pd.DataFrame(index=polygons.index)
+    for ad, katman in (("Yapı", buildings), ("Yol", roads)):
+        sayi = np.zeros(len(poligonlar), dtype=np.int64)
+        uzaklik = np.full(len(poligonlar), np.nan)
+        if len(katman) and len(poligonlar):
+            dizin = katman.geometry.to_crs(crs).sindex
+            eslesen, _ = dizin.query(poligonlar, predicate="intersects")
+            sayi = np.bincount(eslesen, minlength=len(poligonlar))
+            (kaynak, _), mesafe = dizin.nearest(
+                poligonlar,
+                max_distance=max_distance,
+                return_all=False,
+                return_distance=True,
+            )
+            uzaklik[kaynak] = mesafe
+        out[f"{ad} Sayısı"] = sayi
+        out[f"En Yakın {ad} (m)"] = uzaklik
+        out[f"{ad} Var"] = sayi > 0
+    return out
+
+
 def plot_folium_polygon_map(gdf, buildings, roads, map_path=None, zoom=12):
     if gdf.empty:
         return None
@@ -111,3 +309,17 @@ def plot_folium_polygon_map(gdf, buildings, roads, map_path=None, zoom=12):
     if map_path:
         m.save(map_path)
     return m
+
+
+def save_parcel_map(coords, filename: str):
+    """TKGM parsel koordinatlarını folium haritası olarak HTML'e kaydeder."""
+    if not coords or not coords[0]:
+        return None
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    m = folium.Map(location=[coords[0][0][1], coords[0][0][0]], zoom_start=16)
+    folium.Polygon(
+        locations=[(lat, lon) for lon, lat in coords[0]], color="red"
+    ).add_to(m)
+    with atomic_write(filename) as f:
+        m.save(f, close_file=False)
+    return filename
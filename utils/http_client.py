@@ -0,0 +1,240 @@
+import asyncio
+import importlib.util
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.rate_limit import get_limiter, limiter_metrics
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# Sunucu bazlı bağlantı havuzu, zaman aşımı, yeniden deneme ve hız ayarları.
+# rate: başlangıç hızı (istek/sn, None = sınırsız); AIMD bu değeri min_rate ile
+# max_rate arasında, eşzamanlılığı da max_concurrency'ye kadar ayarlar.
+DEFAULT_POLICY = {
+    "timeout": 30,
+    "retries": 3,
+    "backoff": 0.5,
+    "pool": 10,
+    "retry_post": False,
+    "rate": None,
+    "min_rate": 0.2,
+    "max_rate": None,
+    "max_concurrency": 32,
+    "target_latency": 10.0,
+}
+HOST_POLICIES = {
+    "cbsapi.tkgm.gov.tr": {
+        "timeout": 15,
+        "pool": 50,
+        "rate": 20,
+        "max_rate": 50,
+        "max_concurrency": 50,
+        "target_latency": 5.0,
+    },
+    "eimar.dilovasi.bel.tr": {
+        "timeout": 10,
+        "pool": 20,
+        "rate": 10,
+        "max_rate": 30,
+        "max_concurrency": 20,
+        "target_latency": 5.0,
+    },
+    "overpass-api.de": {
+        "timeout": 60,
+        "retries": 5,
+        "backoff": 1,
+        "pool": 2,
+        "retry_post": True,
+        "rate": 1,
+        "min_rate": 0.1,
+        "max_rate": 2,
+        "max_concurrency": 2,
+        "target_latency": 30.0,
+    },
+    "maps.googleapis.com": {
+        "timeout": 10,
+        "pool": 10,
+        "rate": 5,
+        "max_rate": 40,
+        "max_concurrency": 10,
+        "target_latency": 3.0,
+    },
+    "openrouter.ai": {"timeout": 120, "retries": 2, "pool": 10, "target_latency": 120},
+}
+LIMITER_KEYS = ("rate", "min_rate", "max_rate", "max_concurrency", "target_latency")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def host_policy(host: str):
+    return {**DEFAULT_POLICY, **HOST_POLICIES.get(host, {})}
+
+
+def host_limiter(host: str):
+    policy = host_policy(host)
+    return get_limiter(host, **{k: policy[k] for k in LIMITER_KEYS})
+
+
+_sessions = {}
+_async_clients = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _retry_after(value):
+    """Retry-After değerini (saniye ya da HTTP tarihi) saniyeye çevirir."""
+    value = (value or "").strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        tarih = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if tarih.tzinfo is None:
+        tarih = tarih.replace(tzinfo=timezone.utc)
+    return max(0.0, (tarih - datetime.now(timezone.utc)).total_seconds())
+
+
+def _retry_delay(response, policy, attempt):
+    gecikme = _retry_after(response.headers.get("Retry-After"))
+    if gecikme is None:
+        gecikme = policy["backoff"] * (2**attempt)
+    # Sunucu saatlerce beklemeyi isteyebilir; istek sunucu zaman aşımından
+    # uzun bekletilmez
+    return min(gecikme, policy["timeout"])
+
+
+def get_session(host: str):
+    """Sunucu başına keep-alive havuzlu ve yeniden denemeli requests.Session."""
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            policy = host_policy(host)
+            # Durum koduna bağlı yeniden denemeler http_request içinde yapılır ki
+            # her deneme hız sınırlayıcıya geri beslensin
+            retry = Retry(
+                total=policy["retries"],
+                backoff_factor=policy["backoff"],
+                status=0,
+                allowed_methods=(
+                    None if policy["retry_post"] else Retry.DEFAULT_ALLOWED_METHODS
+                ),
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=policy["pool"], max_retries=retry
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def http_request(method: str, url: str, **kwargs):
+    host = urlsplit(url).hostname or ""
+    policy = host_policy(host)
+    kwargs.setdefault("timeout", policy["timeout"])
+    retry_status = method.upper() != "POST" or policy["retry_post"]
+    limiter = host_limiter(host)
+    session = get_session(host)
+    for attempt in range(policy["retries"] + 1):
+        limiter.acquire()
+        start = time.monotonic()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            limiter.release(None, time.monotonic() - start)
+            raise
+        except BaseException:
+            limiter.abandon()
+            raise
+        limiter.release(response.status_code, time.monotonic() - start)
+        if (
+            not retry_status
+            or response.status_code not in RETRY_STATUS
+            or attempt == policy["retries"]
+        ):
+            return response
+        time.sleep(_retry_delay(response, policy, attempt))
+    return response
+
+
+def http_get(url: str, **kwargs):
+    return http_request("GET", url, **kwargs)
+
+
+def http_post(url: str, **kwargs):
+    return http_request("POST", url, **kwargs)
+
+
+def get_async_client():
+    """Çalışan event loop'a bağlı, paylaşılan httpx.AsyncClient (varsa HTTP/2)."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        transport = httpx.AsyncHTTPTransport(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+            retries=2,
+        )
+        client = httpx.AsyncClient(transport=transport)
+        _async_clients[loop] = client
+    return client
+
+
+async def ahttp_request(method: str, url: str, **kwargs):
+    host = urlsplit(url).hostname or ""
+    policy = host_policy(host)
+    kwargs.setdefault("timeout", policy["timeout"])
+    retry_status = method.upper() != "POST" or policy["retry_post"]
+    limiter = host_limiter(host)
+    client = get_async_client()
+    for attempt in range(policy["retries"] + 1):
+        await limiter.aacquire()
+        start = time.monotonic()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            limiter.release(None, time.monotonic() - start)
+            raise
+        except BaseException:
+            # İptal (istemci koptu, görev iptal edildi) sunucu hatası sayılmaz;
+            # yuva yine de geri verilir
+            limiter.abandon()
+            raise
+        limiter.release(response.status_code, time.monotonic() - start)
+        if (
+            not retry_status
+            or response.status_code not in RETRY_STATUS
+            or attempt == policy["retries"]
+        ):
+            return response
+        await asyncio.sleep(_retry_delay(response, policy, attempt))
+    return response
+
+
+async def ahttp_get(url: str, **kwargs):
+    return await ahttp_request("GET", url, **kwargs)
+
+
+async def ahttp_post(url: str, **kwargs):
+    return await ahttp_request("POST", url, **kwargs)
+
+
+async def aclose_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def upstream_metrics():
+    """Sunucu başına güncel izin verilen hız, eşzamanlılık ve hata sayaçları."""
+    return limiter_metrics()
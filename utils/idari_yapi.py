@@ -0,0 +1,221 @@
+import asyncio
+import os
+import sqlite3
+import threading
+
+from rapidfuzz import fuzz, process
+
+from utils.http_client import ahttp_get
+
+IDARI_YAPI_PATH = os.getenv("IDARI_YAPI_PATH", "data/idari_yapi.sqlite")
+IDARI_YAPI_URL = "https://cbsapi.tkgm.gov.tr/megsiswebapi.v3.1/api/idariYapi"
+IDARI_YAPI_MAX_CONCURRENCY = int(os.getenv("IDARI_YAPI_MAX_CONCURRENCY", "8"))
+
+_TR_ASCII = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+
+
+def normalize_ad(ad: str):
+    """Türkçe büyük/küçük harf ve aksan farklarını yok sayan arama anahtarı."""
+    ad = (ad or "").replace("İ", "i").replace("I", "ı").lower()
+    return " ".join(ad.translate(_TR_ASCII).split())
+
+
+def _features(data):
+    for feature in data.get("features", []):
+        props = feature.get("properties", {})
+        if props.get("id") is not None:
+            yield int(props["id"]), props.get("text", "")
+
+
+async def _fetch_list(semaphore, path):
+    async with semaphore:
+        response = await ahttp_get(f"{IDARI_YAPI_URL}/{path}", timeout=30)
+        response.raise_for_status()
+        return list(_features(response.json()))
+
+
+async def crawl_idari_yapi(il_ids=None, max_concurrency=IDARI_YAPI_MAX_CONCURRENCY):
+    """il -> ilçe -> mahalle hiyerarşisini eşzamanlı olarak gezer."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    iller = await _fetch_list(semaphore, "ilListe")
+    if il_ids:
+        iller = [il for il in iller if il[0] in set(il_ids)]
+    ilce_listeleri = await asyncio.gather(
+        *(_fetch_list(semaphore, f"ilceListe/{il_id}") for il_id, _ in iller)
+    )
+    ilceler = [
+        (ilce_id, il_id, ad)
+        for (il_id, _), liste in zip(iller, ilce_listeleri)
+        for ilce_id, ad in liste
+    ]
+    mahalle_listeleri = await asyncio.gather(
+        *(
+            _fetch_list(semaphore, f"mahalleListe/{ilce_id}")
+            for ilce_id, _, _ in ilceler
+        )
+    )
+    mahalleler = [
+        (mahalle_id, ilce_id, il_id, ad)
+        for (ilce_id, il_id, _), liste in zip(ilceler, mahalle_listeleri)
+        for mahalle_id, ad in liste
+    ]
+    return iller, ilceler, mahalleler
+
+
+class IdariYapiIndex:
+    """İl/ilçe/mahalle kayıtları için SQLite indeksi ve ad -> ID araması."""
+
+    def __init__(self, path=IDARI_YAPI_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._names = None
+        self._names_version = None
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS il (
+                    id INTEGER PRIMARY KEY, ad TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS ilce (
+                    id INTEGER PRIMARY KEY, il_id INTEGER NOT NULL, ad TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS mahalle (
+                    id INTEGER PRIMARY KEY,
+                    ilce_id INTEGER NOT NULL,
+                    il_id INTEGER NOT NULL,
+                    ad TEXT NOT NULL,
+                    ad_norm TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_ilce_il ON ilce (il_id);
+                CREATE INDEX IF NOT EXISTS ix_mahalle_ilce ON mahalle (ilce_id);
+                CREATE INDEX IF NOT EXISTS ix_mahalle_ad_norm ON mahalle (ad_norm);
+                """
+            )
+            self._local.conn = conn
+        return conn
+
+    def _version(self):
+        return self._conn().execute("PRAGMA data_version").fetchone()[0], len(self)
+
+    def replace(self, iller, ilceler, mahalleler):
+        conn = self._conn()
+        il_ids = [(il_id,) for il_id, _ in iller]
+        with conn:
+            conn.executemany("DELETE FROM mahalle WHERE il_id = ?", il_ids)
+            conn.executemany("DELETE FROM ilce WHERE il_id = ?", il_ids)
+            conn.executemany("INSERT OR REPLACE INTO il VALUES (?, ?)", iller)
+            conn.executemany("INSERT OR REPLACE INTO ilce VALUES (?, ?, ?)", ilceler)
+            conn.executemany(
+                "INSERT OR REPLACE INTO mahalle VALUES (?, ?, ?, ?, ?)",
+                [(*m, normalize_ad(m[3])) for m in mahalleler],
+            )
+        self._names = None
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM mahalle").fetchone()[0]
+
+    def _rows(self, where, params, limit):
+        rows = self._conn().execute(
+            "SELECT m.id, m.ad, ic.id, ic.ad, il.id, il.ad FROM mahalle m "
+            "JOIN ilce ic ON ic.id = m.ilce_id JOIN il ON il.id = m.il_id "
+            f"WHERE {where} ORDER BY il.ad, ic.ad, m.ad LIMIT ?",
+            (*params, limit),
+        )
+        return [
+            {
+                "mahalle_id": r[0],
+                "mahalle": r[1],
+                "ilce_id": r[2],
+                "ilce": r[3],
+                "il_id": r[4],
+                "il": r[5],
+            }
+            for r in rows
+        ]
+
+    def iller(self):
+        return self._conn().execute("SELECT id, ad FROM il ORDER BY ad").fetchall()
+
+    def ilceler(self, il_id):
+        return (
+            self._conn()
+            .execute("SELECT id, ad FROM ilce WHERE il_id = ? ORDER BY ad", (il_id,))
+            .fetchall()
+        )
+
+    def mahalleler(self, ilce_id, limit=10000):
+        return self._rows("m.ilce_id = ?", (ilce_id,), limit)
+
+    def get_mahalle(self, mahalle_id):
+        rows = self._rows("m.id = ?", (int(mahalle_id),), 1)
+        return rows[0] if rows else None
+
+    def _scope(self, il_id, ilce_id):
+        where, params = [], []
+        if il_id is not None:
+            where.append("m.il_id = ?")
+            params.append(il_id)
+        if ilce_id is not None:
+            where.append("m.ilce_id = ?")
+            params.append(ilce_id)
+        return where, params
+
+    def search_mahalle(self, q, limit=20, il_id=None, ilce_id=None, fuzzy=True):
+        """Önce indeks üzerinden önek araması, yetmezse bulanık eşleşme yapar."""
+        anahtar = normalize_ad(q)
+        if not anahtar:
+            return []
+        where, params = self._scope(il_id, ilce_id)
+        # ad_norm üzerindeki indeksle aralık taraması (önek araması)
+        sonuc = self._rows(
+            " AND ".join(where + ["m.ad_norm >= ?", "m.ad_norm < ?"]),
+            (*params, anahtar, anahtar + "\uffff"),
+            limit,
+        )
+        if len(sonuc) >= limit or not fuzzy:
+            return sonuc
+        bulunan = {r["mahalle_id"] for r in sonuc}
+        names = self._name_table()
+        adaylar = process.extract(
+            anahtar,
+            names["ad_norm"],
+            scorer=fuzz.WRatio,
+            limit=limit * 5,
+            score_cutoff=70,
+        )
+        for _, _, i in adaylar:
+            mahalle_id, m_ilce_id, m_il_id = names["rows"][i]
+            if mahalle_id in bulunan:
+                continue
+            if (il_id is not None and m_il_id != il_id) or (
+                ilce_id is not None and m_ilce_id != ilce_id
+            ):
+                continue
+            sonuc.append(self.get_mahalle(mahalle_id))
+            bulunan.add(mahalle_id)
+            if len(sonuc) >= limit:
+                break
+        return sonuc
+
+    def _name_table(self):
+        version = self._version()
+        if self._names is None or self._names_version != version:
+            rows = (
+                self._conn()
+                .execute("SELECT id, ilce_id, il_id, ad_norm FROM mahalle")
+                .fetchall()
+            )
+            self._names = {
+                "rows": [r[:3] for r in rows],
+                "ad_norm": [r[3] for r in rows],
+            }
+            self._names_version = version
+        return self._names
+
+
+idari_yapi_index = IdariYapiIndex()
@@ -0,0 +1,255 @@
+import asyncio
+import csv
+import glob
+import io
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from utils.imar_ops import fetch_imar_async
+from utils.storage import atomic_write
+
+IMAR_HARVEST_DIR = os.getenv("IMAR_HARVEST_DIR", "data/imar_hasat")
+IMAR_HARVEST_DB = os.getenv("IMAR_HARVEST_DB", "data/cache/imar_hasat.sqlite")
+IMAR_HARVEST_MAX_CONCURRENCY = int(os.getenv("IMAR_HARVEST_MAX_CONCURRENCY", "8"))
+IMAR_HARVEST_CHUNK_SIZE = int(os.getenv("IMAR_HARVEST_CHUNK_SIZE", "500"))
+IMAR_HARVEST_MAX_ATTEMPTS = int(os.getenv("IMAR_HARVEST_MAX_ATTEMPTS", "3"))
+# İş adı klasör ve dosya adlarında kullanılır; yol bileşeni içeremez
+JOB_ID_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+
+IMAR_COLUMN_ALIASES = {
+    "ada": ("ada", "Ada", "adaNo", "ada_no"),
+    "parsel": ("parsel", "Parsel", "parselNo", "parsel_no"),
+}
+
+
+def parse_number_range(value):
+    """Aralık ifadesini ("100-120,125" veya [1, "3-5"]) tamsayı listesine çevirir."""
+    if isinstance(value, int):
+        return [value]
+    parcalar = value if isinstance(value, list) else str(value).split(",")
+    sayilar = set()
+    for parca in parcalar:
+        parca = str(parca).strip()
+        if not parca:
+            continue
+        if "-" in parca:
+            bas, son = (int(x) for x in parca.split("-", 1))
+            if son < bas:
+                raise ValueError(f"Geçersiz aralık: {parca}")
+            sayilar.update(range(bas, son + 1))
+        else:
+            sayilar.add(int(parca))
+    return sorted(sayilar)
+
+
+def imar_targets(ada, parsel):
+    """Ada ve parsel aralıklarının tüm (ada, parsel) kombinasyonları."""
+    return [(a, p) for a in parse_number_range(ada) for p in parse_number_range(parsel)]
+
+
+def _to_pair(row):
+    values = []
+    for field, aliases in IMAR_COLUMN_ALIASES.items():
+        value = next((row[a] for a in aliases if row.get(a) not in (None, "")), None)
+        if value is None:
+            raise ValueError(f"'{field}' alanı eksik: {row}")
+        values.append(int(float(value)))
+    return tuple(values)
+
+
+def read_imar_targets_csv(content):
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(content))
+    return [_to_pair(row) for row in reader]
+
+
+class ImarHarvestCheckpoint:
+    """
+    Hasat işlerinin hedef listesi ve parsel bazında durumu. Parquet parçası
+    diske yazılmadan kayıtlar "bekliyor" kalır; yarıda kalan iş aynı `job_id`
+    ile yeniden başlatıldığında yalnızca tamamlanmamış hedefler sorgulanır.
+    """
+
+    def __init__(self, path=IMAR_HARVEST_DB):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS imar_hasat (
+                    job_id TEXT NOT NULL,
+                    ada INTEGER NOT NULL,
+                    parsel INTEGER NOT NULL,
+                    durum TEXT NOT NULL DEFAULT 'bekliyor',
+                    objectid INTEGER,
+                    deneme INTEGER NOT NULL DEFAULT 0,
+                    mesaj TEXT,
+                    guncelleme REAL,
+                    PRIMARY KEY (job_id, ada, parsel)
+                ) WITHOUT ROWID
+                """
+            )
+            self._local.conn = conn
+        return conn
+
+    def add_targets(self, job_id, targets):
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO imar_hasat (job_id, ada, parsel) "
+                "VALUES (?, ?, ?)",
+                ((job_id, ada, parsel) for ada, parsel in targets),
+            )
+
+    def pending(self, job_id, max_attempts=IMAR_HARVEST_MAX_ATTEMPTS):
+        rows = self._conn().execute(
+            "SELECT ada, parsel FROM imar_hasat WHERE job_id = ? "
+            "AND durum IN ('bekliyor', 'hata') AND deneme < ? ORDER BY ada, parsel",
+            (job_id, max_attempts),
+        )
+        return [tuple(row) for row in rows]
+
+    def mark(self, job_id, sonuclar):
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            conn.executemany(
+                "UPDATE imar_hasat SET durum = ?, objectid = ?, mesaj = ?, "
+                "deneme = deneme + 1, guncelleme = ? "
+                "WHERE job_id = ? AND ada = ? AND parsel = ?",
+                (
+                    (
+                        s["durum"],
+                        s.get("objectid"),
+                        s.get("mesaj"),
+                        now,
+                        job_id,
+                        s["ada"],
+                        s["parsel"],
+                    )
+                    for s in sonuclar
+                ),
+            )
+
+    def progress(self, job_id):
+        rows = self._conn().execute(
+            "SELECT durum, COUNT(*) FROM imar_hasat WHERE job_id = ? GROUP BY durum",
+            (job_id,),
+        )
+        durumlar = dict(rows.fetchall())
+        return {"job_id": job_id, "toplam": sum(durumlar.values()), **durumlar}
+
+    def jobs(self):
+        rows = self._conn().execute("SELECT DISTINCT job_id FROM imar_hasat")
+        return [row[0] for row in rows]
+
+
+imar_harvest_checkpoint = ImarHarvestCheckpoint()
+
+
+def validate_job_id(job_id):
+    if not isinstance(job_id, str) or not re.fullmatch(JOB_ID_PATTERN, job_id):
+        raise ValueError(
+            f"Geçersiz iş adı: {job_id!r} (harf, rakam, '_' ve '-'; en fazla 64)"
+        )
+    return job_id
+
+
+def harvest_dir(job_id, root=IMAR_HARVEST_DIR):
+    return os.path.join(root, validate_job_id(job_id))
+
+
+def write_harvest_chunk(job_id, kayitlar, root=IMAR_HARVEST_DIR):
+    """Başarılı sonuçları işin klasörüne yeni bir Parquet parçası olarak yazar."""
+    klasor = harvest_dir(job_id, root)
+    os.makedirs(klasor, exist_ok=True)
+    sira = len(glob.glob(os.path.join(klasor, "part-*.parquet")))
+    path = os.path.join(klasor, f"part-{sira:05d}.parquet")
+    zaman = time.time()
+    df = pd.DataFrame(
+        [
+            {
+                "Ada": s["ada"],
+                "Parsel": s["parsel"],
+                "OBJECTID": s["objectid"],
+                "Mahalle": s["mahalle"],
+                **s["detay"],
+                "_hasat_zamani": zaman,
+            }
+            for s in kayitlar
+        ]
+    )
+    # Yarım yazılmış parça okuyuculara görünmesin
+    with atomic_write(path) as f:
+        df.to_parquet(f, index=False)
+    return path
+
+
+def read_imar_harvest(job_id, root=IMAR_HARVEST_DIR):
+    """İşin tüm parçalarını birleştirir; aynı parselin en son kaydı kalır."""
+    parcalar = sorted(glob.glob(os.path.join(harvest_dir(job_id, root), "*.parquet")))
+    if not parcalar:
+        return pd.DataFrame()
+    df = pd.concat([pd.read_parquet(p) for p in parcalar], ignore_index=True)
+    return df.drop_duplicates(["Ada", "Parsel"], keep="last").reset_index(drop=True)
+
+
+async def harvest_imar(
+    job_id,
+    targets=None,
+    max_concurrency=IMAR_HARVEST_MAX_CONCURRENCY,
+    chunk_size=IMAR_HARVEST_CHUNK_SIZE,
+    max_attempts=IMAR_HARVEST_MAX_ATTEMPTS,
+    root=IMAR_HARVEST_DIR,
+    checkpoint=imar_harvest_checkpoint,
+    on_progress=None,
+):
+    """
+    `targets` (ada, parsel) listesini işe ekler ve bekleyen tüm hedefleri
+    eşzamanlı sorgular. Sonuçlar `chunk_size` kayıtta bir Parquet'e yazılır,
+    ardından kontrol noktası güncellenir; kesilen iş kaldığı yerden devam eder.
+    """
+    validate_job_id(job_id)
+    if targets:
+        await asyncio.to_thread(checkpoint.add_targets, job_id, targets)
+    bekleyen = await asyncio.to_thread(checkpoint.pending, job_id, max_attempts)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    tampon = []
+
+    async def worker(hedef):
+        async with semaphore:
+            return await fetch_imar_async(*hedef)
+
+    async def bosalt():
+        kayitlar = [s for s in tampon if s["durum"] == "ok"]
+        if kayitlar:
+            await asyncio.to_thread(write_harvest_chunk, job_id, kayitlar, root)
+        await asyncio.to_thread(checkpoint.mark, job_id, list(tampon))
+        tampon.clear()
+        if on_progress:
+            on_progress(await asyncio.to_thread(checkpoint.progress, job_id))
+
+    tasks = [asyncio.create_task(worker(h)) for h in bekleyen]
+    try:
+        for future in asyncio.as_completed(tasks):
+            tampon.append(await future)
+            if len(tampon) >= chunk_size:
+                await bosalt()
+        if tampon:
+            await bosalt()
+    finally:
+        for task in tasks:
+            task.cancel()
+    return await asyncio.to_thread(checkpoint.progress, job_id)
@@ -0,0 +1,86 @@
+import os
+
+import httpx
+from bs4 import BeautifulSoup
+
+from utils.http_client import ahttp_get
+from utils.process_pool import run_in_process
+
+IMAR_BASE_URL = "https://eimar.dilovasi.bel.tr/imardurumu"
+IMAR_TIMEOUT = float(os.getenv("IMAR_TIMEOUT", "10"))
+IMAR_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+    ),
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+
+def imar_sorgu_url(ada: int, parsel: int):
+    return (
+        f"{IMAR_BASE_URL}/service/imarsvc.aspx"
+        f"?type=adaparsel&adaparsel={ada}/{parsel}&ilce=-100000&tmahalle=-100000&tamKelimeAra=1"
+    )
+
+
+def imar_detay_url(objectid):
+    return f"{IMAR_BASE_URL}/imar.aspx?parselid={objectid}"
+
+
+def imar_kml_url(objectid):
+    return f"{IMAR_BASE_URL}/service/kml.ashx?token={objectid}"
+
+
+def parse_imar_html(html: str):
+    """imar.aspx sayfasındaki etiket/değer çiftlerini ve plan fonksiyonlarını çıkarır."""
+    soup = BeautifulSoup(html, "html.parser")
+    detay = {}
+    for table_row in soup.select("div.divTableRow"):
+        label = table_row.select_one("div.divTableCellLabel")
+        value = table_row.select_one("div.divTableContent")
+        if label and value:
+            key = label.get_text(strip=True)
+            val = value.get_text(strip=True)
+            if key:
+                detay[key] = val
+    fonksiyonlar = [a.get_text(strip=True) for a in soup.select("a.fonksiyonalani")]
+    if fonksiyonlar:
+        detay["Plan Fonksiyonu"] = " | ".join(fonksiyonlar)
+    return detay
+
+
+async def fetch_imar_async(ada: int, parsel: int, timeout=IMAR_TIMEOUT):
+    """
+    imarsvc → imar.aspx zincirini tek parsel için çalıştırır. `durum` alanı
+    "ok", "yok" (belediye kaydı bulunamadı) veya "hata" olur.
+    """
+    sonuc = {"ada": ada, "parsel": parsel}
+    try:
+        r1 = await ahttp_get(
+            imar_sorgu_url(ada, parsel), headers=IMAR_HEADERS, timeout=timeout
+        )
+        if r1.status_code != 200:
+            return {**sonuc, "durum": "hata", "mesaj": f"HTTP {r1.status_code}"}
+        kayitlar = r1.json() if r1.text.strip() else []
+        if not kayitlar:
+            return {**sonuc, "durum": "yok"}
+        objectid = kayitlar[0]["OBJECTID"]
+        mahalle = kayitlar[0].get("TAPU_MAH_ADI", "Bilinmiyor")
+        r2 = await ahttp_get(
+            imar_detay_url(objectid), headers=IMAR_HEADERS, timeout=timeout
+        )
+        if r2.status_code != 200:
+            return {**sonuc, "durum": "hata", "mesaj": f"HTTP {r2.status_code}"}
+    except httpx.HTTPError as e:
+        return {**sonuc, "durum": "hata", "mesaj": f"İstek hatası: {e}"}
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        return {**sonuc, "durum": "hata", "mesaj": f"JSON parse hatası: {e}"}
+    detay = await run_in_process(parse_imar_html, r2.text)
+    return {
+        **sonuc,
+        "durum": "ok",
+        "objectid": objectid,
+        "mahalle": mahalle,
+        "detay": detay,
+    }
@@ -0,0 +1,294 @@
+import glob
+import os
+import re
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from utils.idari_yapi import normalize_ad
+from utils.imar_harvest import IMAR_HARVEST_DIR
+from utils.parcel_warehouse import parse_tr_number
+from utils.result_store import dataset_name, result_store
+from utils.storage import atomic_write
+
+IMAR_ZONING_PATH = os.getenv("IMAR_ZONING_PATH", "data/imar_normalize.parquet")
+IMAR_DETAY_CSV = "data/imar_detaylari.csv"
+
+# imar.aspx etiketi (normalize_ad + yalnızca harf/rakam) -> normalize sütun
+ZONING_LABELS = {
+    "kaksemsal": "emsal",
+    "kaks": "emsal",
+    "emsal": "emsal",
+    "taks": "taks",
+    "binayuksekligi": "hmax",
+    "hmax": "hmax",
+    "katadedi": "kat_adedi",
+    "insaatnizami": "insaat_nizami",
+    "onbahce": "on_bahce",
+    "yanbahce": "yan_bahce",
+    "arkabahce": "arka_bahce",
+    "binaderinligi": "bina_derinligi",
+    "meriimarplani": "plan_adi",
+    "olcegi": "plan_olcegi",
+    "tasdiktarihi": "tasdik_tarihi",
+    "parselalani1": "parsel_alani",
+    "parselalani": "parsel_alani",
+    "idarimahalle": "idari_mahalle",
+}
+ZONING_SCHEMA = pa.schema(
+    [
+        ("ada", pa.int64()),
+        ("parsel", pa.int64()),
+        ("objectid", pa.int64()),
+        ("mahalle", pa.dictionary(pa.int32(), pa.string())),
+        ("idari_mahalle", pa.dictionary(pa.int32(), pa.string())),
+        ("emsal", pa.float64()),
+        ("taks", pa.float64()),
+        ("hmax", pa.float64()),
+        ("kat_adedi", pa.int64()),
+        ("insaat_nizami", pa.dictionary(pa.int32(), pa.string())),
+        ("on_bahce", pa.float64()),
+        ("yan_bahce", pa.float64()),
+        ("arka_bahce", pa.float64()),
+        ("bina_derinligi", pa.float64()),
+        ("parsel_alani", pa.float64()),
+        ("plan_adi", pa.dictionary(pa.int32(), pa.string())),
+        ("plan_olcegi", pa.dictionary(pa.int32(), pa.string())),
+        ("tasdik_tarihi", pa.string()),
+        ("fonksiyonlar", pa.list_(pa.dictionary(pa.int32(), pa.string()))),
+        ("fonksiyon_alanlari", pa.list_(pa.float64())),
+        ("birincil_fonksiyon", pa.dictionary(pa.int32(), pa.string())),
+        ("kismi", pa.bool_()),
+        ("kayit_zamani", pa.float64()),
+    ]
+)
+NUMERIC_FIELDS = (
+    "emsal",
+    "taks",
+    "hmax",
+    "on_bahce",
+    "yan_bahce",
+    "arka_bahce",
+    "bina_derinligi",
+    "parsel_alani",
+)
+# Sayfada boş alanlar "-", "EMPTYROW" ya da "Mevcut değil" olarak gelir
+EMPTY_VALUES = {"", "-", "emptyrow", "mevcut degil", "nan", "none"}
+_NUMBER = re.compile(r"-?\d+(?:[.,]\d+)*")
+_FONKSIYON = re.compile(
+    r"^(kısmen|kismen)?\s*(.*?)\s*(?:\(\s*([\d.,]+)\s*m²?\s*\))?$", re.I
+)
+
+
+@lru_cache(maxsize=1024)
+def _label_key(label):
+    return re.sub(r"[^a-z0-9]", "", normalize_ad(str(label)))
+
+
+def _clean_text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    metin = " ".join(str(value).split())
+    return None if normalize_ad(metin) in EMPTY_VALUES else metin
+
+
+def parse_zoning_number(value):
+    """Metindeki ilk sayıyı döndürür: "E=1.50" -> 1.5, "12,50 m" -> 12.5."""
+    metin = _clean_text(value)
+    if metin is None:
+        return None
+    eslesme = _NUMBER.search(metin)
+    return parse_tr_number(eslesme.group()) if eslesme else None
+
+
+def parse_plan_functions(value):
+    """
+    "KısmenOrman (3522,679 m²) | KısmenÜniversite (2033,257 m²)" ->
+    (["Orman", "Üniversite"], [3522.679, 2033.257], kismi=True)
+    """
+    metin = _clean_text(value)
+    if metin is None:
+        return [], [], False
+    adlar, alanlar, kismi = [], [], False
+    for parca in metin.split("|"):
+        eslesme = _FONKSIYON.match(parca.strip())
+        if not eslesme or not eslesme.group(2):
+            continue
+        kismi = kismi or bool(eslesme.group(1))
+        adlar.append(eslesme.group(2))
+        alanlar.append(parse_tr_number(eslesme.group(3)) if eslesme.group(3) else None)
+    return adlar, alanlar, kismi or len(adlar) > 1
+
+
+def normalize_imar_record(kayit: dict):
+    """Ham imar detay kaydını (etiket -> metin) türlendirilmiş sözlüğe çevirir."""
+    sonuc = {
+        "ada": parse_zoning_number(kayit.get("Ada")),
+        "parsel": parse_zoning_number(kayit.get("Parsel")),
+        "objectid": parse_zoning_number(kayit.get("OBJECTID")),
+        "mahalle": _clean_text(kayit.get("Mahalle")),
+    }
+    for label, value in kayit.items():
+        alan = ZONING_LABELS.get(_label_key(label))
+        if alan is None or sonuc.get(alan) is not None:
+            continue
+        if alan in NUMERIC_FIELDS:
+            sonuc[alan] = parse_zoning_number(value)
+        elif alan == "kat_adedi":
+            sonuc[alan] = parse_zoning_number(value)
+        else:
+            sonuc[alan] = _clean_text(value)
+    for alan in ("ada", "parsel", "objectid", "kat_adedi"):
+        if sonuc.get(alan) is not None:
+            sonuc[alan] = int(sonuc[alan])
+    adlar, alanlar, kismi = parse_plan_functions(kayit.get("Plan Fonksiyonu"))
+    sonuc["fonksiyonlar"] = adlar
+    sonuc["fonksiyon_alanlari"] = alanlar
+    sonuc["kismi"] = kismi
+    if adlar:
+        # Birincil fonksiyon: alanı bilinen en büyük parça, yoksa ilki
+        olcu = [a if a is not None else -1 for a in alanlar]
+        sonuc["birincil_fonksiyon"] = adlar[int(np.argmax(olcu))]
+    return sonuc
+
+
+def _dictionary_list(values):
+    """list<string> -> sözlük kodlu list<dictionary<string>> dizisi."""
+    duz = pa.array([v for liste in values for v in liste], type=pa.string())
+    offsets = np.cumsum([0] + [len(liste) for liste in values], dtype=np.int32)
+    return pa.ListArray.from_arrays(pa.array(offsets), duz.dictionary_encode())
+
+
+def build_zoning_table(kayitlar):
+    """Ham kayıt listesinden sözlük kodlu sütunlara sahip Arrow tablosu kurar."""
+    satirlar = [normalize_imar_record(k) for k in kayitlar]
+    satirlar = [s for s in satirlar if s["ada"] is not None and s["parsel"] is not None]
+    kolonlar = []
+    for field in ZONING_SCHEMA:
+        degerler = [s.get(field.name) for s in satirlar]
+        if field.name == "fonksiyonlar":
+            kolonlar.append(_dictionary_list(degerler))
+        elif field.name == "fonksiyon_alanlari":
+            kolonlar.append(pa.array(degerler, type=field.type))
+        elif pa.types.is_dictionary(field.type):
+            kolonlar.append(pa.array(degerler, type=pa.string()).dictionary_encode())
+        else:
+            kolonlar.append(pa.array(degerler, type=field.type))
+    return pa.Table.from_arrays(kolonlar, schema=ZONING_SCHEMA)
+
+
+def load_raw_imar_records(harvest_root=IMAR_HARVEST_DIR):
+    """
+    Sonuç deposundaki imar_detaylari tablosu ve toplu hasat parçalarındaki
+    ham kayıtları birleştirir; aynı ada/parsel için en yeni kayıt kalır.
+    """
+    kaynaklar = []
+    df = result_store.read(dataset_name(IMAR_DETAY_CSV), system_columns=True)
+    if not df.empty:
+        kaynaklar.append(df.rename(columns={"_zaman": "kayit_zamani"}))
+    elif os.path.exists(IMAR_DETAY_CSV):
+        # Depoya henüz hiç yazılmadıysa eski CSV okunur
+        df = pd.read_csv(IMAR_DETAY_CSV, dtype=str)
+        kaynaklar.append(df.assign(kayit_zamani=os.path.getmtime(IMAR_DETAY_CSV)))
+    for path in glob.glob(os.path.join(harvest_root, "*", "*.parquet")):
+        df = pd.read_parquet(path)
+        kaynaklar.append(df.rename(columns={"_hasat_zamani": "kayit_zamani"}))
+    if not kaynaklar:
+        return []
+    df = pd.concat(kaynaklar, ignore_index=True).sort_values("kayit_zamani")
+    df = df.drop_duplicates(["Ada", "Parsel"], keep="last")
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict("records")
+
+
+def refresh_zoning_table(path=IMAR_ZONING_PATH, harvest_root=IMAR_HARVEST_DIR):
+    table = build_zoning_table(load_raw_imar_records(harvest_root))
+    with atomic_write(path) as f:
+        pq.write_table(table, f, compression="zstd")
+    return path
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def read_zoning_table(path=IMAR_ZONING_PATH):
+    """Parquet tablosunu okur; dosya değişmedikçe bellekteki kopya döner."""
+    if not os.path.exists(path):
+        refresh_zoning_table(path)
+    mtime = os.path.getmtime(path)
+    with _cache_lock:
+        onbellek = _cache.get(path)
+        if onbellek is None or onbellek[0] != mtime:
+            onbellek = (mtime, pq.read_table(path))
+            _cache[path] = onbellek
+        return onbellek[1]
+
+
+def _range_mask(table, column, low, high):
+    maske = None
+    for deger, op in ((low, pc.greater_equal), (high, pc.less_equal)):
+        if deger is None:
+            continue
+        kosul = pc.fill_null(op(table[column], deger), False)
+        maske = kosul if maske is None else pc.and_(maske, kosul)
+    return maske
+
+
+def _function_mask(table, fonksiyonlar):
+    """Plan fonksiyonlarından en az biri aranan değerlerden olan satırlar."""
+    liste = table["fonksiyonlar"].combine_chunks()
+    duz = pc.list_flatten(liste)
+    maske = np.zeros(len(table), dtype=bool)
+    if not fonksiyonlar or len(duz.dictionary) == 0:
+        return pa.array(maske)
+    aranan = pa.array([normalize_ad(f) for f in fonksiyonlar], type=pa.string())
+    # Karşılaştırma her satır yerine yalnızca sözlükteki farklı değerler üzerinde
+    sozluk = pa.array(
+        [normalize_ad(v) for v in duz.dictionary.to_pylist()], type=pa.string()
+    )
+    eslesen = pc.is_in(sozluk, value_set=aranan)
+    isabet = pc.take(eslesen, duz.indices).to_numpy(zero_copy_only=False)
+    satir = pc.list_parent_indices(liste).to_numpy()
+    maske[satir[isabet]] = True
+    return pa.array(maske)
+
+
+def filter_zoning(
+    table=None,
+    min_emsal=None,
+    max_emsal=None,
+    min_taks=None,
+    max_taks=None,
+    min_hmax=None,
+    max_hmax=None,
+    fonksiyon=None,
+    mahalle=None,
+):
+    """
+    Vektörel süzgeç; örn. filter_zoning(min_emsal=1.0, fonksiyon="Sanayi").
+    `fonksiyon` tek değer ya da liste olabilir (büyük/küçük harf duyarsız).
+    """
+    table = read_zoning_table() if table is None else table
+    maskeler = [
+        _range_mask(table, "emsal", min_emsal, max_emsal),
+        _range_mask(table, "taks", min_taks, max_taks),
+        _range_mask(table, "hmax", min_hmax, max_hmax),
+    ]
+    if fonksiyon:
+        fonksiyonlar = [fonksiyon] if isinstance(fonksiyon, str) else fonksiyon
+        maskeler.append(_function_mask(table, fonksiyonlar))
+    if mahalle:
+        maskeler.append(
+            pc.fill_null(pc.equal(table["mahalle"].cast(pa.string()), mahalle), False)
+        )
+    maske = None
+    for m in maskeler:
+        if m is not None:
+            maske = m if maske is None else pc.and_(maske, m)
+    return table if maske is None else table.filter(maske)
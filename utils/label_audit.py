@@ -0,0 +1,239 @@
+import glob
+import operator
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from utils.result_store import dataset_name, result_store
+from utils.storage import atomic_write, file_lock
+
+LABEL_LOG_PATH = "data/logs/etiket_log.csv"
+LABEL_AUDIT_DIR = os.getenv("LABEL_AUDIT_DIR", "data/etiket_denetim")
+# Bu kadar saatten eski günlük kayıtları Parquet segmentlerine taşınır
+LABEL_AUDIT_HOT_HOURS = float(os.getenv("LABEL_AUDIT_HOT_HOURS", "24"))
+LABEL_AUDIT_COMPACT_INTERVAL = int(os.getenv("LABEL_AUDIT_COMPACT_INTERVAL", "3600"))
+
+AUDIT_COLUMNS = (
+    "timestamp",
+    "il",
+    "ilce",
+    "mahalle",
+    "ada",
+    "parsel",
+    "etiket",
+    "kullanici",
+)
+AUDIT_SCHEMA = pa.schema(
+    [pa.field(c, pa.string()) for c in AUDIT_COLUMNS]
+    + [pa.field("_id", pa.int64()), pa.field("_zaman", pa.float64())]
+)
+
+
+def _month(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m")
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _to_audit_frame(df: pd.DataFrame):
+    """Günlük satırlarını sabit şemaya getirir (anahtar alanlar metin)."""
+    out = pd.DataFrame(index=df.index)
+    for column in AUDIT_COLUMNS:
+        if column in df.columns:
+            # Dönüşüm yalnızca sütundaki farklı değerler üzerinde yapılır
+            codes, uniques = pd.factorize(df[column])
+            metinler = np.array([_text(u) for u in uniques] + [None], dtype=object)
+            out[column] = metinler[codes]
+        else:
+            out[column] = None
+    out["_id"] = df["_id"].astype("int64")
+    out["_zaman"] = df["_zaman"].astype("float64")
+    return out
+
+
+class LabelAudit:
+    """
+    Etiket günlüğünün segmentli arşivi. Yeni kayıtlar sonuç deposundaki
+    yalnızca eklemeli `etiket_log` tablosuna yazılır (sıcak segment);
+    `hot_hours`'tan eski kayıtlar ay bölümlü Parquet segmentlerine
+    (`ay=YYYY-MM/part-<ilk_id>-<son_id>.parquet`) taşınır. Sorgular yalnızca
+    tarih aralığına düşen ay klasörlerini okur; segmentler mahalle/parsel
+    sıralı yazıldığı için süzgeçler row group istatistikleriyle budanır.
+    """
+
+    def __init__(
+        self,
+        log_path=LABEL_LOG_PATH,
+        root=LABEL_AUDIT_DIR,
+        hot_hours=LABEL_AUDIT_HOT_HOURS,
+        compact_interval=LABEL_AUDIT_COMPACT_INTERVAL,
+    ):
+        self.dataset = dataset_name(log_path)
+        self.root = root
+        self.hot_hours = hot_hours
+        self.compact_interval = compact_interval
+        self._last_compact = 0.0
+        self._compact_lock = threading.Lock()
+
+    def compact(self, before=None):
+        """
+        `before` (varsayılan: şimdi - hot_hours) öncesindeki sıcak kayıtları
+        ay segmentlerine yazar ve depodan siler; taşınan kayıt sayısını döner.
+        Kayıtlar parça parça okunur ve her parçanın her ayı ayrı bir segment
+        olur; bellekte aynı anda tek parça bulunur. Segment yazıldıktan sonra
+        silme yarıda kalırsa sorgular `_id` ile tekilleştirdiği için kayıt iki
+        kez görünmez.
+        """
+        before = time.time() - self.hot_hours * 3600 if before is None else before
+        with file_lock(os.path.join(self.root, "sikistirma")):
+            tasinan = 0
+            son_id = None
+            for parca in result_store.iter_chunks(
+                self.dataset, chunk_size=50000, system_columns=True, bitis=before
+            ):
+                df = _to_audit_frame(parca)
+                zaman = pd.to_datetime(df["_zaman"], unit="s")
+                for (yil, ay_no), segment in df.groupby(
+                    [zaman.dt.year, zaman.dt.month]
+                ):
+                    self._write_segment(f"{yil:04d}-{ay_no:02d}", segment)
+                tasinan += len(df)
+                son_id = df["_id"].max()
+            if son_id is not None:
+                result_store.delete_until(self.dataset, son_id, before)
+            return tasinan
+
+    def _write_segment(self, ay, segment):
+        segment = segment.sort_values(["mahalle", "parsel", "_zaman"])
+        path = os.path.join(
+            self.root,
+            f"ay={ay}",
+            f"part-{segment['_id'].min():012d}-{segment['_id'].max():012d}.parquet",
+        )
+        table = pa.Table.from_pandas(segment, schema=AUDIT_SCHEMA, preserve_index=False)
+        with atomic_write(path) as f:
+            pq.write_table(table, f, compression="zstd", row_group_size=16384)
+
+    def maybe_compact(self):
+        """Son sıkıştırmadan bu yana `compact_interval` geçtiyse arka planda başlatır."""
+        if time.time() - self._last_compact < self.compact_interval:
+            return False
+        if not self._compact_lock.acquire(blocking=False):
+            return False
+        self._last_compact = time.time()
+
+        def calis():
+            try:
+                self.compact()
+            finally:
+                self._compact_lock.release()
+
+        threading.Thread(target=calis, name="etiket-sikistirma", daemon=True).start()
+        return True
+
+    def segments(self, baslangic=None, bitis=None):
+        """Tarih aralığıyla kesişen ay klasörlerindeki segment dosyaları."""
+        alt = _month(baslangic.timestamp()) if baslangic else None
+        ust = _month(bitis.timestamp()) if bitis else None
+        dosyalar = []
+        for klasor in sorted(glob.glob(os.path.join(self.root, "ay=*"))):
+            ay = os.path.basename(klasor)[3:]
+            if (alt and ay < alt) or (ust and ay > ust):
+                continue
+            dosyalar += sorted(glob.glob(os.path.join(klasor, "part-*.parquet")))
+        return dosyalar
+
+    def query(
+        self,
+        mahalle=None,
+        ada=None,
+        parsel=None,
+        etiket=None,
+        kullanici=None,
+        baslangic=None,
+        bitis=None,
+    ):
+        """
+        Günlük kayıtlarını (kim, hangi parseli, ne zaman, hangi etiketle)
+        zamana göre sıralı döner. Arşivde yalnızca ilgili ay segmentleri,
+        sıcak segmentte yalnızca süzgece uyan satırlar okunur.
+        """
+        esitlikler = {
+            "mahalle": mahalle,
+            "ada": ada,
+            "parsel": parsel,
+            "etiket": etiket,
+            "kullanici": kullanici,
+        }
+        ifade = None
+        for alan, deger in esitlikler.items():
+            if deger is not None:
+                kosul = ds.field(alan) == str(deger)
+                ifade = kosul if ifade is None else ifade & kosul
+        for deger, op in ((baslangic, operator.ge), (bitis, operator.lt)):
+            if deger is not None:
+                kosul = op(ds.field("_zaman"), deger.timestamp())
+                ifade = kosul if ifade is None else ifade & kosul
+
+        parcalar = []
+        dosyalar = self.segments(baslangic, bitis)
+        if dosyalar:
+            arsiv = ds.dataset(dosyalar, schema=AUDIT_SCHEMA, format="parquet")
+            parcalar.append(arsiv.to_table(filter=ifade).to_pandas())
+        sicak = result_store.iter_chunks(
+            self.dataset,
+            chunk_size=50000,
+            system_columns=True,
+            mahalle=mahalle,
+            baslangic=baslangic,
+            bitis=bitis,
+        )
+        for parca in sicak:
+            parca = _to_audit_frame(parca)
+            for alan, deger in esitlikler.items():
+                if deger is not None:
+                    parca = parca[parca[alan] == str(deger)]
+            parcalar.append(parca)
+        parcalar = [p for p in parcalar if not p.empty]
+        if not parcalar:
+            return pd.DataFrame(columns=AUDIT_SCHEMA.names)
+        df = pd.concat(parcalar, ignore_index=True)
+        df = df.drop_duplicates("_id").sort_values("_zaman", ignore_index=True)
+        return df
+
+    def parcel_history(self, mahalle, ada, parsel):
+        """Bir parselin etiket geçmişi, eskiden yeniye."""
+        return self.query(mahalle=mahalle, ada=ada, parsel=parsel)
+
+    def label_counts(self, baslangic=None, bitis=None, son_etiket=False):
+        """
+        Mahalle ve etiket başına sayım. `son_etiket=True` ise her parselin
+        yalnızca en son etiketi sayılır (güncel dağılım).
+        """
+        df = self.query(baslangic=baslangic, bitis=bitis)
+        if son_etiket:
+            df = df.drop_duplicates(
+                ["il", "ilce", "mahalle", "ada", "parsel"], keep="last"
+            )
+        return (
+            df.groupby(["mahalle", "etiket"], dropna=False)
+            .size()
+            .rename("adet")
+            .reset_index()
+        )
+
+
+label_audit = LabelAudit()
@@ -0,0 +1,183 @@
+import getpass
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+LABEL_STORE_PATH = os.getenv("LABEL_STORE_PATH", "data/etiketler.sqlite")
+
+# Etiket anahtarı: tablo sütunu -> kaynak veri sütunu
+LABEL_KEY_COLUMNS = {
+    "il": "İl",
+    "ilce": "İlçe",
+    "mahalle": "Mahalle",
+    "ada": "Ada",
+    "parsel": "Parsel",
+}
+LABEL_COLUMN = "Etiket"
+LABEL_OVERLAY_MAX_GROUPS = 100
+
+
+def _key_text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _key_column(values: pd.Series):
+    # Dönüşüm satır başına değil, sütundaki farklı değerler üzerinde yapılır
+    codes, uniques = pd.factorize(values)
+    metinler = np.array([_key_text(u) for u in uniques] + [""], dtype=object)
+    return metinler[codes]
+
+
+def label_keys(df: pd.DataFrame):
+    """Veri satırlarının etiket anahtarı; eksik sütunlar boş metin sayılır."""
+    return pd.DataFrame(
+        {
+            alan: _key_column(df[sutun]) if sutun in df.columns else ""
+            for alan, sutun in LABEL_KEY_COLUMNS.items()
+        },
+        index=df.index,
+    )
+
+
+class LabelStore:
+    """
+    Parsel etiketleri için anahtarlı SQLite (WAL) deposu: (kaynak dosya,
+    il, ilçe, mahalle, ada, parsel) -> etiket, zaman, kullanıcı. Etiketleme
+    kaynak Excel'i yeniden yazmaz; etiketler okuma sırasında `overlay` ile
+    ana verinin üzerine bindirilir. Binlerce satır tek işlemde yazılır.
+    """
+
+    def __init__(self, path=LABEL_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS etiket (
+                    kaynak TEXT NOT NULL,
+                    il TEXT NOT NULL,
+                    ilce TEXT NOT NULL,
+                    mahalle TEXT NOT NULL,
+                    ada TEXT NOT NULL,
+                    parsel TEXT NOT NULL,
+                    etiket TEXT NOT NULL,
+                    zaman REAL NOT NULL,
+                    kullanici TEXT,
+                    PRIMARY KEY (kaynak, il, ilce, mahalle, ada, parsel)
+                ) WITHOUT ROWID
+                """
+            )
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def source_name(path):
+        return os.path.basename(str(path))
+
+    def set_labels(self, rows: pd.DataFrame, label, source, user=None):
+        """`rows` satırlarına `label` etiketini tek işlemde yazar; sayıyı döner."""
+        anahtarlar = label_keys(rows).drop_duplicates()
+        if anahtarlar.empty:
+            return 0
+        kaynak = self.source_name(source)
+        kullanici = user or getpass.getuser()
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO etiket "
+                "(kaynak, il, ilce, mahalle, ada, parsel, etiket, zaman, kullanici) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (kaynak, il, ilce, mahalle, ada, parsel) DO UPDATE SET "
+                "etiket = excluded.etiket, zaman = excluded.zaman, "
+                "kullanici = excluded.kullanici",
+                (
+                    (kaynak, *anahtar, label, now, kullanici)
+                    for anahtar in anahtarlar.itertuples(index=False, name=None)
+                ),
+            )
+        return len(anahtarlar)
+
+    def labels(self, source, groups=None):
+        """
+        Kaynağın etiketleri; `groups` (il, ilçe, mahalle) demetleri verilirse
+        yalnızca o mahallelerdeki etiketler birincil anahtar üzerinden okunur.
+        """
+        sql = (
+            "SELECT il, ilce, mahalle, ada, parsel, etiket, zaman, kullanici "
+            "FROM etiket WHERE kaynak = ?"
+        )
+        params = [self.source_name(source)]
+        if groups is not None:
+            if not groups:
+                return pd.DataFrame(columns=[*LABEL_KEY_COLUMNS, "etiket"])
+            kosullar = " OR ".join(
+                "(il = ? AND ilce = ? AND mahalle = ?)" for _ in groups
+            )
+            sql += f" AND ({kosullar})"
+            params += [deger for grup in groups for deger in grup]
+        return pd.read_sql_query(sql, self._conn(), params=params)
+
+    def overlay(self, df: pd.DataFrame, source):
+        """
+        Ana verinin kopyasına depodaki etiketleri bindirir: etiketi olan
+        satırlarda `Etiket` depodan gelir, diğerlerinde kaynak değer kalır.
+        """
+        df = df.copy()
+        if LABEL_COLUMN not in df.columns:
+            df[LABEL_COLUMN] = ""
+        if df.empty:
+            return df
+        anahtarlar = label_keys(df)
+        gruplar = list(
+            anahtarlar[["il", "ilce", "mahalle"]]
+            .drop_duplicates()
+            .itertuples(index=False, name=None)
+        )
+        # Süzülmüş küçük bir seçimde tüm kaynağın etiketleri okunmaz
+        etiketler = self.labels(
+            source, gruplar if len(gruplar) <= LABEL_OVERLAY_MAX_GROUPS else None
+        )
+        if etiketler.empty:
+            return df
+        eslesen = anahtarlar.merge(etiketler, on=list(LABEL_KEY_COLUMNS), how="left")
+        yeni = pd.Series(eslesen["etiket"].to_numpy(), index=df.index)
+        df[LABEL_COLUMN] = yeni.where(yeni.notna(), df[LABEL_COLUMN])
+        return df
+
+    def version(self, source):
+        """Kaynağın etiketleri değişince değişen (sayı, son zaman) çifti."""
+        return tuple(
+            self._conn()
+            .execute(
+                "SELECT COUNT(*), MAX(zaman) FROM etiket WHERE kaynak = ?",
+                (self.source_name(source),),
+            )
+            .fetchone()
+        )
+
+    def count(self, source=None):
+        if source is None:
+            sql, params = "SELECT COUNT(*) FROM etiket", ()
+        else:
+            sql = "SELECT COUNT(*) FROM etiket WHERE kaynak = ?"
+            params = (self.source_name(source),)
+        return self._conn().execute(sql, params).fetchone()[0]
+
+
+label_store = LabelStore()
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+PARCEL_CACHE_PATH = os.getenv("PARCEL_CACHE_PATH", "data/cache/parsel_cache.sqlite")
+PARCEL_CACHE_TTL = int(os.getenv("PARCEL_CACHE_TTL", str(7 * 24 * 3600)))
+PARCEL_CACHE_MAX_ENTRIES = int(os.getenv("PARCEL_CACHE_MAX_ENTRIES", "200000"))
+PARCEL_CACHE_STALE_WHILE_REVALIDATE = (
+    os.getenv("PARCEL_CACHE_STALE_WHILE_REVALIDATE", "1") == "1"
+)
+# Erişim zamanları bellekte toplanır; bu kadar kayıtta ya da saniyede bir yazılır
+PARCEL_CACHE_TOUCH_BATCH = int(os.getenv("PARCEL_CACHE_TOUCH_BATCH", "256"))
+PARCEL_CACHE_TOUCH_INTERVAL = float(os.getenv("PARCEL_CACHE_TOUCH_INTERVAL", "30"))
+
+
+class ParcelCache:
+    """
+    TKGM ham parsel yanıtları için SQLite tabanlı disk önbelleği.
+    Anahtar (mahalle_id, ada, parsel); her kaydın kendi TTL'i vardır, kayıt
+    sayısı `max_entries` ile sınırlıdır (en eski erişilen silinir). Süresi
+    dolmuş kayıt stale-while-revalidate modunda hemen döner ve arka planda
+    yenilenir. Okumalar diske yazmaz: erişim zamanları toplanıp
+    `touch_batch` kayıtta ya da `touch_interval` saniyede bir tek seferde
+    güncellenir.
+    """
+
+    def __init__(
+        self,
+        path=PARCEL_CACHE_PATH,
+        ttl=PARCEL_CACHE_TTL,
+        max_entries=PARCEL_CACHE_MAX_ENTRIES,
+        stale_while_revalidate=PARCEL_CACHE_STALE_WHILE_REVALIDATE,
+        touch_batch=PARCEL_CACHE_TOUCH_BATCH,
+        touch_interval=PARCEL_CACHE_TOUCH_INTERVAL,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_while_revalidate = stale_while_revalidate
+        self.touch_batch = touch_batch
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._revalidating = set()
+        self._entry_count = None
+        self._touched = {}
+        self._touched_at = time.monotonic()
+        self.counters = {
+            "hit": 0,
+            "stale_hit": 0,
+            "miss": 0,
+            "store": 0,
+            "eviction": 0,
+            "revalidation": 0,
+            "revalidation_error": 0,
+        }
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS parsel_cache (
+                    mahalle_id INTEGER NOT NULL,
+                    ada INTEGER NOT NULL,
+                    parsel INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (mahalle_id, ada, parsel)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_parsel_cache_accessed "
+                "ON parsel_cache (accessed_at)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def get(self, key):
+        """(payload, taze_mi) döner; kayıt yoksa None."""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT payload, expires_at FROM parsel_cache "
+            "WHERE mahalle_id = ? AND ada = ? AND parsel = ?",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        with self._lock:
+            self._touched[tuple(key)] = now
+            due = (
+                len(self._touched) >= self.touch_batch
+                or time.monotonic() - self._touched_at >= self.touch_interval
+            )
+        if due:
+            self.flush_touches(conn)
+        return json.loads(row[0]), row[1] > now
+
+    def flush_touches(self, conn=None):
+        """Bekleyen erişim zamanlarını tek işlemde yazar."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            self._touched_at = time.monotonic()
+        if not touched:
+            return
+        conn = conn or self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "UPDATE parsel_cache SET accessed_at = max(accessed_at, ?) "
+                "WHERE mahalle_id = ? AND ada = ? AND parsel = ?",
+                [(zaman, *key) for key, zaman in touched.items()],
+            )
+
+    def set(self, key, payload, ttl=None):
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        conn = self._conn()
+        row = (json.dumps(payload, ensure_ascii=False), now, now + ttl, now)
+        inserted = (
+            conn.execute(
+                "INSERT OR IGNORE INTO parsel_cache "
+                "(mahalle_id, ada, parsel, payload, fetched_at, expires_at, "
+                "accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*key, *row),
+            ).rowcount
+            == 1
+        )
+        if not inserted:
+            conn.execute(
+                "UPDATE parsel_cache SET payload = ?, fetched_at = ?, "
+                "expires_at = ?, accessed_at = ? "
+                "WHERE mahalle_id = ? AND ada = ? AND parsel = ?",
+                (*row, *key),
+            )
+        self._count("store")
+        with self._lock:
+            if self._entry_count is None:
+                self._entry_count = self._size(conn)
+            elif inserted:
+                self._entry_count += 1
+            over_limit = self._entry_count > self.max_entries
+        if over_limit:
+            self._evict(conn)
+
+    def _size(self, conn):
+        return conn.execute("SELECT COUNT(*) FROM parsel_cache").fetchone()[0]
+
+    def _evict(self, conn):
+        # Silinecekler erişim zamanına göre seçildiği için önce bekleyenler yazılır
+        self.flush_touches(conn)
+        # Diğer işçiler de yazdığı için gerçek sayıyı tekrar oku; %5 pay bırak
+        size = self._size(conn)
+        excess = size - int(self.max_entries * 0.95)
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM parsel_cache WHERE (mahalle_id, ada, parsel) IN ("
+                "SELECT mahalle_id, ada, parsel FROM parsel_cache "
+                "ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self._count("eviction", excess)
+            size -= excess
+        with self._lock:
+            self._entry_count = size
+
+    def invalidate(self, key):
+        self._conn().execute(
+            "DELETE FROM parsel_cache WHERE mahalle_id = ? AND ada = ? AND parsel = ?",
+            key,
+        )
+
+    def revalidate_in_background(self, key, fetch):
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def run():
+            try:
+                payload = fetch(*key)
+                if payload is not None:
+                    self.set(key, payload)
+                self._count("revalidation")
+            except Exception:
+                self._count("revalidation_error")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _lookup(self, key, revalidate):
+        entry = self.get(key)
+        if entry is None:
+            return None
+        payload, fresh = entry
+        if fresh:
+            self._count("hit")
+            return payload
+        if self.stale_while_revalidate and revalidate is not None:
+            self._count("stale_hit")
+            self.revalidate_in_background(key, revalidate)
+            return payload
+        return None
+
+    def get_or_fetch(self, key, fetch):
+        """`fetch(mahalle_id, ada, parsel)` ham yanıtı ya da None döndürmelidir."""
+        payload = self._lookup(key, fetch)
+        if payload is not None:
+            return payload
+        self._count("miss")
+        payload = fetch(*key)
+        if payload is not None:
+            self.set(key, payload)
+        return payload
+
+    async def aget_or_fetch(self, key, afetch, revalidate=None):
+        # SQLite çağrıları olay döngüsünü bekletmesin diye iş parçacığında
+        payload = await asyncio.to_thread(self._lookup, key, revalidate)
+        if payload is not None:
+            return payload
+        self._count("miss")
+        payload = await afetch(*key)
+        if payload is not None:
+            await asyncio.to_thread(self.set, key, payload)
+        return payload
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters["hit"] + counters["stale_hit"] + counters["miss"]
+        counters["entries"] = self._size(self._conn())
+        counters["max_entries"] = self.max_entries
+        counters["hit_ratio"] = (
+            round((counters["hit"] + counters["stale_hit"]) / lookups, 4)
+            if lookups
+            else None
+        )
+        return counters
+
+
+parcel_cache = ParcelCache()
@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import threading
+import time
+
+PARCEL_SUCCESSOR_PATH = os.getenv(
+    "PARCEL_SUCCESSOR_PATH", "data/cache/parsel_halef.sqlite"
+)
+
+
+class ParcelSuccessorIndex:
+    """
+    Pasife alınan parsellerin eski -> yeni ada/parsel eşleşmelerini
+    (gittigiParselListe / gittigiParselSebep) kalıcı olarak saklar; böylece
+    sonraki sorgular zinciri yeniden gezmeden doğrudan aktif parsele gider.
+    """
+
+    def __init__(self, path=PARCEL_SUCCESSOR_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS parsel_halef (
+                    mahalle_id INTEGER NOT NULL,
+                    ada INTEGER NOT NULL,
+                    parsel INTEGER NOT NULL,
+                    yeni_mahalle_id INTEGER NOT NULL,
+                    yeni_ada INTEGER NOT NULL,
+                    yeni_parsel INTEGER NOT NULL,
+                    sebep TEXT,
+                    kayit_zamani REAL NOT NULL,
+                    PRIMARY KEY (mahalle_id, ada, parsel)
+                ) WITHOUT ROWID
+                """
+            )
+            self._local.conn = conn
+        return conn
+
+    def record(self, key, successor, sebep=None):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO parsel_halef VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (*key, *successor, sebep, time.time()),
+        )
+
+    def successor(self, key):
+        row = (
+            self._conn()
+            .execute(
+                "SELECT yeni_mahalle_id, yeni_ada, yeni_parsel, sebep "
+                "FROM parsel_halef WHERE mahalle_id = ? AND ada = ? AND parsel = ?",
+                key,
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return (row[0], row[1], row[2]), row[3]
+
+    def resolve(self, key, max_hops=10):
+        """Bilinen en son halefi ve izlenen adımları döner."""
+        adimlar = []
+        gorulen = {key}
+        while len(adimlar) < max_hops:
+            halef = self.successor(key)
+            if halef is None or halef[0] in gorulen:
+                break
+            yeni, sebep = halef
+            adimlar.append({"eski": key, "yeni": yeni, "sebep": sebep})
+            gorulen.add(yeni)
+            key = yeni
+        return key, adimlar
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM parsel_halef").fetchone()[0]
+
+
+parcel_successor_index = ParcelSuccessorIndex()
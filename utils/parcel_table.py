@@ -0,0 +1,78 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.file_ops import load_excel
+
+HIERARCHY_COLUMNS = ("İl", "İlçe", "Mahalle")
+
+
+class ParcelTable:
+    """
+    Etiketleme arayüzü için bellekte tutulan parsel tablosu. İl, İlçe ve
+    Mahalle kategorik tutulur; il -> ilçe -> mahalle -> satır konumları
+    dizini bir kez kurulur, böylece seçim değişikliği tüm tabloyu taramaz,
+    yalnızca eşleşen satırlara dokunur. `version` kaynak dosyanın sürümüdür.
+    """
+
+    def __init__(self, df: pd.DataFrame, version=None):
+        df = df.reset_index(drop=True)
+        self.version = version
+        for column in HIERARCHY_COLUMNS:
+            df[column] = df[column].astype("category")
+        self.df = df
+        self.tree = {}
+        gruplar = df.groupby(list(HIERARCHY_COLUMNS), observed=True, sort=True)
+        for (il, ilce, mahalle), konumlar in gruplar.indices.items():
+            self.tree.setdefault(il, {}).setdefault(ilce, {})[mahalle] = konumlar
+
+    def __len__(self):
+        return len(self.df)
+
+    def iller(self):
+        return sorted(self.tree)
+
+    def ilceler(self, il):
+        return sorted(self.tree.get(il, {}))
+
+    def mahalleler(self, il, ilce):
+        return sorted(self.tree.get(il, {}).get(ilce, {}))
+
+    def positions(self, il, ilce=None, mahalle=None):
+        """Seçime uyan satır konumları; eksik seviyeler alt grupları birleştirir."""
+        ilceler = self.tree.get(il, {})
+        if ilce is not None:
+            ilceler = {ilce: ilceler.get(ilce, {})}
+        parcalar = [
+            konumlar
+            for mahalleler in ilceler.values()
+            for mah, konumlar in mahalleler.items()
+            if mahalle is None or mah == mahalle
+        ]
+        if not parcalar:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(parcalar))
+
+    def select(self, il, ilce=None, mahalle=None):
+        return self.df.iloc[self.positions(il, ilce, mahalle)]
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def load_parcel_table(path: str):
+    """
+    Dosyanın her sürümü (mtime + boyut) için tabloyu bir kez yükler; dosya
+    değişmedikçe Streamlit'in her yeniden çalışmasında aynı nesne döner.
+    """
+    stat = os.stat(path)
+    surum = (stat.st_mtime_ns, stat.st_size)
+    with _tables_lock:
+        onbellek = _tables.get(path)
+        if onbellek is None or onbellek[0] != surum:
+            onbellek = (surum, ParcelTable(load_excel(path), surum))
+            _tables[path] = onbellek
+        return onbellek[1]
@@ -0,0 +1,405 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.storage import atomic_write, write_spool
+
+PARCEL_WAREHOUSE_PATH = os.getenv("PARCEL_WAREHOUSE_PATH", "data/parsel_ambar.sqlite")
+PARCEL_WAREHOUSE_PARQUET = os.getenv(
+    "PARCEL_WAREHOUSE_PARQUET", "data/parsel_ambar.parquet"
+)
+# Anlık görüntüden sonra değişen satır sayısı bunu aşınca Parquet yeniden
+# yazılır; altında okumalar görüntü + SQLite'taki fark ile karşılanır
+PARCEL_WAREHOUSE_SNAPSHOT_DELTA = int(
+    os.getenv("PARCEL_WAREHOUSE_SNAPSHOT_DELTA", "5000")
+)
+# Ambar ilk oluşturulduğunda içeri aktarılan eski parsel CSV'leri
+PARCEL_WAREHOUSE_LEGACY_CSV = ("data/parsel.csv", "parsel.csv")
+
+PARCEL_KEY = ("mahalleId", "adaNo", "parselNo")
+
+
+def parse_tr_number(value):
+    """Türkçe biçimli sayıyı ("8.371,75", "1.250", "12,5") float'a çevirir."""
+    if value is None or isinstance(value, (int, float)):
+        return None if value is None or value != value else float(value)
+    metin = str(value).strip().replace(" ", "")
+    if not metin:
+        return None
+    if "," in metin:
+        metin = metin.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"-?\d{1,3}(\.\d{3})+", metin):
+        metin = metin.replace(".", "")
+    try:
+        return float(metin)
+    except ValueError:
+        return None
+
+
+def _parse_int(value):
+    sayi = parse_tr_number(value)
+    return None if sayi is None else int(sayi)
+
+
+def _parse_text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    metin = str(value).strip()
+    return metin or None
+
+
+# TKGM parsel özellikleri -> (SQLite türü, Arrow türü, dönüştürücü)
+PARCEL_FIELDS = {
+    "mahalleId": ("INTEGER", pa.int64(), _parse_int),
+    "adaNo": ("INTEGER", pa.int64(), _parse_int),
+    "parselNo": ("INTEGER", pa.int64(), _parse_int),
+    "ilId": ("INTEGER", pa.int64(), _parse_int),
+    "ilceId": ("INTEGER", pa.int64(), _parse_int),
+    "durum": ("INTEGER", pa.int64(), _parse_int),
+    "alan": ("REAL", pa.float64(), parse_tr_number),
+    "ilAd": ("TEXT", pa.string(), _parse_text),
+    "ilceAd": ("TEXT", pa.string(), _parse_text),
+    "mahalleAd": ("TEXT", pa.string(), _parse_text),
+    "mevkii": ("TEXT", pa.string(), _parse_text),
+    "nitelik": ("TEXT", pa.string(), _parse_text),
+    "pafta": ("TEXT", pa.string(), _parse_text),
+    "zeminKmdurum": ("TEXT", pa.string(), _parse_text),
+    "ozet": ("TEXT", pa.string(), _parse_text),
+    "gittigiParselListe": ("TEXT", pa.string(), _parse_text),
+    "gittigiParselSebep": ("TEXT", pa.string(), _parse_text),
+}
+META_FIELDS = {
+    "surum": ("INTEGER", pa.int64()),
+    "ilk_kayit": ("REAL", pa.float64()),
+    "guncelleme": ("REAL", pa.float64()),
+    "son_gorulme": ("REAL", pa.float64()),
+}
+
+
+def normalize_parcel_props(props: dict):
+    """
+    Ham TKGM özelliklerini türlendirir. Bilinmeyen alanlar metin olarak
+    `ek_alanlar` içinde tutulur; anahtar alanlardan biri eksikse ValueError.
+    """
+    kayit = {}
+    ek_alanlar = {}
+    for field, value in props.items():
+        if field in PARCEL_FIELDS:
+            kayit[field] = PARCEL_FIELDS[field][2](value)
+        elif _parse_text(value) is not None:
+            ek_alanlar[field] = _parse_text(value)
+    eksik = [f for f in PARCEL_KEY if kayit.get(f) is None]
+    if eksik:
+        raise ValueError(f"Parsel anahtarı eksik: {', '.join(eksik)}")
+    return kayit, ek_alanlar
+
+
+def _digest(kayit, ek_alanlar):
+    payload = json.dumps([kayit, ek_alanlar], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ParcelWarehouse:
+    """
+    (mahalleId, adaNo, parselNo) anahtarlı parsel ambarı. Aynı parsel tekrar
+    sorgulandığında satır eklenmez, güncellenir; içerik değiştiyse önceki hali
+    `parsel_surum` tablosunda yeni sürüm olarak saklanır. Analitik okumalar
+    için güncel tablo türlendirilmiş bir Parquet anlık görüntüsüne yazılır;
+    görüntüden sonra değişen satırlar (`degisiklik` sütunu) okumada SQLite'tan
+    eklenir, görüntü ancak fark `snapshot_delta` satırı aşınca yenilenir.
+    """
+
+    def __init__(
+        self,
+        path=PARCEL_WAREHOUSE_PATH,
+        parquet_path=PARCEL_WAREHOUSE_PARQUET,
+        legacy_csv=PARCEL_WAREHOUSE_LEGACY_CSV,
+        snapshot_delta=PARCEL_WAREHOUSE_SNAPSHOT_DELTA,
+    ):
+        self.path = path
+        self.parquet_path = parquet_path
+        self.legacy_csv = legacy_csv
+        self.snapshot_delta = snapshot_delta
+        self._local = threading.local()
+        self._snapshot_lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            yeni = not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'parsel'"
+            ).fetchone()
+            kolonlar = ", ".join(
+                f"{field} {sql_type}"
+                for field, (sql_type, *_) in {**PARCEL_FIELDS, **META_FIELDS}.items()
+            )
+            conn.executescript(
+                f"""
+                CREATE TABLE IF NOT EXISTS parsel (
+                    {kolonlar},
+                    ek_alanlar TEXT,
+                    ozet_hash TEXT NOT NULL,
+                    degisiklik INTEGER,
+                    PRIMARY KEY (mahalleId, adaNo, parselNo)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS parsel_guncelleme ON parsel (guncelleme);
+                CREATE TABLE IF NOT EXISTS parsel_surum (
+                    mahalleId INTEGER NOT NULL,
+                    adaNo INTEGER NOT NULL,
+                    parselNo INTEGER NOT NULL,
+                    surum INTEGER NOT NULL,
+                    kayit_zamani REAL NOT NULL,
+                    ozellikler TEXT NOT NULL,
+                    PRIMARY KEY (mahalleId, adaNo, parselNo, surum)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS ambar_meta (
+                    anahtar TEXT PRIMARY KEY,
+                    deger INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO ambar_meta VALUES ('degisiklik', 0);
+                """
+            )
+            self._migrate(conn)
+            if yeni:
+                for csv_path in self.legacy_csv:
+                    if os.path.exists(csv_path):
+                        self.import_csv(csv_path)
+        return conn
+
+    def _migrate(self, conn):
+        sutunlar = {r[1] for r in conn.execute("PRAGMA table_info(parsel)")}
+        if "degisiklik" not in sutunlar:
+            # Eski satırlar son değişiklikte yazılmış sayılır: görüntü güncelse
+            # fark boş kalır, değilse tüm tablo fark sayılıp görüntü yenilenir
+            conn.executescript(
+                """
+                BEGIN IMMEDIATE;
+                ALTER TABLE parsel ADD COLUMN degisiklik INTEGER;
+                UPDATE parsel SET degisiklik = (
+                    SELECT deger FROM ambar_meta WHERE anahtar = 'degisiklik'
+                );
+                COMMIT;
+                """
+            )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS parsel_degisiklik ON parsel (degisiklik)"
+        )
+
+    def _upsert(self, conn, props, now, degisiklik):
+        kayit, ek_alanlar = normalize_parcel_props(props)
+        key = tuple(kayit[f] for f in PARCEL_KEY)
+        ozet_hash = _digest(kayit, ek_alanlar)
+        onceki = conn.execute(
+            "SELECT surum, ozet_hash, ilk_kayit FROM parsel "
+            "WHERE mahalleId = ? AND adaNo = ? AND parselNo = ?",
+            key,
+        ).fetchone()
+        if onceki is not None and onceki[1] == ozet_hash:
+            conn.execute(
+                "UPDATE parsel SET son_gorulme = ? "
+                "WHERE mahalleId = ? AND adaNo = ? AND parselNo = ?",
+                (now, *key),
+            )
+            return False
+        surum = 1 if onceki is None else onceki[0] + 1
+        ilk_kayit = now if onceki is None else onceki[2]
+        satir = {field: kayit.get(field) for field in PARCEL_FIELDS}
+        satir.update(
+            surum=surum,
+            ilk_kayit=ilk_kayit,
+            guncelleme=now,
+            son_gorulme=now,
+            ek_alanlar=(
+                json.dumps(ek_alanlar, ensure_ascii=False) if ek_alanlar else None
+            ),
+            ozet_hash=ozet_hash,
+            degisiklik=degisiklik,
+        )
+        conn.execute(
+            f"INSERT OR REPLACE INTO parsel ({', '.join(satir)}) "
+            f"VALUES ({', '.join('?' for _ in satir)})",
+            tuple(satir.values()),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO parsel_surum VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                *key,
+                surum,
+                now,
+                json.dumps({**kayit, **ek_alanlar}, ensure_ascii=False),
+            ),
+        )
+        return True
+
+    def upsert_many(self, props_list):
+        """Parselleri tek işlemde yazar; içeriği değişen kayıt sayısını döner."""
+        conn = self._conn()
+        now = time.time()
+        degisen = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Yazma kilidi alındığı için sayaç bu işlem boyunca sabittir
+            degisiklik = self._change_count(conn) + 1
+            for props in props_list:
+                degisen += self._upsert(conn, props, now, degisiklik)
+            if degisen:
+                # Anlık görüntünün bayat olup olmadığı bu sayaçla anlaşılır
+                conn.execute(
+                    "UPDATE ambar_meta SET deger = deger + 1 "
+                    "WHERE anahtar = 'degisiklik'"
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return degisen
+
+    def upsert(self, props: dict):
+        return bool(self.upsert_many([props]))
+
+    def import_csv(self, csv_path):
+        """Eski parsel CSV'sindeki geçerli satırları ambara aktarır."""
+        try:
+            df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+        except (pd.errors.EmptyDataError, pd.errors.ParserError):
+            return 0
+        satirlar = [
+            r for r in df.to_dict("records") if all(r.get(f) for f in PARCEL_KEY)
+        ]
+        return self.upsert_many(satirlar)
+
+    def get(self, mahalle_id, ada, parsel):
+        df = pd.read_sql_query(
+            "SELECT * FROM parsel WHERE mahalleId = ? AND adaNo = ? AND parselNo = ?",
+            self._conn(),
+            params=(int(mahalle_id), int(ada), int(parsel)),
+        )
+        return None if df.empty else df.iloc[0].to_dict()
+
+    def history(self, mahalle_id, ada, parsel):
+        rows = self._conn().execute(
+            "SELECT surum, kayit_zamani, ozellikler FROM parsel_surum "
+            "WHERE mahalleId = ? AND adaNo = ? AND parselNo = ? ORDER BY surum",
+            (int(mahalle_id), int(ada), int(parsel)),
+        )
+        return [
+            {"surum": surum, "kayit_zamani": zaman, "ozellikler": json.loads(oz)}
+            for surum, zaman, oz in rows
+        ]
+
+    def recent(self, limit=10):
+        """Son güncellenen parseller (arayüzdeki son kayıtlar tablosu için)."""
+        return pd.read_sql_query(
+            "SELECT * FROM parsel ORDER BY guncelleme DESC LIMIT ?",
+            self._conn(),
+            params=(int(limit),),
+        ).drop(columns=["ozet_hash"])
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM parsel").fetchone()[0]
+
+    def _change_count(self, conn):
+        return conn.execute(
+            "SELECT deger FROM ambar_meta WHERE anahtar = 'degisiklik'"
+        ).fetchone()[0]
+
+    def _snapshot_change_count(self):
+        try:
+            meta = pq.read_schema(self.parquet_path).metadata or {}
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        deger = meta.get(b"degisiklik")
+        return int(deger) if deger is not None else None
+
+    def schema(self):
+        alanlar = {**PARCEL_FIELDS, **META_FIELDS}
+        return pa.schema(
+            [pa.field(f, spec[1]) for f, spec in alanlar.items()]
+            + [pa.field("ek_alanlar", pa.string())]
+        )
+
+    def snapshot(self, force=False):
+        """
+        Güncel tabloyu Parquet'e yazar. Dosya yazıldığından beri ambarda
+        değişiklik olmadıysa yeniden yazılmaz; yolunu döndürür.
+        """
+        with self._snapshot_lock:
+            conn = self._conn()
+            if not force and self._snapshot_change_count() == self._change_count(conn):
+                return self.parquet_path
+            schema = self.schema()
+            # Sayaç ve satırlar aynı okuma işleminden gelsin
+            conn.execute("BEGIN")
+            try:
+                degisiklik = self._change_count(conn)
+                df = pd.read_sql_query(
+                    f"SELECT {', '.join(schema.names)} FROM parsel "
+                    "ORDER BY mahalleId, adaNo, parselNo",
+                    conn,
+                )
+            finally:
+                conn.execute("COMMIT")
+            schema = schema.with_metadata({"degisiklik": str(degisiklik)})
+            table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+            with atomic_write(self.parquet_path) as f:
+                pq.write_table(table, f, compression="zstd")
+            return self.parquet_path
+
+    def read(self, columns=None, filters=None):
+        """
+        Anlık görüntüden okur; görüntüden sonra değişen parseller SQLite'tan
+        alınıp görüntüdeki eski hallerinin yerine konur. `filters` pyarrow
+        biçimindedir, örn. [("mahalleId", "=", 150127), ("alan", ">", 5000)].
+        """
+        conn = self._conn()
+        gorunum = self._snapshot_change_count()
+        if gorunum is not None:
+            bekleyen = conn.execute(
+                "SELECT COUNT(*) FROM parsel WHERE degisiklik > ?", (gorunum,)
+            ).fetchone()[0]
+        if gorunum is None or bekleyen > self.snapshot_delta:
+            self.snapshot()
+            return pd.read_parquet(self.parquet_path, columns=columns, filters=filters)
+
+        schema = self.schema()
+        okunan = (
+            None if columns is None else list(dict.fromkeys([*PARCEL_KEY, *columns]))
+        )
+        df = pd.read_parquet(self.parquet_path, columns=okunan, filters=filters)
+        if bekleyen:
+            fark = pd.read_sql_query(
+                f"SELECT {', '.join(schema.names)} FROM parsel WHERE degisiklik > ?",
+                conn,
+                params=(gorunum,),
+            )
+            anahtar = list(PARCEL_KEY)
+            eski = pd.MultiIndex.from_frame(df[anahtar]).isin(
+                pd.MultiIndex.from_frame(fark[anahtar])
+            )
+            fark = pa.Table.from_pandas(fark, schema=schema, preserve_index=False)
+            if filters:
+                fark = fark.filter(pq.filters_to_expression(filters))
+            if okunan is not None:
+                fark = fark.select(okunan)
+            df = (
+                pd.concat([df[~eski], fark.to_pandas()], ignore_index=True)
+                .sort_values(anahtar)
+                .reset_index(drop=True)
+            )
+        return df if columns is None else df[list(columns)]
+
+
+parcel_warehouse = ParcelWarehouse()
+write_spool.register("parsel_ambar", parcel_warehouse.upsert_many)
@@ -0,0 +1,225 @@
+import json
+import os
+import threading
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from utils.geo_ops import (
+    extract_osm_geometries,
+    load_polygons,
+    load_slope_data,
+    osm_cache_path,
+    polygon_presence,
+)
+from utils.storage import atomic_write, file_lock
+
+POLYGON_PATH = "data/poligon.json"
+SLOPE_PATH = "data/slope/slope_cache.csv"
+OSM_FOLDER = "data/osm_results"
+POLYGON_FEATURES_PATH = os.getenv(
+    "POLYGON_FEATURES_PATH", "data/poligon_ozellik.parquet"
+)
+# OSM verisi poligon merkezinin bu kadar metre çevresinden indirilir
+# (osm_downloader BUFFER_METERS); daha uzak mesafeler veriyle ölçülemez
+POLYGON_FEATURE_RADIUS = float(os.getenv("POLYGON_FEATURE_RADIUS", "250"))
+
+FEATURE_COLUMNS = (
+    "Yapı Sayısı",
+    "Yapı Alanı (m²)",
+    "En Yakın Yapı (m)",
+    "Yapı Var",
+    "Yol Sayısı",
+    "Yol Uzunluğu (m)",
+    "En Yakın Yol (m)",
+    "Yol Var",
+)
+
+
+def compute_polygon_features(polygons, buildings, roads, crs, max_distance=None):
+    """
+    `polygon_presence` sütunlarına poligon içinde kalan yapı alanını ve yol
+    uzunluğunu ekler. Kesişimler yalnızca uzamsal dizinin döndürdüğü
+    (poligon, geometri) çiftleri üzerinde vektörel hesaplanır.
+    """
+    out = polygon_presence(
+        polygons, buildings, roads, crs=crs, max_distance=max_distance
+    )
+    poligonlar = np.asarray(polygons.geometry.to_crs(crs).values)
+    for sutun, katman, olcu in (
+        ("Yapı Alanı (m²)", buildings, shapely.area),
+        ("Yol Uzunluğu (m)", roads, shapely.length),
+    ):
+        toplam = np.zeros(len(poligonlar))
+        if len(katman) and len(poligonlar):
+            geometriler = katman.geometry.to_crs(crs)
+            p, g = geometriler.sindex.query(poligonlar, predicate="intersects")
+            # OSM yapı poligonları kendiyle kesişebilir; kesişimden önce onarılır
+            parcalar = shapely.make_valid(np.asarray(geometriler.values)[g])
+            kesisim = shapely.intersection(poligonlar[p], parcalar)
+            toplam = np.bincount(p, weights=olcu(kesisim), minlength=len(poligonlar))
+        out[sutun] = toplam
+    return out[list(FEATURE_COLUMNS)]
+
+
+def _manifest_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def _polygon_signature(gdf):
+    """Poligonun girdileri (geometri + eğim) değişince değişen özet."""
+    girdi = pd.DataFrame(
+        {
+            "geometri": shapely.to_wkb(np.asarray(gdf.geometry.values), hex=True),
+            "egim": gdf["Eğim (%)"],
+        }
+    )
+    return pd.util.hash_pandas_object(girdi, index=False).map("{:016x}".format)
+
+
+def _osm_files(folder):
+    """Dosya adı -> [mtime_ns, boyut]; ayrıştırmadan önce alınır."""
+    return {
+        entry.name: [entry.stat().st_mtime_ns, entry.stat().st_size]
+        for entry in os.scandir(folder)
+        if entry.name.endswith(".json")
+    }
+
+
+def _with_bounds(dosyalar, buildings, roads):
+    """Her dosya kaydına o dosyadaki geometrilerin (metrik) sınır kutusunu ekler."""
+    katman = pd.concat([buildings, roads], ignore_index=True)
+    sinirlar = {}
+    if len(katman):
+        kutu = (
+            katman.geometry.bounds.groupby(katman["dosya"].to_numpy())
+            .agg({"minx": "min", "miny": "min", "maxx": "max", "maxy": "max"})
+            .round(3)
+        )
+        sinirlar = dict(zip(kutu.index, map(list, kutu.itertuples(index=False))))
+    return {ad: [*kayit, sinirlar.get(ad)] for ad, kayit in dosyalar.items()}
+
+
+def _affected(metrik, eski, yeni, radius):
+    """
+    Eklenen, değişen ya da silinen OSM dosyalarının eski ve yeni sınır
+    kutularına `radius` metreden yakın poligonların konumları.
+    """
+    kutular = []
+    for ad in set(eski) | set(yeni):
+        once, simdi = eski.get(ad), yeni.get(ad)
+        if once is not None and simdi is not None and once[:2] == simdi[:2]:
+            continue
+        kutular += [shapely.box(*k[2]) for k in (once, simdi) if k and k[2]]
+    if not kutular or not len(metrik):
+        return np.empty(0, dtype=np.intp)
+    alanlar = shapely.buffer(np.array(kutular), radius)
+    _, konumlar = metrik.sindex.query(alanlar, predicate="intersects")
+    return np.unique(konumlar)
+
+
+def _read_manifest(path, crs, radius):
+    """Aynı CRS ve yarıçapla kurulmuş önceki tablonun dosya listesi."""
+    if not (os.path.exists(path) and os.path.exists(_manifest_path(path))):
+        return None
+    with open(_manifest_path(path), encoding="utf-8") as f:
+        eski = json.load(f)
+    if (eski.get("crs"), eski.get("yaricap")) != (crs, radius):
+        return None
+    return eski
+
+
+def refresh_polygon_features(
+    path=POLYGON_FEATURES_PATH,
+    polygon_path=POLYGON_PATH,
+    slope_path=SLOPE_PATH,
+    osm_folder=OSM_FOLDER,
+    radius=POLYGON_FEATURE_RADIUS,
+    full=False,
+):
+    """
+    Poligon başına özellik tablosunu (eğim, yapı sayısı/alanı, yol
+    uzunluğu, en yakın yapı/yol) GeoParquet olarak yazar. Önceki tablo varsa
+    yalnızca geometrisi ya da eğimi değişen, yeni eklenen ve değişen OSM
+    dosyalarının `radius` çevresindeki poligonlar yeniden hesaplanır; en
+    yakın mesafeler de bu yarıçapla sınırlı olduğu için sonuç tam kurulumla
+    aynıdır. OSM katmanları `extract_osm_geometries` önbelleğinden gelir.
+    {"toplam": ..., "yeniden": ...} döner.
+    """
+    with file_lock(path):
+        dosyalar = _osm_files(osm_folder)
+        gdf = load_polygons(polygon_path).to_crs("EPSG:4326")
+        gdf = gdf.merge(load_slope_data(slope_path), on="ID", how="left")
+        gdf["_imza"] = _polygon_signature(gdf)
+        crs = gdf.estimate_utm_crs()
+        metrik = gdf.to_crs(crs)
+        eski = None if full else _read_manifest(path, crs.to_string(), radius)
+        # OSM dosyaları değişmediyse dosya sınır kutuları yeniden hesaplanmaz
+        osm_ayni = (
+            eski is not None
+            and {ad: k[:2] for ad, k in eski["dosyalar"].items()} == dosyalar
+        )
+        buildings, roads = (k.to_crs(crs) for k in extract_osm_geometries(osm_folder))
+        manifest = {
+            "crs": crs.to_string(),
+            "yaricap": radius,
+            "dosyalar": (
+                eski["dosyalar"]
+                if osm_ayni
+                else _with_bounds(dosyalar, buildings, roads)
+            ),
+        }
+
+        if eski is None:
+            kirli = np.ones(len(gdf), dtype=bool)
+        else:
+            onceki = pd.read_parquet(path, columns=["ID", "_imza", *FEATURE_COLUMNS])
+            imza = gdf["ID"].map(onceki.set_index("ID")["_imza"])
+            kirli = (imza != gdf["_imza"]).to_numpy(copy=True)
+            etkilenen = _affected(
+                metrik, eski["dosyalar"], manifest["dosyalar"], radius
+            )
+            kirli[etkilenen] = True
+
+        parcalar = [
+            compute_polygon_features(metrik[kirli], buildings, roads, crs, radius)
+        ]
+        if not kirli.all():
+            kalan = onceki.set_index("ID").loc[
+                gdf.loc[~kirli, "ID"], list(FEATURE_COLUMNS)
+            ]
+            kalan.index = gdf.index[~kirli]
+            parcalar.append(kalan)
+        ozellik = pd.concat(parcalar).reindex(gdf.index)
+        table = gdf[["ID", "Eğim (%)", "_imza", "geometry"]].join(ozellik)
+
+        with atomic_write(path) as f:
+            table.to_parquet(f, compression="zstd")
+        with atomic_write(_manifest_path(path), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        return {"toplam": len(table), "yeniden": int(kirli.sum())}
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_polygon_features(path=POLYGON_FEATURES_PATH, osm_folder=OSM_FOLDER):
+    """
+    Hazır özellik tablosunu ve OSM katmanlarını okur; (poligonlar, yapılar,
+    yollar) döner. Tablo yoksa bir kez kurulur; tablo ve OSM klasörü
+    değişmedikçe bellekteki kopya döner.
+    """
+    if not os.path.exists(path):
+        refresh_polygon_features(path, osm_folder=osm_folder)
+    surum = (os.path.getmtime(path), osm_cache_path(osm_folder))
+    with _cache_lock:
+        onbellek = _cache.get(path)
+        if onbellek is None or onbellek[0] != surum:
+            gdf = gpd.read_parquet(path).drop(columns="_imza")
+            buildings, roads = extract_osm_geometries(osm_folder)
+            onbellek = (surum, (gdf, buildings, roads))
+            _cache[path] = onbellek
+        return onbellek[1]
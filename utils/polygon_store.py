@@ -0,0 +1,83 @@
+import os
+
+import geopandas as gpd
+import numpy as np
+from pyproj import CRS, Transformer
+from shapely import box
+
+from utils.geo_ops import load_polygons
+from utils.storage import atomic_write, file_lock
+
+POLYGON_PATH = "data/poligon.json"
+POLYGON_STORE_PATH = os.getenv("POLYGON_STORE_PATH", "data/poligon.parquet")
+# Küçük row group'lar bbox süzgecinde daha çok grubun atlanmasını sağlar
+POLYGON_STORE_ROW_GROUP = int(os.getenv("POLYGON_STORE_ROW_GROUP", "256"))
+POLYGON_CRS = "EPSG:3857"
+
+
+def convert_polygons(
+    src=POLYGON_PATH, dst=POLYGON_STORE_PATH, row_group_size=POLYGON_STORE_ROW_GROUP
+):
+    """
+    Poligon JSON'unu uzamsal dizinli GeoParquet'e dönüştürür: satırlar
+    Hilbert eğrisi sırasıyla yazılır (yakın poligonlar aynı row group'ta) ve
+    her satırın sınır kutusu `bbox` kapsama sütununda tutulur. Böylece kutu
+    süzgeçli okumalar row group istatistikleriyle budanır.
+    """
+    gdf = load_polygons(src, crs=POLYGON_CRS)
+    gdf = gdf.iloc[np.argsort(gdf.hilbert_distance(), kind="stable")]
+    with atomic_write(dst) as f:
+        gdf.to_parquet(
+            f,
+            index=False,
+            compression="zstd",
+            write_covering_bbox=True,
+            row_group_size=row_group_size,
+        )
+    return dst
+
+
+def _ensure_store(src, dst):
+    if os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src):
+        return
+    with file_lock(dst):
+        if not os.path.exists(dst) or os.path.getmtime(dst) < os.path.getmtime(src):
+            convert_polygons(src, dst)
+
+
+def _store_bounds(bounds, crs):
+    """`crs` koordinatlarındaki kutuyu depo CRS'ine çevirir."""
+    if crs is None or CRS.from_user_input(crs) == CRS.from_user_input(POLYGON_CRS):
+        return tuple(bounds)
+    donusum = Transformer.from_crs(crs, POLYGON_CRS, always_xy=True)
+    return donusum.transform_bounds(*bounds, densify_pts=21)
+
+
+def read_polygons(
+    bbox=None,
+    mask=None,
+    crs=None,
+    columns=None,
+    src=POLYGON_PATH,
+    path=POLYGON_STORE_PATH,
+):
+    """
+    Yalnızca görünüm kutusuyla (`bbox` = minx, miny, maxx, maxy) ya da bir
+    bölge geometrisiyle (`mask`, örn. ilçe sınırı) kesişen poligonları okur;
+    tüm veri ayrıştırılmaz. `crs` verilirse `bbox`/`mask` o koordinatlarda
+    yorumlanır (örn. "EPSG:4326"). Depo yoksa ya da kaynak JSON daha yeniyse
+    önce dönüştürülür. Sonuç depo CRS'indedir (EPSG:3857).
+    """
+    _ensure_store(src, path)
+    if mask is not None:
+        if crs is not None:
+            mask = gpd.GeoSeries([mask], crs=crs).to_crs(POLYGON_CRS).iloc[0]
+        kutu = mask.bounds
+    elif bbox is not None:
+        kutu = _store_bounds(bbox, crs)
+    else:
+        return gpd.read_parquet(path, columns=columns)
+    gdf = gpd.read_parquet(path, columns=columns, bbox=kutu)
+    # bbox süzgeci sınır kutularını karşılaştırır; kesin kesişim burada
+    alan = mask if mask is not None else box(*kutu)
+    return gdf[gdf.intersects(alan)]
@@ -0,0 +1,32 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", str(os.cpu_count() or 2)))
+
+_pool = None
+_lock = threading.Lock()
+
+
+def get_process_pool():
+    """HTML ayrıştırma ve harita üretimi gibi CPU işleri için paylaşılan havuz."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS)
+        return _pool
+
+
+async def run_in_process(func, *args):
+    # func ve argümanlar pickle edilebilir olmalı (modül seviyesinde tanımlı)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), func, *args)
+
+
+def shutdown_process_pool():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
@@ -0,0 +1,215 @@
+import asyncio
+import threading
+import time
+
+THROTTLE_STATUS = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Saniyede `rate` jeton üreten, en fazla `burst` jeton biriktiren kova."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self):
+        # Jetonu hemen ayır; eksikse ne kadar beklenmesi gerektiğini döndür
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """
+    Sunucu başına token bucket + AIMD eşzamanlılık denetleyicisi.
+    Başarılı ve hızlı yanıtlarda hız ve eşzamanlılık sınırı toplamsal olarak
+    artar; 429/5xx, bağlantı hatası ya da hedefi aşan gecikmede yarıya iner.
+    """
+
+    def __init__(
+        self,
+        name,
+        rate=None,
+        min_rate=0.2,
+        max_rate=None,
+        rate_step=1.0,
+        max_concurrency=32,
+        target_latency=10.0,
+        cooldown=1.0,
+    ):
+        self.name = name
+        self.bucket = TokenBucket(rate) if rate else None
+        self.min_rate = min_rate
+        self.max_rate = max_rate or (rate * 4 if rate else None)
+        self.rate_step = rate_step
+        self.max_concurrency = max_concurrency
+        self.concurrency_limit = max(1, max_concurrency // 2)
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        # Bekleyen async istekler: (loop, future); yuva boşalınca uyandırılır
+        self._waiters = []
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "errors": 0,
+            "latency_total": 0.0,
+        }
+
+    # --- eşzamanlılık yuvaları ---
+    def _notify(self):
+        # self._cond tutulurken çağrılır; farklı loop/thread'lerdeki
+        # bekleyenler kendi loop'larında uyandırılır
+        self._cond.notify_all()
+        for loop, waiter in self._waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+        self._waiters.clear()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.concurrency_limit:
+                self._cond.wait()
+            self.in_flight += 1
+        if self.bucket:
+            self.bucket.acquire()
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.in_flight < self.concurrency_limit:
+                    self.in_flight += 1
+                    break
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                await waiter
+            finally:
+                with self._cond:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+        if self.bucket:
+            try:
+                await self.bucket.aacquire()
+            except BaseException:
+                # Jeton beklerken iptal: alınan yuva geri verilir
+                self.abandon()
+                raise
+
+    def abandon(self):
+        """İptal edilen isteğin yuvasını AIMD ayarına dokunmadan geri verir."""
+        with self._cond:
+            self.in_flight -= 1
+            self._notify()
+
+    def release(self, status_code=None, latency=None):
+        """İsteği kapatır ve sonucu AIMD ayarına geri besler."""
+        with self._cond:
+            self.in_flight -= 1
+            self.stats["requests"] += 1
+            if latency is not None:
+                self.stats["latency_total"] += latency
+            if status_code is None:
+                self.stats["errors"] += 1
+                self._decrease()
+            elif status_code in THROTTLE_STATUS:
+                self.stats["throttled"] += 1
+                self._decrease()
+            elif latency is not None and latency > self.target_latency:
+                self._decrease()
+            else:
+                self._increase()
+            self._notify()
+
+    def _increase(self):
+        self._successes += 1
+        if self._successes >= self.concurrency_limit:
+            self._successes = 0
+            self.concurrency_limit = min(
+                self.max_concurrency, self.concurrency_limit + 1
+            )
+        if self.bucket and self.bucket.rate < self.max_rate:
+            # Her yuva dolumunda bir adım: yaklaşık RTT başına +rate_step
+            step = self.rate_step / max(1, self.concurrency_limit)
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + step))
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._successes = 0
+        self.concurrency_limit = max(1, self.concurrency_limit // 2)
+        if self.bucket:
+            self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+
+    def metrics(self):
+        with self._cond:
+            requests = self.stats["requests"]
+            return {
+                "rate": round(self.bucket.rate, 3) if self.bucket else None,
+                "max_rate": self.max_rate,
+                "concurrency_limit": self.concurrency_limit,
+                "in_flight": self.in_flight,
+                "requests": requests,
+                "throttled": self.stats["throttled"],
+                "errors": self.stats["errors"],
+                "avg_latency_ms": (
+                    round(self.stats["latency_total"] / requests * 1000, 1)
+                    if requests
+                    else None
+                ),
+            }
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+_limiters = {}
+_lock = threading.Lock()
+
+
+def get_limiter(name, **policy):
+    with _lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = AdaptiveLimiter(name, **policy)
+            _limiters[name] = limiter
+        return limiter
+
+
+def limiter_metrics():
+    with _lock:
+        limiters = dict(_limiters)
+    return {name: limiter.metrics() for name, limiter in limiters.items()}
@@ -0,0 +1,415 @@
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.storage import atomic_write
+
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", "data/sonuclar.sqlite")
+
+# Her tabloda bulunan sistem sütunları
+SYSTEM_COLUMNS = ("_id", "_zaman")
+
+# Süzgeç alanı -> tablolarda karşılık gelebilecek sütun adları
+FILTER_COLUMNS = {
+    "mahalle": ("Mahalle", "mahalle", "İdari Mahalle"),
+    "ada": ("Ada", "ada", "adaNo"),
+}
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def dataset_name(path: str):
+    """Eski CSV yolundan (örn. data/imar_detaylari.csv) tablo adı üretir."""
+    ad = os.path.splitext(os.path.basename(str(path)))[0]
+    return re.sub(r"\W+", "_", ad).strip("_") or "sonuclar"
+
+
+def _quote(name: str):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+# SQLite sütun adlarını yalnızca ASCII harflerde büyük/küçük harf duyarsız karşılaştırır
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _column_key(name: str):
+    return name.translate(_ASCII_LOWER)
+
+
+def _timestamp(value):
+    return value.timestamp() if hasattr(value, "timestamp") else float(value)
+
+
+class _ChunkSink(io.RawIOBase):
+    """ParquetWriter çıktısını parça parça toplayan yazma hedefi."""
+
+    def __init__(self):
+        super().__init__()
+        self._parcalar = []
+        self._konum = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parcalar.append(bytes(b))
+        self._konum += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._konum
+
+    def take(self):
+        veri = b"".join(self._parcalar)
+        self._parcalar.clear()
+        return veri
+
+
+def _to_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    return None if pd.isna(value) else str(value)
+
+
+def _to_sql_value(value):
+    if hasattr(value, "item") and not isinstance(value, (list, tuple, dict)):
+        value = value.item()  # numpy/pandas skalerleri
+    if isinstance(value, float) and value != value:
+        return None  # NaN
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+class ResultStore:
+    """
+    Sorgu sonuçları ve işlem kayıtları için yalnızca eklemeli SQLite (WAL)
+    deposu. Her veri kümesi ayrı tablodur; kayıtta yeni bir alan geldiğinde
+    tabloya sütun eklenir. Ekleme maliyeti geçmişin boyutundan bağımsızdır ve
+    birden çok süreç aynı dosyaya güvenle yazabilir.
+    """
+
+    def __init__(self, path=RESULT_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._columns = {}
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _table_columns(self, conn, dataset):
+        rows = conn.execute(f"PRAGMA table_info({_quote(dataset)})").fetchall()
+        return [row[1] for row in rows]
+
+    def _create(self, conn, dataset, legacy_path=None):
+        conn.execute(
+            f"CREATE TABLE {_quote(dataset)} ("
+            "_id INTEGER PRIMARY KEY AUTOINCREMENT, _zaman REAL NOT NULL)"
+        )
+        if legacy_path and os.path.exists(legacy_path):
+            # Depodan önceki CSV kayıtları tabloya bir kez aktarılır
+            try:
+                df = pd.read_csv(legacy_path)
+            except (pd.errors.EmptyDataError, pd.errors.ParserError):
+                return
+            self._insert(conn, dataset, df.to_dict("records"))
+
+    def _insert(self, conn, dataset, rows):
+        sistem = {_column_key(c) for c in SYSTEM_COLUMNS}
+        columns = [
+            c
+            for c in dict.fromkeys(c for r in rows for c in r)
+            if _column_key(c) not in sistem
+        ]
+        mevcut = self._columns.get(dataset)
+        if mevcut is None or any(_column_key(c) not in mevcut for c in columns):
+            # Yazma kilidi tutulurken okunduğu için diğer süreçlerin eklediği
+            # sütunlar da görülür
+            mevcut = {_column_key(c): c for c in self._table_columns(conn, dataset)}
+            for column in columns:
+                if _column_key(column) not in mevcut:
+                    # Tür belirtilmeyen sütun değeri kendi türüyle saklar
+                    conn.execute(
+                        f"ALTER TABLE {_quote(dataset)} ADD COLUMN {_quote(column)}"
+                    )
+                    mevcut[_column_key(column)] = column
+            with self._lock:
+                self._columns[dataset] = mevcut
+        # Yalnızca harf büyüklüğüyle ayrılan anahtarlar (alan/Alan) tek sütuna yazılır
+        hedef = {c: mevcut[_column_key(c)] for c in columns}
+        saklanan = list(dict.fromkeys(hedef.values()))
+        sql = (
+            f"INSERT INTO {_quote(dataset)} "
+            f"({', '.join(['_zaman', *map(_quote, saklanan)])}) "
+            f"VALUES ({', '.join('?' for _ in range(len(saklanan) + 1))})"
+        )
+        now = time.time()
+        conn.executemany(sql, ([now, *self._values(r, hedef, saklanan)] for r in rows))
+
+    @staticmethod
+    def _values(row, hedef, saklanan):
+        degerler = {}
+        for column, value in row.items():
+            ad = hedef.get(column)
+            if ad is not None and degerler.get(ad) is None:
+                degerler[ad] = value
+        return [degerler.get(ad) for ad in saklanan]
+
+    def append_many(self, dataset, rows, legacy_path=None):
+        """
+        Kayıtları tek işlemde ekler. `legacy_path` verilirse ve tablo henüz
+        yoksa, aynı addaki eski CSV dosyasının içeriği önce aktarılır.
+        """
+        rows = [{str(k): _to_sql_value(v) for k, v in r.items()} for r in rows]
+        if not rows:
+            return 0
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if dataset not in self._columns and not self._table_columns(conn, dataset):
+                self._create(conn, dataset, legacy_path)
+            self._insert(conn, dataset, rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            # Geri alınan ALTER TABLE'lar önbellekte kalmasın
+            with self._lock:
+                self._columns.pop(dataset, None)
+            raise
+        return len(rows)
+
+    def append(self, dataset, row, legacy_path=None):
+        return self.append_many(dataset, [row], legacy_path)
+
+    def read(self, dataset, tail=None, system_columns=False):
+        conn = self._conn()
+        if not self._table_columns(conn, dataset):
+            return pd.DataFrame()
+        sql = f"SELECT * FROM {_quote(dataset)}"
+        if tail:
+            # Son `tail` kayıt, _id birincil anahtarı üzerinden tersten taranır
+            sql = f"SELECT * FROM ({sql} ORDER BY _id DESC LIMIT {int(tail)})"
+        df = pd.read_sql_query(f"{sql} ORDER BY _id", conn)
+        if not system_columns:
+            df = df.drop(columns=list(SYSTEM_COLUMNS))
+        return df
+
+    def count(self, dataset):
+        conn = self._conn()
+        if not self._table_columns(conn, dataset):
+            return 0
+        return conn.execute(f"SELECT COUNT(*) FROM {_quote(dataset)}").fetchone()[0]
+
+    def delete_until(self, dataset, last_id, before):
+        """
+        Arşive taşınan kayıtları siler: `_id <= last_id` ve `_zaman < before`.
+        Silinen kayıt sayısını döner.
+        """
+        conn = self._conn()
+        if not self._table_columns(conn, dataset):
+            return 0
+        with conn:
+            cursor = conn.execute(
+                f"DELETE FROM {_quote(dataset)} WHERE _id <= ? AND _zaman < ?",
+                (int(last_id), _timestamp(before)),
+            )
+        return cursor.rowcount
+
+    def datasets(self):
+        rows = self._conn().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite_%'"
+        )
+        return [row[0] for row in rows]
+
+    def _find_column(self, columns, alan):
+        for aday in FILTER_COLUMNS[alan]:
+            if aday in columns:
+                return aday
+        raise ValueError(f"Tabloda '{alan}' sütunu yok")
+
+    def _where(
+        self,
+        columns,
+        mahalle=None,
+        ada_min=None,
+        ada_max=None,
+        baslangic=None,
+        bitis=None,
+    ):
+        kosullar, params = [], []
+        if mahalle is not None:
+            kosullar.append(f"{_quote(self._find_column(columns, 'mahalle'))} = ?")
+            params.append(mahalle)
+        for deger, op in ((ada_min, ">="), (ada_max, "<=")):
+            if deger is not None:
+                ada = _quote(self._find_column(columns, "ada"))
+                kosullar.append(f"CAST({ada} AS INTEGER) {op} ?")
+                params.append(int(deger))
+        for deger, op in ((baslangic, ">="), (bitis, "<")):
+            if deger is not None:
+                kosullar.append(f"_zaman {op} ?")
+                params.append(_timestamp(deger))
+        return kosullar, params
+
+    def page(self, dataset, limit=100, after_id=None, before_id=None, **filters):
+        """
+        `_id` imlecine göre sayfalı okuma; yalnızca istenen sayfa okunur.
+        `after_id` verilirse ondan sonraki `limit` kayıt, verilmezse
+        `before_id`'den (ya da en sondan) önceki son `limit` kayıt döner.
+        Dönen: (DataFrame, onceki_imlec, sonraki_imlec).
+        """
+        conn = self._conn()
+        columns = self._table_columns(conn, dataset)
+        if not columns:
+            return pd.DataFrame(), None, None
+        kosullar, params = self._where(columns, **filters)
+        if after_id is not None:
+            kosullar.append("_id > ?")
+            params.append(int(after_id))
+            sira = "ASC"
+        else:
+            if before_id is not None:
+                kosullar.append("_id < ?")
+                params.append(int(before_id))
+            sira = "DESC"
+        where = f" WHERE {' AND '.join(kosullar)}" if kosullar else ""
+        sql = (
+            f"SELECT * FROM {_quote(dataset)}{where} ORDER BY _id {sira} "
+            f"LIMIT {int(limit)}"
+        )
+        df = pd.read_sql_query(sql, conn, params=params)
+        df = df.sort_values("_id").reset_index(drop=True)
+        if df.empty:
+            return df, None, None
+        return df, int(df["_id"].iloc[0]), int(df["_id"].iloc[-1])
+
+    def iter_chunks(
+        self, dataset, chunk_size=EXPORT_CHUNK_SIZE, system_columns=False, **filters
+    ):
+        """
+        Süzgeçten geçen kayıtları `_id` sırasıyla `chunk_size`'lık DataFrame
+        parçaları halinde verir; bellekte aynı anda tek parça bulunur.
+        """
+        conn = self._conn()
+        columns = self._table_columns(conn, dataset)
+        if not columns:
+            return
+        kosullar, params = self._where(columns, **filters)
+        secilen = columns if system_columns else [c for c in columns if c != "_zaman"]
+        sql = (
+            f"SELECT {', '.join(_quote(c) for c in secilen)} FROM {_quote(dataset)} "
+            f"WHERE {' AND '.join(kosullar + ['_id > ?'])} "
+            f"ORDER BY _id LIMIT {int(chunk_size)}"
+        )
+        son_id = 0
+        while True:
+            # Akış parçaları farklı iş parçacıklarında tüketilebilir
+            df = pd.read_sql_query(sql, self._conn(), params=[*params, son_id])
+            if df.empty:
+                return
+            son_id = int(df["_id"].iloc[-1])
+            yield df if system_columns else df.drop(columns="_id")
+            if len(df) < chunk_size:
+                return
+
+    def _arrow_schema(self, dataset, system_columns=False, **filters):
+        """
+        Tür belirtilmemiş SQLite sütunları için tüm parçalarda aynı kalacak
+        Arrow şeması: metin içeren sütun string, ondalıklı double, kalanı int64.
+        """
+        conn = self._conn()
+        columns = self._table_columns(conn, dataset)
+        kosullar, params = self._where(columns, **filters)
+        secilen = [c for c in columns if system_columns or c not in SYSTEM_COLUMNS]
+        where = f" WHERE {' AND '.join(kosullar)}" if kosullar else ""
+        ifadeler = ", ".join(
+            f"MAX(typeof({_quote(c)}) IN ('text', 'blob')), "
+            f"MAX(typeof({_quote(c)}) = 'real'), MAX(typeof({_quote(c)}) = 'integer')"
+            for c in secilen
+        )
+        satir = conn.execute(
+            f"SELECT {ifadeler} FROM {_quote(dataset)}{where}", params
+        ).fetchone()
+        fields = []
+        for i, column in enumerate(secilen):
+            metin, ondalik, tamsayi = satir[3 * i : 3 * i + 3]
+            if metin or not (ondalik or tamsayi):
+                tip = pa.string()
+            elif ondalik:
+                tip = pa.float64()
+            else:
+                tip = pa.int64()
+            fields.append(pa.field(column, tip))
+        return pa.schema(fields)
+
+    def stream(self, dataset, fmt="csv", system_columns=False, **filters):
+        """
+        Veri kümesini CSV, NDJSON ya da Parquet olarak bayt parçaları halinde
+        üretir (StreamingResponse için). Parquet'te her parça bir row group'tur.
+        """
+        if fmt not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"Desteklenmeyen biçim: {fmt}")
+        columns = self._table_columns(self._conn(), dataset)
+        if not columns:
+            raise KeyError(f"Veri kümesi yok: {dataset}")
+        # Süzgeç hataları akış başlamadan yükselsin
+        self._where(columns, **filters)
+        chunks = self.iter_chunks(dataset, system_columns=system_columns, **filters)
+        if fmt == "csv":
+            return self._stream_csv(chunks)
+        if fmt == "ndjson":
+            return (
+                df.to_json(orient="records", lines=True, force_ascii=False).encode()
+                for df in chunks
+            )
+        schema = self._arrow_schema(dataset, system_columns, **filters)
+        return self._stream_parquet(chunks, schema)
+
+    def _stream_csv(self, chunks):
+        for i, df in enumerate(chunks):
+            yield df.to_csv(index=False, header=i == 0).encode("utf-8")
+
+    def _stream_parquet(self, chunks, schema):
+        sink = _ChunkSink()
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for df in chunks:
+                for field in schema:
+                    if pa.types.is_string(field.type):
+                        df[field.name] = df[field.name].map(_to_text)
+                writer.write_table(
+                    pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+                )
+                yield sink.take()
+        yield sink.take()
+
+    def export_csv(self, dataset, path):
+        with atomic_write(path) as f:
+            for parca in self.stream(dataset, "csv"):
+                f.write(parca)
+        return path
+
+
+result_store = ResultStore()
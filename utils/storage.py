@@ -0,0 +1,216 @@
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from filelock import FileLock, Timeout
+
+STORAGE_LOCK_TIMEOUT = float(os.getenv("STORAGE_LOCK_TIMEOUT", "30"))
+# "1" ise arka plan yazımları tek bir yazıcı süreç tarafından uygulanır
+STORAGE_SINGLE_WRITER = os.getenv("STORAGE_SINGLE_WRITER", "0") == "1"
+WRITE_SPOOL_PATH = os.getenv("WRITE_SPOOL_PATH", "data/cache/yazma_kuyrugu.sqlite")
+WRITE_SPOOL_POLL_MS = int(os.getenv("WRITE_SPOOL_POLL_MS", "200"))
+
+logger = logging.getLogger(__name__)
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def file_lock(path: str):
+    """
+    `path` için süreçler arası danışma kilidi (yanındaki `.lock` dosyası).
+    Yalnızca oku-değiştir-yaz işlemleri kilit alır; atomik yazım sayesinde
+    okuyucular kilitsiz okur ve her zaman tam bir dosya görür.
+    """
+    path = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(path)
+        if lock is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            lock = FileLock(f"{path}.lock", timeout=STORAGE_LOCK_TIMEOUT)
+            _locks[path] = lock
+        return lock
+
+
+@contextlib.contextmanager
+def atomic_write(path: str, mode="wb", encoding=None):
+    """
+    Aynı klasörde benzersiz bir geçici dosyaya yazar, diske işler ve
+    `os.replace` ile hedefin yerine koyar. Hata olursa hedef değişmez;
+    eşzamanlı yazıcılar birbirinin geçici dosyasını ezmez.
+    """
+    path = os.path.abspath(path)
+    klasor = os.path.dirname(path)
+    os.makedirs(klasor, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=klasor, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 0600 açar; mevcut dosyanın izinleri korunur
+        izin = os.stat(path).st_mode if os.path.exists(path) else 0o644
+        os.chmod(tmp_path, izin & 0o777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_bytes_atomic(path: str, content: bytes):
+    with atomic_write(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+class WriteSpool:
+    """
+    Tek yazıcı kipi için süreçler arası yazma kuyruğu (SQLite). Her işçi
+    süreç arka plan yazımlarını buraya ekler; yazıcı kilidini tutan tek süreç
+    kayıtları sırayla uygular ve siler. Yazıcı süreç kapanırsa kilidi başka
+    bir süreç devralır. Uygulama ile silme arasında çökme olursa kayıt
+    yeniden uygulanır (en az bir kez).
+    """
+
+    def __init__(self, path=WRITE_SPOOL_PATH, poll_ms=WRITE_SPOOL_POLL_MS):
+        self.path = path
+        self.poll = poll_ms / 1000
+        self._local = threading.local()
+        self._targets = {}
+        self._names = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self.is_writer = False
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS yazma (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    hedef TEXT NOT NULL,
+                    args TEXT NOT NULL,
+                    kayit TEXT NOT NULL,
+                    zaman REAL NOT NULL
+                )
+                """
+            )
+            self._local.conn = conn
+        return conn
+
+    def register(self, name: str, func):
+        """Kuyruktaki kayıtların hangi fonksiyonla yazılacağını adıyla tanıtır."""
+        self._targets[name] = func
+        self._names[func] = name
+        return func
+
+    def put(self, gruplar):
+        """{(func, args): [kayıt, ...]} gruplarını ekler; son kayıt no'sunu döner."""
+        satirlar = []
+        for (func, args), items in gruplar.items():
+            if func not in self._names:
+                raise KeyError(f"Yazma kuyruğunda tanımsız hedef: {func}")
+            args = json.dumps(list(args), ensure_ascii=False, default=str)
+            for item in items:
+                kayit = json.dumps(item, ensure_ascii=False, default=str)
+                satirlar.append((self._names[func], args, kayit, time.time()))
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO yazma (hedef, args, kayit, zaman) VALUES (?, ?, ?, ?)",
+                satirlar,
+            )
+            return conn.execute("SELECT MAX(id) FROM yazma").fetchone()[0]
+
+    def drain(self, apply, limit=1000):
+        """Bekleyen kayıtları `apply(gruplar)` ile yazar; yazılan sayıyı döner."""
+        if not self._targets:
+            return 0
+        adlar = list(self._targets)
+        yer = ", ".join("?" for _ in adlar)
+        conn = self._conn()
+        rows = conn.execute(
+            f"SELECT id, hedef, args, kayit FROM yazma WHERE hedef IN ({yer}) "
+            "ORDER BY id LIMIT ?",
+            (*adlar, limit),
+        ).fetchall()
+        if not rows:
+            return 0
+        gruplar = {}
+        for _, hedef, args, kayit in rows:
+            anahtar = (self._targets[hedef], tuple(json.loads(args)))
+            gruplar.setdefault(anahtar, []).append(json.loads(kayit))
+        apply(gruplar)
+        with conn:
+            conn.execute(
+                f"DELETE FROM yazma WHERE id <= ? AND hedef IN ({yer})",
+                (rows[-1][0], *adlar),
+            )
+        return len(rows)
+
+    def wait_applied(self, last_id, timeout=STORAGE_LOCK_TIMEOUT):
+        """`last_id`'ye kadarki kayıtlar yazıcı tarafından uygulanana kadar bekler."""
+        son_tarih = time.monotonic() + timeout
+        conn = self._conn()
+        while conn.execute("SELECT 1 FROM yazma WHERE id <= ?", (last_id,)).fetchone():
+            if time.monotonic() >= son_tarih:
+                return False
+            time.sleep(min(self.poll, 0.05))
+        return True
+
+    def pending(self):
+        return self._conn().execute("SELECT COUNT(*) FROM yazma").fetchone()[0]
+
+    def _serve(self, apply):
+        lease = FileLock(f"{self.path}.yazici.lock")
+        while not self._stop.is_set():
+            if not self.is_writer:
+                try:
+                    lease.acquire(timeout=0)
+                except Timeout:
+                    self._stop.wait(self.poll)
+                    continue
+                self.is_writer = True
+                logger.info(
+                    "Yazma kuyruğu bu süreçte uygulanıyor (pid %s)", os.getpid()
+                )
+            try:
+                yazilan = self.drain(apply)
+            except sqlite3.Error:
+                logger.exception("Yazma kuyruğu okunamadı")
+                yazilan = 0
+            if not yazilan:
+                self._stop.wait(self.poll)
+        if self.is_writer:
+            while self.drain(apply):
+                pass
+            self.is_writer = False
+            lease.release()
+
+    def start(self, apply):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._serve, args=(apply,), name="write-spool", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=30):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+write_spool = WriteSpool()
@@ -0,0 +1,197 @@
+import asyncio
+import csv
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+
+from utils.http_client import ahttp_get, http_get
+from utils.parcel_cache import parcel_cache
+from utils.parcel_lineage import parcel_successor_index
+
+TKGM_PARSEL_URL = (
+    "https://cbsapi.tkgm.gov.tr/megsiswebapi.v3/api/parsel/{mahalle_id}/{ada}/{parsel}"
+)
+TKGM_BATCH_MAX_CONCURRENCY = int(os.getenv("TKGM_BATCH_MAX_CONCURRENCY", "20"))
+TKGM_BATCH_TIMEOUT = float(os.getenv("TKGM_BATCH_TIMEOUT", "15"))
+TKGM_TIMEOUT = float(os.getenv("TKGM_TIMEOUT", "15"))
+PARCEL_LINEAGE_MAX_HOPS = int(os.getenv("PARCEL_LINEAGE_MAX_HOPS", "5"))
+
+# CSV başlıkları için kabul edilen alternatif isimler
+PARCEL_COLUMN_ALIASES = {
+    "mahalle_id": ("mahalle_id", "mahalleid", "mahalleId", "MahalleID"),
+    "ada": ("ada", "Ada", "adaNo", "ada_no"),
+    "parsel": ("parsel", "Parsel", "parselNo", "parsel_no"),
+}
+
+
+def parcel_url(mahalle_id: int, ada: int, parsel: int):
+    return TKGM_PARSEL_URL.format(mahalle_id=mahalle_id, ada=ada, parsel=parsel)
+
+
+def _to_triple(item):
+    if isinstance(item, dict):
+        values = []
+        for field, aliases in PARCEL_COLUMN_ALIASES.items():
+            value = next(
+                (item[a] for a in aliases if item.get(a) not in (None, "")), None
+            )
+            if value is None:
+                raise ValueError(f"'{field}' alanı eksik: {item}")
+            values.append(value)
+    else:
+        values = list(item)
+        if len(values) != 3:
+            raise ValueError(f"(mahalle_id, ada, parsel) üçlüsü bekleniyordu: {item}")
+    return tuple(int(float(v)) for v in values)
+
+
+def parse_parcel_triples(items):
+    """JSON listesi (dict veya [mahalle_id, ada, parsel]) -> üçlü listesi."""
+    if isinstance(items, dict):
+        items = items.get("parseller", [])
+    return [_to_triple(item) for item in items]
+
+
+def read_parcel_triples_csv(content):
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(content))
+    return [_to_triple(row) for row in reader]
+
+
+def fetch_parcel_raw(mahalle_id: int, ada: int, parsel: int):
+    """TKGM'den ham parsel yanıtını indirir; başarısızsa None döner."""
+    try:
+        response = http_get(parcel_url(mahalle_id, ada, parsel), timeout=TKGM_TIMEOUT)
+    except requests.exceptions.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def fetch_parcel_cached(mahalle_id: int, ada: int, parsel: int):
+    return parcel_cache.get_or_fetch(
+        (int(mahalle_id), int(ada), int(parsel)), fetch_parcel_raw
+    )
+
+
+def extract_successor(data):
+    """Pasif parsel yanıtından (yeni_ada, yeni_parsel, sebep) çıkarır."""
+    if not isinstance(data, dict) or data.get("geometry") is not None:
+        return None
+    props = data.get("properties") or {}
+    liste = props.get("gittigiParselListe")
+    if not liste:
+        return None
+    try:
+        gitti = json.loads(liste) if isinstance(liste, str) else liste
+        feature = gitti["features"][0]["properties"]
+        yeni_ada, yeni_parsel = int(feature["adaNo"]), int(feature["parselNo"])
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+    return yeni_ada, yeni_parsel, props.get("gittigiParselSebep")
+
+
+def resolve_parcel_lineage(
+    mahalle_id: int, ada: int, parsel: int, max_hops=PARCEL_LINEAGE_MAX_HOPS
+):
+    """
+    Parseli aktif haline kadar izler. Önce halef indeksindeki bilinen adımlar
+    atlanır, yalnızca bilinmeyen adımlar için TKGM'ye gidilir ve bulunan yeni
+    eşleşmeler indekse yazılır.
+    """
+    key = (int(mahalle_id), int(ada), int(parsel))
+    key, zincir = parcel_successor_index.resolve(key, max_hops)
+    data = fetch_parcel_cached(*key)
+    while data is not None and len(zincir) < max_hops:
+        halef = extract_successor(data)
+        if halef is None:
+            break
+        yeni = (key[0], halef[0], halef[1])
+        parcel_successor_index.record(key, yeni, halef[2])
+        zincir.append({"eski": key, "yeni": yeni, "sebep": halef[2]})
+        key = yeni
+        data = fetch_parcel_cached(*key)
+    return {
+        "mahalle_id": int(mahalle_id),
+        "ada": int(ada),
+        "parsel": int(parsel),
+        "aktif": {"mahalle_id": key[0], "ada": key[1], "parsel": key[2]},
+        "zincir": zincir,
+        "data": data,
+    }
+
+
+def resolve_parcel_lineages(triples, max_workers=TKGM_BATCH_MAX_CONCURRENCY):
+    def soyagaci(triple):
+        sonuc = resolve_parcel_lineage(*triple)
+        sonuc["success"] = sonuc.pop("data") is not None
+        return sonuc
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(soyagaci, triples))
+
+
+async def fetch_parcel_async(mahalle_id, ada, parsel, timeout=TKGM_BATCH_TIMEOUT):
+    sonuc = {"mahalle_id": mahalle_id, "ada": ada, "parsel": parsel}
+    hata = {}
+
+    async def indir(mahalle_id, ada, parsel):
+        try:
+            response = await ahttp_get(
+                parcel_url(mahalle_id, ada, parsel), timeout=timeout
+            )
+        except httpx.HTTPError as e:
+            hata["message"] = f"İstek hatası: {e}"
+            return None
+        if response.status_code != 200:
+            hata["status_code"] = response.status_code
+            hata["message"] = "Parsel bulunamadı veya API hatası."
+            return None
+        try:
+            return response.json()
+        except ValueError as e:
+            hata["message"] = f"JSON parse hatası: {e}"
+            return None
+
+    data = await parcel_cache.aget_or_fetch(
+        (mahalle_id, ada, parsel), indir, revalidate=fetch_parcel_raw
+    )
+    if data is None:
+        return {**sonuc, "success": False, **hata}
+    return {**sonuc, "success": True, "data": data}
+
+
+async def afetch_parcel_cached(mahalle_id: int, ada: int, parsel: int):
+    sonuc = await fetch_parcel_async(
+        int(mahalle_id), int(ada), int(parsel), timeout=TKGM_TIMEOUT
+    )
+    return sonuc.get("data")
+
+
+async def iter_parcels_concurrently(
+    triples, max_concurrency=TKGM_BATCH_MAX_CONCURRENCY, timeout=TKGM_BATCH_TIMEOUT
+):
+    """Parselleri paylaşılan bağlantı havuzu üzerinden, en fazla `max_concurrency`
+    eşzamanlı istekle sorgular; sonuçları tamamlandıkça üretir."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def worker(triple):
+        async with semaphore:
+            return await fetch_parcel_async(*triple, timeout=timeout)
+
+    tasks = [asyncio.create_task(worker(t)) for t in triples]
+    try:
+        for future in asyncio.as_completed(tasks):
+            yield await future
+    finally:
+        for task in tasks:
+            task.cancel()
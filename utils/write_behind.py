@@ -0,0 +1,245 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from utils.storage import STORAGE_SINGLE_WRITER, write_spool
+
+WRITE_BEHIND_FLUSH_SIZE = int(os.getenv("WRITE_BEHIND_FLUSH_SIZE", "200"))
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "250"))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "50000"))
+# Okuma uç noktaları kendi yazımlarını görmek için en fazla bu kadar bekler
+WRITE_BEHIND_FLUSH_TIMEOUT = float(os.getenv("WRITE_BEHIND_FLUSH_TIMEOUT", "5"))
+WRITE_BEHIND_DEAD_LETTER = os.getenv(
+    "WRITE_BEHIND_DEAD_LETTER", "data/cache/yazilamayan_kayitlar.jsonl"
+)
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class _FlushMarker:
+    def __init__(self):
+        self.event = threading.Event()
+
+
+class WriteBehindQueue:
+    """
+    Kayıt yazımlarını istek yolundan ayıran arka plan kuyruğu. `submit`
+    hemen döner; kayıtlar `flush_size` kayıtta ya da ilk kayıttan
+    `flush_interval_ms` sonra, aynı hedefe gidenler tek çağrıda yazılır.
+    `spool` verilirse (STORAGE_SINGLE_WRITER) toplanan kayıtlar süreçler arası
+    yazma kuyruğuna bırakılır ve yalnızca yazıcı süreç tarafından uygulanır.
+    Kapanışta (atexit / uygulama shutdown) bekleyen her şey diske yazılır;
+    yazılamayan kayıtlar `dead_letter` dosyasına eklenir.
+    """
+
+    def __init__(
+        self,
+        flush_size=WRITE_BEHIND_FLUSH_SIZE,
+        flush_interval_ms=WRITE_BEHIND_FLUSH_MS,
+        max_pending=WRITE_BEHIND_MAX_PENDING,
+        dead_letter=WRITE_BEHIND_DEAD_LETTER,
+        spool=None,
+    ):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.dead_letter = dead_letter
+        self.spool = spool
+        self._spooled = 0
+        # Kuyruk sınırlıdır: dolunca kayıtlar kuyruğa değil yedek yola gider
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {
+            "submitted": 0,
+            "written": 0,
+            "batches": 0,
+            "errors": 0,
+            "spilled": 0,
+        }
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="write-behind", daemon=True
+                )
+                self._thread.start()
+            if self.spool is not None and not self._closed:
+                self.spool.start(self._apply)
+
+    def start(self):
+        """Yazıcıyı önceden başlatır (tek yazıcı kipinde kuyruğu devralabilmek için)."""
+        self._ensure_worker()
+
+    def submit(self, func, item, *args):
+        """
+        `func(*args, [item, ...])` çağrısına toplanacak bir kayıt ekler. Hiç
+        beklemez (async koddan çağrılabilir): kuyruk doluysa kayıt
+        süreçler arası yazma kuyruğuna, o da yoksa `dead_letter` dosyasına
+        bırakılır.
+        """
+        if self._closed:
+            # Kapanıştan sonra gelen kayıt kaybolmasın: doğrudan yazılır
+            self._write({(func, args): [item]})
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(((func, args), item))
+        except queue.Full:
+            self._spill(func, args, item)
+            return
+        self.stats["submitted"] += 1
+
+    def _spill(self, func, args, item):
+        self.stats["spilled"] += 1
+        if self.spool is not None:
+            try:
+                self._spooled = self.spool.put({(func, args): [item]})
+                return
+            except Exception:
+                logger.exception("Yazma kuyruğuna eklenemedi")
+        logger.warning(
+            "Yazma kuyruğu dolu; kayıt %s dosyasına bırakıldı", self.dead_letter
+        )
+        self._dead_letter(func, args, [item])
+
+    def _write(self, gruplar):
+        if self.spool is not None and gruplar:
+            try:
+                self._spooled = self.spool.put(gruplar)
+                return
+            except Exception:
+                logger.exception("Yazma kuyruğuna eklenemedi; doğrudan yazılıyor")
+        self._apply(gruplar)
+
+    def _apply(self, gruplar):
+        for (func, args), items in gruplar.items():
+            try:
+                func(*args, items)
+            except Exception:
+                if len(items) == 1:
+                    self.stats["errors"] += 1
+                    logger.exception("Arka plan yazımı başarısız: %s", func)
+                    self._dead_letter(func, args, items)
+                    continue
+            else:
+                self.stats["written"] += len(items)
+                self.stats["batches"] += 1
+                continue
+            # Toplu yazım başarısız: hatalı kaydı ayıklamak için tek tek dene
+            for item in items:
+                self._apply({(func, args): [item]})
+
+    def _dead_letter(self, func, args, items):
+        try:
+            os.makedirs(os.path.dirname(self.dead_letter) or ".", exist_ok=True)
+            with open(self.dead_letter, "a", encoding="utf-8") as f:
+                for item in items:
+                    kayit = {
+                        "hedef": getattr(func, "__qualname__", str(func)),
+                        "args": args,
+                        "kayit": item,
+                        "zaman": time.time(),
+                    }
+                    f.write(json.dumps(kayit, ensure_ascii=False, default=str))
+                    f.write("\n")
+        except OSError:
+            logger.exception("Yazılamayan kayıtlar da kaydedilemedi")
+
+    def _run(self):
+        while True:
+            anahtar_item = self._queue.get()
+            gruplar = {}
+            sayi = 0
+            isaretler = []
+            durdur = False
+            son_tarih = time.monotonic() + self.flush_interval
+            while True:
+                if anahtar_item is _STOP:
+                    durdur = True
+                elif isinstance(anahtar_item, _FlushMarker):
+                    isaretler.append(anahtar_item)
+                else:
+                    anahtar, item = anahtar_item
+                    gruplar.setdefault(anahtar, []).append(item)
+                    sayi += 1
+                if durdur or isaretler or sayi >= self.flush_size:
+                    break
+                kalan = son_tarih - time.monotonic()
+                if kalan <= 0:
+                    break
+                try:
+                    anahtar_item = self._queue.get(timeout=kalan)
+                except queue.Empty:
+                    break
+            if gruplar:
+                self._write(gruplar)
+            for isaret in isaretler:
+                isaret.event.set()
+            if durdur:
+                return
+
+    def flush(self, timeout=None):
+        """
+        Şu ana kadar eklenen kayıtlar yazılana kadar en fazla `timeout`
+        saniye bekler (kuyruk doluyken işaret koymak dahil); hepsi yazıldıysa
+        True döner.
+        """
+        son_tarih = None if timeout is None else time.monotonic() + timeout
+
+        def kalan():
+            return None if son_tarih is None else max(0.0, son_tarih - time.monotonic())
+
+        if self._thread is not None and self._thread.is_alive():
+            isaret = _FlushMarker()
+            try:
+                self._queue.put(isaret, timeout=kalan())
+            except queue.Full:
+                return False
+            if not isaret.event.wait(kalan()):
+                return False
+        if self.spool is not None and self._spooled:
+            # Yazıcı süreç bu sürecin kuyruğa bıraktıklarını uygulayana kadar
+            return self.spool.wait_applied(
+                self._spooled, 30 if timeout is None else kalan()
+            )
+        return True
+
+    def close(self, timeout=30):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+        # Durdurma işaretinden sonra kuyruğa girmiş kayıtlar
+        gruplar = {}
+        while True:
+            try:
+                anahtar_item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(anahtar_item, _FlushMarker):
+                anahtar_item.event.set()
+            elif anahtar_item is not _STOP:
+                anahtar, item = anahtar_item
+                gruplar.setdefault(anahtar, []).append(item)
+        self._write(gruplar)
+        if self.spool is not None:
+            self.spool.stop()
+
+    def pending(self):
+        return self._queue.qsize()
+
+
+write_behind = WriteBehindQueue(spool=write_spool if STORAGE_SINGLE_WRITER else None)
+atexit.register(write_behind.close)